@@ -10,6 +10,7 @@ from typing import Optional, List
 import logging
 from datetime import datetime, timedelta
 
+from config.database import get_read_db
 from core.dependencies import get_db, get_current_user
 from models.database import User, ActivityLog
 from schemas.activity_logs import (
@@ -30,7 +31,7 @@ async def list_activity_logs(
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     user_id: Optional[int] = Query(None, description="Filter by user ID (admin only)"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List activity logs with pagination and filtering
@@ -210,7 +211,7 @@ async def get_activity_analytics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     user_id: Optional[int] = Query(None, description="Filter by user ID (admin only)"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get activity analytics and insights
@@ -311,7 +312,7 @@ async def search_activity_logs(
     days: int = Query(30, ge=1, le=365, description="Number of days to search"),
     limit: int = Query(20, ge=1, le=50, description="Maximum results"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search activity logs with full-text search
@@ -412,7 +413,7 @@ async def bulk_create_activity_logs(
 async def export_activity_logs_csv(
     days: int = Query(30, ge=1, le=365, description="Number of days to export"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Export activity logs as CSV
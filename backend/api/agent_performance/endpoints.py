@@ -10,6 +10,7 @@ from typing import Optional, List
 import logging
 from datetime import datetime, timedelta
 
+from config.database import get_read_db
 from core.dependencies import get_db, get_current_user
 from models.database import User, AgentPerformance, Agent
 from schemas.agent_performance import (
@@ -32,7 +33,7 @@ async def list_agent_performance(
     metric_type: Optional[str] = Query(None, description="Filter by metric type"),
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List agent performance metrics with pagination and filtering
@@ -295,7 +296,7 @@ async def get_performance_analytics(
     metric_type: Optional[str] = Query(None, description="Filter by metric type"),
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get comprehensive performance analytics
@@ -414,7 +415,7 @@ async def search_performance_records(
     agent_id: Optional[int] = Query(None, description="Filter by agent ID"),
     limit: int = Query(20, ge=1, le=50, description="Maximum results"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search performance records with advanced filtering
@@ -465,7 +466,7 @@ async def search_performance_records(
 @router.get("/metrics/types")
 async def get_metric_types(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all available metric types used by the user's agents
@@ -13,6 +13,7 @@ from models.agent import (
 from models.shared import SuccessResponse
 from core.dependencies import get_current_user, get_optional_user
 from services.agent_service import AgentService
+from services.usage_service import usage_tracker
 from config.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -219,7 +220,7 @@ async def test_agent(
 ):
     """Test agent with a message"""
     try:
-        result = await agent_service.test_agent(db, agent_id, request.message)
+        result = await agent_service.test_agent(db, agent_id, request.message, user_id=current_user["user_id"])
         
         # Check if there was an error
         if result.get("status") == "error":
@@ -465,6 +466,22 @@ async def get_agent_usage_history(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{agent_id}/usage", response_model=SuccessResponse)
+async def get_agent_usage(
+    agent_id: int,
+    current_user: Dict = Depends(get_current_user),
+    days: int = Query(default=30, ge=1, le=365)
+):
+    """Get agent token and cost usage against its daily and monthly quotas"""
+    try:
+        usage = await usage_tracker.get_usage("agent", agent_id, days)
+        return SuccessResponse(
+            message="Usage retrieved successfully",
+            data=usage
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/{agent_id}/backup", response_model=SuccessResponse)
 async def backup_agent(
     agent_id: int,
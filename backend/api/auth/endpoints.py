@@ -8,17 +8,18 @@ from fastapi.responses import RedirectResponse
 from typing import Dict, Any, Optional
 from models.shared import LoginRequest, RegisterRequest, TokenRefreshRequest, SuccessResponse, UserResponse, SystemStatus
 from core.dependencies import get_current_user, get_current_admin
+from core.security import PasswordHashingBusy
 from services.auth_service import AuthService
 from services.gemini_service import gemini_service
 from config.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.database import User
 
-try:
-    from google_auth_oauthlib.flow import Flow
-    GOOGLE_AUTH_AVAILABLE = True
-except ImportError:
-    GOOGLE_AUTH_AVAILABLE = False
+from core.lazy_imports import is_available, load_module
+
+# google_auth_oauthlib is imported on first use of the OAuth routes
+GOOGLE_AUTH_AVAILABLE = is_available("google_auth_oauthlib")
+if not GOOGLE_AUTH_AVAILABLE:
     print("Warning: Google OAuth libraries not available. Some features will be disabled.")
 
 # Initialize router and service
@@ -36,6 +37,8 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordHashingBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts, try again shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail="Login failed")
 
@@ -182,7 +185,8 @@ async def google_auth_url():
         }
         
     try:
-        flow = Flow.from_client_secrets_file(
+        oauth_flow = await load_module("google_auth_oauthlib.flow")
+        flow = oauth_flow.Flow.from_client_secrets_file(
             'client_secrets.json',
             scopes=['https://www.googleapis.com/auth/generative-ai'],
             redirect_uri="http://localhost:8000/auth/google/callback"
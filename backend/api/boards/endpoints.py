@@ -3,26 +3,45 @@ Boards API Endpoints
 Provides operations for workflow boards and visual programming
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, desc, update
+from sqlalchemy import select, and_, desc, update
 from typing import Optional, List, Dict, Any
+import asyncio
 import logging
+import time
+import uuid
 from datetime import datetime
 import json
 
+from config.database import AsyncSessionLocal
+from config.settings import settings
 from core.dependencies import get_db, get_current_user
-from models.database import User, Board, BoardNode, BoardConnection, BoardExecution
+from core.job_queue import job_queue
+from models.database import User, Board, BoardExecution, BoardTemplate, BoardTrigger
 from schemas.boards import (
     BoardCreate,
     BoardUpdate,
+    BoardPatchRequest,
     BoardResponse,
     BoardListResponse,
     BoardDetailResponse,
     BoardExecutionRequest,
+    BoardFromTemplateRequest,
+    BoardTriggerCreate,
+    BoardTriggerUpdate,
+    BoardTriggerResponse,
     BoardExecutionResponse,
     BoardAnalyticsResponse
 )
+from services.board_artifacts import artifacts
+from services.board_events import execution_events
+from services.board_executor import BoardGraphError, board_executor
+from services.board_node_cache import node_results
+from core.json_patch import JsonPatchError
+from services.board_service import InvalidCursor, RevisionConflict, board_service
+from services.board_triggers import trigger_scheduler, validate_trigger
 
 router = APIRouter(prefix="/boards", tags=["Boards"])
 logger = logging.getLogger(__name__)
@@ -45,99 +64,72 @@ BOARD_STATUS_OPTIONS = {
     "archived": "Archived"
 }
 
+def _board_query(board_id: str, current_user: Dict[str, Any], owner_only: bool = False):
+    """Admins reach every board; others their own, plus public boards unless owner_only"""
+    query = select(Board).where(Board.id == board_id)
+    if current_user.get("role") == "admin":
+        return query
+    if owner_only:
+        return query.where(Board.user_id == current_user["user_id"])
+    return query.where((Board.user_id == current_user["user_id"]) | (Board.visibility == "public"))
+
+def _board_record(board: Board) -> Dict[str, Any]:
+    return {
+        "id": board.id,
+        "name": board.name,
+        "description": board.description,
+        "board_type": board.board_type,
+        "board_data": board.board_data,
+        "status": board.status,
+        "is_public": board.visibility == "public",
+        "user_id": board.user_id,
+        "version": board.version,
+        "execution_count": board.execution_count,
+        "last_execution_at": board.last_execution,
+        "created_at": board.created_at,
+        "updated_at": board.updated_at
+    }
+
+
 @router.get("/", response_model=BoardListResponse)
 async def list_boards(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (prefer cursor for deep pages)"),
     limit: int = Query(20, ge=1, le=100, description="Maximum records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     board_type: Optional[str] = Query(None, description="Filter by board type"),
     status: Optional[str] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(None, description="Search in name or description"),
     is_public: Optional[bool] = Query(None, description="Filter by public boards"),
-    current_user: User = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    List workflow boards with pagination and filtering
+    List workflow boards with keyset pagination and filtering
     
-    Users see their own boards plus public boards
+    Users see their own boards plus public boards. total is only returned for the first page
     """
     try:
-        # Build query based on user permissions
-        if current_user.role == "admin":
-            query = select(Board)
-        else:
-            # Users see their own boards and public boards
-            query = select(Board).where(
-                (Board.user_id == current_user.id) | (Board.is_public == True)
-            )
-        
-        # Apply filters
-        if board_type and board_type in BOARD_TYPES:
-            query = query.where(Board.board_type == board_type)
-        
-        if status and status in BOARD_STATUS_OPTIONS:
-            query = query.where(Board.status == status)
-        
-        if search:
-            search_filter = f"%{search}%"
-            query = query.where(
-                (Board.name.ilike(search_filter)) |
-                (Board.description.ilike(search_filter))
-            )
+        page = await board_service.list_boards(
+            db,
+            current_user["user_id"],
+            is_admin=current_user.get("role") == "admin",
+            board_type=board_type if board_type in BOARD_TYPES else None,
+            status=status if status in BOARD_STATUS_OPTIONS else None,
+            search=search,
+            is_public=is_public,
+            limit=limit,
+            cursor=cursor,
+            skip=skip
+        )
         
-        if is_public is not None:
-            query = query.where(Board.is_public == is_public)
-        
-        # Get total count
-        total_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(total_query)
-        total = total_result.scalar()
-        
-        # Apply pagination and ordering
-        query = query.order_by(desc(Board.updated_at))
-        query = query.offset(skip).limit(limit)
-        
-        # Execute query
-        result = await db.execute(query)
-        boards = result.scalars().all()
-        
-        # Enhance with node counts and execution stats
-        enhanced_boards = []
-        for board in boards:
-            # Get node count
-            node_count_query = select(func.count()).where(BoardNode.board_id == board.id)
-            node_result = await db.execute(node_count_query)
-            node_count = node_result.scalar()
-            
-            # Get recent executions count
-            execution_count_query = select(func.count()).where(BoardExecution.board_id == board.id)
-            execution_result = await db.execute(execution_count_query)
-            execution_count = execution_result.scalar()
-            
-            enhanced_boards.append({
-                "id": board.id,
-                "name": board.name,
-                "description": board.description,
-                "board_type": board.board_type,
-                "status": board.status,
-                "is_public": board.is_public,
-                "user_id": board.user_id,
-                "node_count": node_count,
-                "execution_count": execution_count,
-                "created_at": board.created_at,
-                "updated_at": board.updated_at
-            })
-        
-        logger.info(f"Listed {len(boards)} boards for user {current_user.id}")
+        logger.info(f"Listed {len(page['boards'])} boards for user {current_user['user_id']}")
         
         return BoardListResponse(
             success=True,
             data={
-                "boards": enhanced_boards,
-                "total": total,
+                **page,
                 "skip": skip,
                 "limit": limit,
-                "has_more": (skip + len(boards)) < total,
                 "board_types": BOARD_TYPES,
                 "status_options": BOARD_STATUS_OPTIONS,
                 "filters_applied": {
@@ -149,6 +141,8 @@ async def list_boards(
             }
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing boards: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -203,97 +197,49 @@ async def create_board(
 
 @router.get("/{board_id}", response_model=BoardDetailResponse)
 async def get_board(
-    board_id: int,
-    current_user: User = Depends(get_current_user),
+    board_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get detailed board information including nodes and connections
+    
+    Nodes and connections come from the compiled graph cache while the board version is unchanged
     """
     try:
-        # Check board access
-        if current_user.role == "admin":
-            board_query = select(Board).where(Board.id == board_id)
-        else:
-            board_query = select(Board).where(
-                and_(
-                    Board.id == board_id,
-                    (Board.user_id == current_user.id) | (Board.is_public == True)
-                )
-            )
-        
-        board_result = await db.execute(board_query)
+        board_result = await db.execute(_board_query(board_id, current_user))
         board = board_result.scalar_one_or_none()
         
         if not board:
             raise HTTPException(status_code=404, detail="Board not found or access denied")
         
-        # Get board nodes
-        nodes_query = select(BoardNode).where(BoardNode.board_id == board_id)
-        nodes_result = await db.execute(nodes_query)
-        nodes = nodes_result.scalars().all()
-        
-        # Get board connections
-        connections_query = select(BoardConnection).where(BoardConnection.board_id == board_id)
-        connections_result = await db.execute(connections_query)
-        connections = connections_result.scalars().all()
+        graph = await board_service.get_graph(db, board_id, board.version)
         
         # Get recent executions
-        executions_query = select(BoardExecution).where(
+        executions_query = select(
+            BoardExecution.id, BoardExecution.status, BoardExecution.execution_type,
+            BoardExecution.started_at, BoardExecution.completed_at, BoardExecution.execution_time_ms,
+            BoardExecution.error_message
+        ).where(
             BoardExecution.board_id == board_id
         ).order_by(desc(BoardExecution.created_at)).limit(10)
         executions_result = await db.execute(executions_query)
-        executions = executions_result.scalars().all()
         
-        logger.info(f"Retrieved board {board_id} for user {current_user.id}")
+        logger.info(f"Retrieved board {board_id} for user {current_user['user_id']}")
         
         return BoardDetailResponse(
             success=True,
             data={
-                "board": {
-                    "id": board.id,
-                    "name": board.name,
-                    "description": board.description,
-                    "board_type": board.board_type,
-                    "board_data": board.board_data,
-                    "status": board.status,
-                    "is_public": board.is_public,
-                    "user_id": board.user_id,
-                    "created_at": board.created_at,
-                    "updated_at": board.updated_at
-                },
-                "nodes": [
-                    {
-                        "id": node.id,
-                        "node_type": node.node_type,
-                        "position_x": node.position_x,
-                        "position_y": node.position_y,
-                        "node_data": node.node_data,
-                        "is_active": node.is_active
-                    } for node in nodes
-                ],
-                "connections": [
-                    {
-                        "id": conn.id,
-                        "source_node_id": conn.source_node_id,
-                        "target_node_id": conn.target_node_id,
-                        "connection_type": conn.connection_type,
-                        "connection_data": conn.connection_data
-                    } for conn in connections
-                ],
-                "recent_executions": [
-                    {
-                        "id": exec.id,
-                        "status": exec.status,
-                        "start_time": exec.start_time,
-                        "end_time": exec.end_time,
-                        "result": exec.result
-                    } for exec in executions
-                ],
+                "board": _board_record(board),
+                "nodes": [node.to_dict() for node in graph.nodes.values()],
+                "connections": [connection.to_dict() for connection in graph.connections],
+                "recent_executions": [dict(row._mapping) for row in executions_result],
                 "statistics": {
-                    "total_nodes": len(nodes),
-                    "total_connections": len(connections),
-                    "total_executions": len(executions)
+                    "total_nodes": len(graph.nodes),
+                    "total_connections": len(graph.connections),
+                    "total_executions": board.execution_count,
+                    "executable": graph.error is None,
+                    "graph_error": graph.error
                 }
             }
         )
@@ -307,24 +253,16 @@ async def get_board(
 
 @router.put("/{board_id}", response_model=BoardResponse)
 async def update_board(
-    board_id: int,
+    board_id: str,
     board_data: BoardUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Update board information and configuration
     """
     try:
-        # Check board ownership
-        if current_user.role == "admin":
-            board_query = select(Board).where(Board.id == board_id)
-        else:
-            board_query = select(Board).where(
-                and_(Board.id == board_id, Board.user_id == current_user.id)
-            )
-        
-        board_result = await db.execute(board_query)
+        board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
         board = board_result.scalar_one_or_none()
         
         if not board:
@@ -335,36 +273,130 @@ async def update_board(
             board.name = board_data.name
         if board_data.description is not None:
             board.description = board_data.description
-        if board_data.board_data is not None:
-            board.board_data = board_data.board_data
         if board_data.status is not None:
             if board_data.status not in BOARD_STATUS_OPTIONS:
                 raise HTTPException(status_code=400, detail="Invalid status")
             board.status = board_data.status
         if board_data.is_public is not None:
-            board.is_public = board_data.is_public
+            board.visibility = "public" if board_data.is_public else "private"
         
         board.updated_at = datetime.utcnow()
         
+        if board_data.board_data is not None:
+            # Stored as a revision; prefer PATCH for small edits
+            await board_service.save_board_data(db, board, current_user["user_id"], board_data=board_data.board_data)
+        
         await db.commit()
         await db.refresh(board)
         
-        logger.info(f"Updated board {board_id} by user {current_user.id}")
+        logger.info(f"Updated board {board_id} by user {current_user['user_id']}")
         
         return BoardResponse(
             success=True,
-            data=board,
+            data=_board_record(board),
             message="Board updated successfully"
         )
         
     except HTTPException:
         raise
+    except RevisionConflict as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating board {board_id}: {e}")
         await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.patch("/{board_id}", response_model=BoardResponse)
+async def patch_board(
+    board_id: str,
+    patch: BoardPatchRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply JSON Patch operations to board_data - the autosave path
+    
+    Send base_version to be told (409) when someone else saved in between
+    """
+    try:
+        board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
+        board = board_result.scalar_one_or_none()
+        
+        if not board:
+            raise HTTPException(status_code=404, detail="Board not found or access denied")
+        
+        version = await board_service.save_board_data(
+            db, board, current_user["user_id"], operations=patch.operations, base_version=patch.base_version
+        )
+        await db.commit()
+        
+        return BoardResponse(
+            success=True,
+            data={"board_id": board_id, "version": version}
+        )
+        
+    except HTTPException:
+        raise
+    except JsonPatchError as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
+    except RevisionConflict as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error patching board {board_id}: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{board_id}/revisions", response_model=BoardResponse)
+async def list_board_revisions(
+    board_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Maximum revisions to return"),
+    before: Optional[int] = Query(None, description="Only revisions older than this one"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List board_data revisions, newest first
+    """
+    board_result = await db.execute(_board_query(board_id, current_user))
+    if board_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    revisions = await board_service.list_revisions(db, board_id, limit=limit, before=before)
+    return BoardResponse(
+        success=True,
+        data={"board_id": board_id, "revisions": revisions, "has_more": len(revisions) == limit}
+    )
+
+
+@router.get("/{board_id}/revisions/{revision}", response_model=BoardResponse)
+async def get_board_revision(
+    board_id: str,
+    revision: int,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get board_data as it was at a revision
+    """
+    board_result = await db.execute(_board_query(board_id, current_user))
+    if board_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    board_data = await board_service.get_revision(db, board_id, revision)
+    if board_data is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    
+    return BoardResponse(
+        success=True,
+        data={"board_id": board_id, "revision": revision, "board_data": board_data}
+    )
+
+
 @router.delete("/{board_id}")
 async def delete_board(
     board_id: int,
@@ -424,29 +456,21 @@ async def delete_board(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.post("/{board_id}/execute", response_model=BoardExecutionResponse)
+@router.post("/{board_id}/execute", response_model=BoardExecutionResponse, status_code=202)
 async def execute_board(
-    board_id: int,
+    board_id: str,
     execution_data: BoardExecutionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Execute a workflow board
+    Queue a workflow board for execution
+    
+    The run happens in a background worker; follow it with
+    GET /executions/{execution_id}/events or poll GET /executions/{execution_id}
     """
     try:
-        # Check board access
-        if current_user.role == "admin":
-            board_query = select(Board).where(Board.id == board_id)
-        else:
-            board_query = select(Board).where(
-                and_(
-                    Board.id == board_id,
-                    (Board.user_id == current_user.id) | (Board.is_public == True)
-                )
-            )
-        
-        board_result = await db.execute(board_query)
+        board_result = await db.execute(_board_query(board_id, current_user))
         board = board_result.scalar_one_or_none()
         
         if not board:
@@ -455,42 +479,24 @@ async def execute_board(
         if board.status != "active":
             raise HTTPException(status_code=400, detail="Board must be active to execute")
         
-        # Create execution record
-        execution = BoardExecution(
-            board_id=board_id,
-            user_id=current_user.id,
-            status="running",
-            start_time=datetime.utcnow(),
-            input_data=execution_data.input_data or {},
-            created_at=datetime.utcnow()
-        )
-        
-        db.add(execution)
-        await db.commit()
-        await db.refresh(execution)
-        
-        # TODO: Implement actual board execution logic here
-        # This would involve:
-        # 1. Loading board nodes and connections
-        # 2. Creating execution graph
-        # 3. Running nodes in proper order
-        # 4. Handling data flow between nodes
-        # 5. Managing execution state
-        
-        # For now, simulate execution
-        execution.status = "completed"
-        execution.end_time = datetime.utcnow()
-        execution.result = {
-            "success": True,
-            "output": "Board execution completed successfully",
-            "execution_time": 1.5,
-            "nodes_executed": 5
-        }
-        
+        # Boards that cannot run are rejected; the execution row and its job are committed together
+        try:
+            execution = await board_executor.queue_execution(
+                db,
+                board_id,
+                board.version,
+                current_user["user_id"],
+                execution_data.input_data,
+                timeout=execution_data.timeout,
+                execution_mode=execution_data.execution_mode or "normal",
+                use_cache=execution_data.use_cache is not False
+            )
+        except BoardGraphError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         await db.commit()
-        await db.refresh(execution)
+        job_queue.wake()
         
-        logger.info(f"Executed board {board_id} by user {current_user.id}")
+        logger.info(f"Queued board {board_id} execution {execution.id} by user {current_user['user_id']}")
         
         return BoardExecutionResponse(
             success=True,
@@ -498,12 +504,10 @@ async def execute_board(
                 "execution_id": execution.id,
                 "board_id": board_id,
                 "status": execution.status,
-                "start_time": execution.start_time,
-                "end_time": execution.end_time,
-                "result": execution.result,
-                "input_data": execution.input_data
+                "total_nodes": execution.total_nodes,
+                "input_data": execution.trigger_data
             },
-            message="Board execution completed"
+            message="Board execution queued"
         )
         
     except HTTPException:
@@ -514,6 +518,359 @@ async def execute_board(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.delete("/{board_id}/cache")
+async def clear_board_cache(
+    board_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Drop the cached node results of a board so the next run recomputes every node
+    """
+    board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
+    if board_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    await node_results.invalidate_tags(f"board:{board_id}")
+    logger.info(f"Cleared node cache of board {board_id} by user {current_user['user_id']}")
+    
+    return {
+        "success": True,
+        "message": "Board cache cleared"
+    }
+
+
+def _trigger_record(trigger: BoardTrigger) -> Dict[str, Any]:
+    return {
+        "id": trigger.id,
+        "board_id": trigger.board_id,
+        "name": trigger.name,
+        "trigger_type": trigger.trigger_type,
+        "cron_expression": trigger.cron_expression,
+        "event": trigger.event,
+        "filter": trigger.filter,
+        "input_data": trigger.input_data,
+        "catch_up": trigger.catch_up,
+        "is_active": trigger.is_active,
+        "next_run_at": trigger.next_run_at,
+        "last_run_at": trigger.last_run_at,
+        "run_count": trigger.run_count,
+        "last_error": trigger.last_error,
+        "created_at": trigger.created_at,
+        "updated_at": trigger.updated_at
+    }
+
+
+@router.get("/triggers/status")
+async def get_trigger_scheduler_status(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Scheduler state and lag as seen by the worker serving the request (admin only)
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "success": True,
+        "data": await trigger_scheduler.status()
+    }
+
+
+@router.get("/{board_id}/triggers", response_model=BoardTriggerResponse)
+async def list_board_triggers(
+    board_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List the cron and event triggers of a board
+    """
+    board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
+    if board_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    result = await db.execute(
+        select(BoardTrigger).where(BoardTrigger.board_id == board_id).order_by(BoardTrigger.created_at)
+    )
+    return BoardTriggerResponse(
+        success=True,
+        data={"board_id": board_id, "triggers": [_trigger_record(trigger) for trigger in result.scalars()]}
+    )
+
+
+@router.post("/{board_id}/triggers", response_model=BoardTriggerResponse, status_code=201)
+async def create_board_trigger(
+    board_id: str,
+    trigger_data: BoardTriggerCreate,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Run a board on a cron schedule (UTC) or whenever an event happens to its owner
+    """
+    board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
+    board = board_result.scalar_one_or_none()
+    if board is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    try:
+        next_run_at = validate_trigger(
+            trigger_data.trigger_type, trigger_data.cron_expression, trigger_data.event,
+            trigger_data.filter, trigger_data.catch_up, input_data=trigger_data.input_data
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    is_cron = trigger_data.trigger_type == "cron"
+    # Runs and events belong to the board owner, whoever sets the trigger up
+    trigger = BoardTrigger(
+        id=str(uuid.uuid4()),
+        board_id=board_id,
+        user_id=board.user_id,
+        name=trigger_data.name,
+        trigger_type=trigger_data.trigger_type,
+        cron_expression=trigger_data.cron_expression.strip() if is_cron else None,
+        event=None if is_cron else trigger_data.event,
+        filter=None if is_cron else trigger_data.filter,
+        input_data=trigger_data.input_data or {},
+        catch_up=trigger_data.catch_up,
+        is_active=trigger_data.is_active,
+        next_run_at=next_run_at,
+        run_count=0
+    )
+    db.add(trigger)
+    await db.commit()
+    if is_cron:
+        trigger_scheduler.wake()
+    
+    logger.info(f"Created {trigger.trigger_type} trigger {trigger.id} on board {board_id} by user {current_user['user_id']}")
+    
+    return BoardTriggerResponse(
+        success=True,
+        data=_trigger_record(trigger),
+        message="Trigger created"
+    )
+
+
+@router.put("/{board_id}/triggers/{trigger_id}", response_model=BoardTriggerResponse)
+async def update_board_trigger(
+    board_id: str,
+    trigger_id: str,
+    trigger_data: BoardTriggerUpdate,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Update a trigger; a cron trigger is rescheduled from now
+    """
+    board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
+    if board_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    trigger = await db.get(BoardTrigger, trigger_id)
+    if trigger is None or trigger.board_id != board_id:
+        raise HTTPException(status_code=404, detail="Trigger not found")
+    
+    changes = trigger_data.dict(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(trigger, field, value)
+    
+    try:
+        next_run_at = validate_trigger(
+            trigger.trigger_type, trigger.cron_expression, trigger.event, trigger.filter, trigger.catch_up,
+            input_data=trigger.input_data
+        )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    is_cron = trigger.trigger_type == "cron"
+    if is_cron and ({"cron_expression", "is_active"} & changes.keys()):
+        # Runs missed while paused are not caught up
+        trigger.next_run_at = next_run_at
+        trigger.last_error = None
+    await db.commit()
+    if is_cron:
+        trigger_scheduler.wake()
+    
+    return BoardTriggerResponse(
+        success=True,
+        data=_trigger_record(trigger),
+        message="Trigger updated"
+    )
+
+
+@router.delete("/{board_id}/triggers/{trigger_id}")
+async def delete_board_trigger(
+    board_id: str,
+    trigger_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete a trigger
+    """
+    board_result = await db.execute(_board_query(board_id, current_user, owner_only=True))
+    if board_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Board not found or access denied")
+    
+    trigger = await db.get(BoardTrigger, trigger_id)
+    if trigger is None or trigger.board_id != board_id:
+        raise HTTPException(status_code=404, detail="Trigger not found")
+    
+    await db.delete(trigger)
+    await db.commit()
+    
+    return {
+        "success": True,
+        "message": "Trigger deleted"
+    }
+
+
+def _execution_query(execution_id: str, current_user: Dict[str, Any]):
+    """Admins reach every execution; others the ones they started or that ran their boards"""
+    query = select(BoardExecution).where(BoardExecution.id == execution_id)
+    if current_user.get("role") == "admin":
+        return query
+    return query.join(Board, Board.id == BoardExecution.board_id).where(
+        (BoardExecution.user_id == current_user["user_id"]) | (Board.user_id == current_user["user_id"])
+    )
+
+
+def _execution_summary(execution: BoardExecution) -> Dict[str, Any]:
+    return {
+        "execution_id": execution.id,
+        "board_id": execution.board_id,
+        "status": execution.status,
+        "started_at": execution.started_at,
+        "completed_at": execution.completed_at,
+        "execution_time_ms": execution.execution_time_ms,
+        "total_nodes": execution.total_nodes,
+        "completed_nodes": execution.completed_nodes,
+        "failed_nodes": execution.failed_nodes,
+        "result": execution.result_data,
+        "error": execution.error_message
+    }
+
+
+@router.get("/executions/{execution_id}", response_model=BoardExecutionResponse)
+async def get_execution(
+    execution_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get execution status, progress and per-node log
+    """
+    try:
+        result = await db.execute(_execution_query(execution_id, current_user))
+        execution = result.scalar_one_or_none()
+        
+        if not execution:
+            raise HTTPException(status_code=404, detail="Execution not found or access denied")
+        
+        return BoardExecutionResponse(
+            success=True,
+            data={**_execution_summary(execution), "log": execution.execution_log or []}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving execution {execution_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _execution_event_stream(execution_id: str, last_event_id: int):
+    """Live events when the execution runs in this process, otherwise node_finished events
+    built from the execution row as its batched log grows"""
+    sent_nodes = set()
+    last_keepalive = time.monotonic()
+    while True:
+        if execution_events.has(execution_id):
+            async for item in execution_events.subscribe(execution_id, last_event_id):
+                if item is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id, event, data = item
+                yield _sse(event, data, event_id)
+            return
+        
+        async with AsyncSessionLocal(info={"read_only": True}) as session:
+            execution = await session.get(BoardExecution, execution_id)
+        if execution is None:
+            return
+        for entry in execution.execution_log or []:
+            if entry.get("node_id") not in sent_nodes:
+                sent_nodes.add(entry.get("node_id"))
+                yield _sse("node_finished", entry)
+        if execution.status not in ("queued", "running"):
+            yield _sse("execution_finished", _execution_summary(execution))
+            return
+        
+        if time.monotonic() - last_keepalive >= settings.BOARD_EVENTS_KEEPALIVE_SECONDS:
+            last_keepalive = time.monotonic()
+            yield ": keepalive\n\n"
+        await asyncio.sleep(settings.BOARD_EVENTS_POLL_SECONDS)
+
+
+@router.get("/executions/{execution_id}/events")
+async def stream_execution_events(
+    execution_id: str,
+    last_event_id: Optional[str] = Header(None),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-sent events for an execution: execution_started, node_started, node_finished,
+    node_output and execution_finished
+    
+    Reconnecting clients send Last-Event-ID and resume where they left off
+    """
+    result = await db.execute(_execution_query(execution_id, current_user))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Execution not found or access denied")
+    
+    return StreamingResponse(
+        _execution_event_stream(execution_id, int(last_event_id) if last_event_id and last_event_id.isdigit() else 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/executions/{execution_id}/artifacts/{sha}")
+async def download_execution_artifact(
+    execution_id: str,
+    sha: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download a large node output the execution stored as an artifact
+
+    Results and events carry {"$artifact": sha, "size": ..., "kind": "text" | "bytes"} in its place
+    """
+    result = await db.execute(_execution_query(execution_id, current_user))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Execution not found or access denied")
+    if not artifacts.has(execution_id, sha):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    return FileResponse(
+        artifacts.execution_path(execution_id) / sha,
+        media_type="application/octet-stream",
+        filename=sha
+    )
+
+
 @router.get("/{board_id}/analytics", response_model=BoardAnalyticsResponse)
 async def get_board_analytics(
     board_id: int,
@@ -631,99 +988,86 @@ async def get_board_types(
 
 @router.post("/{board_id}/duplicate", response_model=BoardResponse, status_code=201)
 async def duplicate_board(
-    board_id: int,
-    new_name: str = Query(..., description="Name for duplicated board"),
-    current_user: User = Depends(get_current_user),
+    board_id: str,
+    new_name: str = Query(..., min_length=1, max_length=200, description="Name for duplicated board"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Duplicate an existing board with all nodes and connections
     """
     try:
-        # Check board access
-        if current_user.role == "admin":
-            board_query = select(Board).where(Board.id == board_id)
-        else:
-            board_query = select(Board).where(
-                and_(
-                    Board.id == board_id,
-                    (Board.user_id == current_user.id) | (Board.is_public == True)
-                )
-            )
-        
-        board_result = await db.execute(board_query)
+        board_result = await db.execute(_board_query(board_id, current_user))
         original_board = board_result.scalar_one_or_none()
         
         if not original_board:
             raise HTTPException(status_code=404, detail="Board not found or access denied")
         
-        # Create new board
-        new_board = Board(
-            name=new_name,
-            description=f"Copy of {original_board.description}",
-            board_type=original_board.board_type,
-            board_data=original_board.board_data,
-            status="draft",
-            is_public=False,  # Duplicated boards are private by default
-            user_id=current_user.id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+        new_board, nodes_copied, connections_copied = await board_service.copy_board(
+            db, original_board, current_user["user_id"], new_name
         )
-        
-        db.add(new_board)
         await db.commit()
         await db.refresh(new_board)
         
-        # Copy nodes
-        nodes_query = select(BoardNode).where(BoardNode.board_id == board_id)
-        nodes_result = await db.execute(nodes_query)
-        original_nodes = nodes_result.scalars().all()
-        
-        node_id_mapping = {}
-        for original_node in original_nodes:
-            new_node = BoardNode(
-                board_id=new_board.id,
-                node_type=original_node.node_type,
-                position_x=original_node.position_x,
-                position_y=original_node.position_y,
-                node_data=original_node.node_data,
-                is_active=original_node.is_active,
-                created_at=datetime.utcnow()
-            )
-            db.add(new_node)
-            await db.commit()
-            await db.refresh(new_node)
-            node_id_mapping[original_node.id] = new_node.id
-        
-        # Copy connections
-        connections_query = select(BoardConnection).where(BoardConnection.board_id == board_id)
-        connections_result = await db.execute(connections_query)
-        original_connections = connections_result.scalars().all()
-        
-        for original_conn in original_connections:
-            new_connection = BoardConnection(
-                board_id=new_board.id,
-                source_node_id=node_id_mapping[original_conn.source_node_id],
-                target_node_id=node_id_mapping[original_conn.target_node_id],
-                connection_type=original_conn.connection_type,
-                connection_data=original_conn.connection_data,
-                created_at=datetime.utcnow()
+        logger.info(f"Duplicated board {board_id} to {new_board.id} by user {current_user['user_id']}")
+        
+        return BoardResponse(
+            success=True,
+            data={**_board_record(new_board), "nodes_copied": nodes_copied, "connections_copied": connections_copied},
+            message="Board duplicated successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error duplicating board {board_id}: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/templates/{template_id}/create", response_model=BoardResponse, status_code=201)
+async def create_board_from_template(
+    template_id: str,
+    request: BoardFromTemplateRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create a new board from a board template
+    """
+    try:
+        template_query = select(BoardTemplate).where(BoardTemplate.id == template_id)
+        if current_user.get("role") != "admin":
+            template_query = template_query.where(
+                (BoardTemplate.is_public == True) | (BoardTemplate.created_by == current_user["user_id"])
             )
-            db.add(new_connection)
+        template_result = await db.execute(template_query)
+        template = template_result.scalar_one_or_none()
+        
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found or access denied")
         
+        board, nodes_created, connections_created = await board_service.create_from_template(
+            db, template, current_user["user_id"], request.name, request.description
+        )
         await db.commit()
         
-        logger.info(f"Duplicated board {board_id} to {new_board.id} by user {current_user.id}")
+        logger.info(f"Created board {board.id} from template {template_id} for user {current_user['user_id']}")
         
         return BoardResponse(
             success=True,
-            data=new_board,
-            message="Board duplicated successfully"
+            data={
+                "board_id": board.id,
+                "template_id": template_id,
+                "nodes_created": nodes_created,
+                "connections_created": connections_created
+            },
+            message="Board created from template"
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error duplicating board {board_id}: {e}")
+        logger.error(f"Error creating board from template {template_id}: {e}")
         await db.rollback()
-        raise HTTPException(status_code=500, detail="Internal server error") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
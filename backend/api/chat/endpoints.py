@@ -10,41 +10,9 @@ from pydantic import BaseModel, Field
 from models.shared import SuccessResponse
 from core.dependencies import get_current_user, get_optional_user, get_db
 from services.chat_service import ChatService
-from sqlalchemy import select, text
-from models.database import Base
-from config.database import async_engine  # FIXED: Import from config.database
+from sqlalchemy import select
 from datetime import datetime  # ADDED: For AI response timestamp
-
-# ADDED: Database initialization check
-async def ensure_database_tables():
-    """Ensure all required database tables exist"""
-    try:
-        async with async_engine.begin() as conn:
-            # Create all tables if they don't exist
-            await conn.run_sync(Base.metadata.create_all)
-            
-            # Check if messages table exists
-            result = await conn.execute(text("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name='messages';
-            """))
-            
-            if not result.fetchone():
-                # Create messages table manually if needed
-                await conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS messages (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        conversation_id INTEGER NOT NULL,
-                        content TEXT NOT NULL,
-                        message_role VARCHAR(50) NOT NULL,
-                        message_type VARCHAR(50) DEFAULT 'text',
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (conversation_id) REFERENCES conversations(id)
-                    );
-                """))
-                await conn.commit()
-    except Exception as e:
-        print(f"Database initialization warning: {e}")
+import logging
 
 # Fixed request models for better validation
 class ConversationCreateRequest(BaseModel):
@@ -77,6 +45,7 @@ class AIResponseRequest(BaseModel):
 # Initialize router and service
 router = APIRouter(tags=["Chat"])
 chat_service = ChatService()
+logger = logging.getLogger(__name__)
 
 # FIXED: Get conversations endpoint
 @router.get("/conversations", response_model=SuccessResponse)
@@ -403,9 +372,6 @@ async def send_message_by_uuid(
 ):
     """Send message by conversation UUID - ChatGPT-style URL"""
     try:
-        # ADDED: Ensure database tables exist
-        await ensure_database_tables()
-        
         user_id = current_user["user_id"]
         
         # First verify conversation exists and user owns it
@@ -419,55 +385,25 @@ async def send_message_by_uuid(
             raise HTTPException(status_code=404, detail="Conversation not found")
         
         # Add message using conversation ID
-        try:
-            result = await chat_service.add_message_to_conversation(
-                db=db,
-                conversation_id=str(conversation["id"]),
-                content=request.content,
-                sender_type=request.sender_type or "user",
-                agent_id=request.agent_id
-            )
-            
-            return SuccessResponse(
-                message="Message sent successfully",
-                data={
-                    "message_id": result["message_id"],
-                    "conversation_uuid": conversation_uuid,
-                    "conversation_link": f"/chat/c/{conversation_uuid}",
-                    "content": request.content,
-                    "sender_type": request.sender_type or "user",
-                    "status": "success"
-                }
-            )
-        except Exception as service_error:
-            # Enhanced error handling
-            error_msg = str(service_error)
-            
-            if "table" in error_msg.lower() and "messages" in error_msg.lower():
-                await ensure_database_tables()
-                
-                # Retry once
-                result = await chat_service.add_message_to_conversation(
-                    db=db,
-                    conversation_id=str(conversation["id"]),
-                    content=request.content,
-                    sender_type=request.sender_type or "user",
-                    agent_id=request.agent_id
-                )
-                
-                return SuccessResponse(
-                    message="Message sent successfully (after database fix)",
-                    data={
-                        "message_id": result["message_id"],
-                        "conversation_uuid": conversation_uuid,
-                        "conversation_link": f"/chat/c/{conversation_uuid}",
-                        "content": request.content,
-                        "sender_type": request.sender_type or "user",
-                        "status": "success"
-                    }
-                )
-            else:
-                raise service_error
+        result = await chat_service.add_message_to_conversation(
+            db=db,
+            conversation_id=str(conversation["id"]),
+            content=request.content,
+            sender_type=request.sender_type or "user",
+            agent_id=request.agent_id
+        )
+        
+        return SuccessResponse(
+            message="Message sent successfully",
+            data={
+                "message_id": result["message_id"],
+                "conversation_uuid": conversation_uuid,
+                "conversation_link": f"/chat/c/{conversation_uuid}",
+                "content": request.content,
+                "sender_type": request.sender_type or "user",
+                "status": "success"
+            }
+        )
             
     except HTTPException:
         raise
@@ -593,7 +529,7 @@ async def add_message_to_conversation(
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid conversation_id format: {conversation_id}")
         
-        print(f"💬 Adding message to conversation {conv_id_int} with agent_id: {request.agent_id}")
+        logger.debug("Adding message to conversation %s with agent_id %s", conv_id_int, request.agent_id)
         
         # Step 1: Add user message using service
         user_message_result = await chat_service.add_message_to_conversation(
@@ -604,25 +540,20 @@ async def add_message_to_conversation(
             agent_id=request.agent_id
         )
         
-        print(f"✅ User message added: {user_message_result}")
-        
         # Step 2: Generate AI response automatically (if agent_id provided)
         ai_response_data = None
         if request.agent_id and request.sender_type == "user":
             try:
-                print(f"🤖 Generating AI response with agent_id: {request.agent_id}")
-                
                 # FIXED: Generate AI response using correct parameters
                 ai_response = await chat_service.generate_ai_response(
                     db=db,
                     conversation_id=str(conv_id_int),
                     message=request.content,
                     agent_id=request.agent_id,  # Pass agent_id directly
-                    include_context=True  # Include conversation context
+                    include_context=True,  # Include conversation context
+                    user_id=user_id
                 )
                 
-                print(f"✅ AI response generated: {ai_response}")
-                
                 # FIXED: Process AI response for frontend
                 if ai_response and ai_response.get("status") == "success":
                     ai_response_data = {
@@ -637,7 +568,7 @@ async def add_message_to_conversation(
                 else:
                     # If AI response failed, provide helpful error
                     error_msg = ai_response.get("error", "Unknown error") if ai_response else "AI service unavailable"
-                    print(f"❌ AI Response failed: {error_msg}")
+                    logger.warning("AI response failed for conversation %s: %s", conv_id_int, error_msg)
                     ai_response_data = {
                         "content": f"I'm sorry, I'm having trouble responding right now. Please try again or select a different agent. Error: {error_msg}",
                         "message_id": None,
@@ -649,7 +580,7 @@ async def add_message_to_conversation(
                     }
                 
             except Exception as ai_error:
-                print(f"⚠️ AI response generation failed: {ai_error}")
+                logger.exception("AI response generation failed for conversation %s", conv_id_int)
                 # Continue without AI response - don't fail the whole request
                 ai_response_data = {
                     "content": f"I'm sorry, I'm having trouble responding right now. Error: {str(ai_error)}",
@@ -675,7 +606,7 @@ async def add_message_to_conversation(
             }
         )
     except Exception as e:
-        print(f"❌ Error in add_message_to_conversation: {e}")
+        logger.exception("Error in add_message_to_conversation")
         raise HTTPException(
             status_code=500, 
             detail=f"Error adding message: {str(e)}"
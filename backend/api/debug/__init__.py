@@ -0,0 +1,8 @@
+"""
+Debug API Module
+Admin-only diagnostics: recent traces, request profiles and memory snapshots
+"""
+
+from .endpoints import router
+
+__all__ = ["router"]
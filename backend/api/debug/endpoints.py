@@ -0,0 +1,87 @@
+"""
+Debug API Endpoints
+Admin-only diagnostics for performance investigations
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any
+
+from core.dependencies import get_current_admin
+from core.request_profiler import memory_profiler, request_profiler
+from core.tracing import tracer
+
+router = APIRouter(tags=["Debug"])
+
+@router.get("/traces/recent", response_model=Dict[str, Any])
+async def get_recent_traces(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Slowest of the recently finished traces, with their spans"""
+    return {
+        "success": True,
+        "data": {
+            "sample_rate": tracer.sample_rate,
+            "traces_kept": len(tracer.recent),
+            "traces": tracer.slowest(limit)
+        }
+    }
+
+@router.get("/profiles", response_model=Dict[str, Any])
+async def list_profiles(current_user: Dict[str, Any] = Depends(get_current_admin)):
+    """Stored request profiles - send X-Profile: 1 as an admin to record one"""
+    return {"success": True, "data": request_profiler.list()}
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, current_user: Dict[str, Any] = Depends(get_current_admin)):
+    """Profile in folded-stack format (flamegraph.pl, speedscope, inferno)"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        profile.folded(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+    )
+
+@router.get("/memory", response_model=Dict[str, Any])
+async def get_memory_status(current_user: Dict[str, Any] = Depends(get_current_admin)):
+    """tracemalloc status and stored snapshot ids"""
+    return {"success": True, "data": memory_profiler.status()}
+
+@router.post("/memory/start", response_model=Dict[str, Any])
+async def start_memory_tracing(
+    frames: int = Query(10, ge=1, le=100),
+    current_user: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Start tracemalloc - allocations are slower while it runs"""
+    return {"success": True, "data": memory_profiler.start(frames)}
+
+@router.post("/memory/stop", response_model=Dict[str, Any])
+async def stop_memory_tracing(current_user: Dict[str, Any] = Depends(get_current_admin)):
+    """Stop tracemalloc and drop stored snapshots"""
+    return {"success": True, "data": memory_profiler.stop()}
+
+@router.post("/memory/snapshots", response_model=Dict[str, Any])
+async def take_memory_snapshot(current_user: Dict[str, Any] = Depends(get_current_admin)):
+    """Take a tracemalloc snapshot"""
+    try:
+        snapshot_id = await memory_profiler.take_snapshot()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "data": {"snapshot_id": snapshot_id}}
+
+@router.get("/memory/diff", response_model=Dict[str, Any])
+async def diff_memory_snapshots(
+    base: str,
+    target: str,
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(30, ge=1, le=500),
+    current_user: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Allocation growth between two snapshots, largest first"""
+    try:
+        stats = await memory_profiler.diff(base, target, group_by, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot {e} not found")
+    return {"success": True, "data": stats}
@@ -8,6 +8,7 @@ from typing import Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.shared import SuccessResponse
 from core.dependencies import get_current_user, get_db
+from services.board_triggers import trigger_scheduler
 from pydantic import BaseModel
 from datetime import datetime
 import uuid
@@ -272,6 +273,15 @@ async def submit_form(
         # Update form submission count
         form["submission_count"] += 1
         
+        # Event triggers of the form owner's boards
+        trigger_scheduler.emit("form_submission", form["user_id"], {
+            "form_id": form_id,
+            "form_name": form["name"],
+            "submission_id": submission_id,
+            "submitted_by": new_submission["submitted_by"],
+            "data": submission.data
+        })
+        
         return SuccessResponse(
             message="Form submitted successfully",
             data={
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 import json
 import asyncio
 
+from config.database import get_read_db
 from core.dependencies import get_db, get_current_user
 from models.database import User, Notification
 from schemas.notifications import (
@@ -22,6 +23,7 @@ from schemas.notifications import (
     NotificationAnalyticsResponse,
     NotificationPreferencesResponse
 )
+from services.board_triggers import trigger_scheduler
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 logger = logging.getLogger(__name__)
@@ -179,7 +181,7 @@ async def list_notifications(
 @router.post("/", response_model=NotificationResponse, status_code=201)
 async def create_notification(
     notification_data: NotificationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -187,7 +189,7 @@ async def create_notification(
     """
     try:
         # Check if user can create notifications
-        if current_user.role != "admin" and notification_data.user_id != current_user.id:
+        if current_user.get("role") != "admin" and notification_data.user_id not in (None, current_user["user_id"]):
             raise HTTPException(status_code=403, detail="Only administrators can create notifications for other users")
         
         # Validate notification type
@@ -196,13 +198,13 @@ async def create_notification(
         
         # Create notification
         notification = Notification(
-            user_id=notification_data.user_id or current_user.id,
+            user_id=notification_data.user_id or current_user["user_id"],
             title=notification_data.title,
             message=notification_data.message,
             notification_type=notification_data.notification_type,
             priority=notification_data.priority or "normal",
             action_url=notification_data.action_url,
-            metadata=notification_data.metadata,
+            extra_data=notification_data.metadata,
             created_at=datetime.utcnow()
         )
         
@@ -210,24 +212,34 @@ async def create_notification(
         await db.commit()
         await db.refresh(notification)
         
+        notification_dict = {
+            "id": notification.id,
+            "title": notification.title,
+            "message": notification.message,
+            "notification_type": notification.notification_type,
+            "priority": notification.priority,
+            "created_at": notification.created_at.isoformat()
+        }
+        
         # Send real-time notification
         await send_notification_to_user(notification.user_id, {
             "type": "new_notification",
-            "notification": {
-                "id": notification.id,
-                "title": notification.title,
-                "message": notification.message,
-                "notification_type": notification.notification_type,
-                "priority": notification.priority,
-                "created_at": notification.created_at.isoformat()
-            }
+            "notification": notification_dict
+        })
+        
+        trigger_scheduler.emit("notification", notification.user_id, {
+            "notification_id": notification.id,
+            "title": notification.title,
+            "message": notification.message,
+            "notification_type": notification.notification_type,
+            "priority": notification.priority
         })
         
         logger.info(f"Created notification {notification.id} for user {notification.user_id}")
         
         return NotificationResponse(
             success=True,
-            data=notification,
+            data={**notification_dict, "user_id": notification.user_id, "action_url": notification.action_url},
             message="Notification created successfully"
         )
         
@@ -239,6 +251,21 @@ async def create_notification(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/types")
+async def get_notification_types():
+    """
+    Get available notification types
+    (declared before /{notification_id} so "types" is not parsed as an id)
+    """
+    return {
+        "success": True,
+        "data": {
+            "types": NOTIFICATION_TYPES,
+            "count": len(NOTIFICATION_TYPES)
+        }
+    }
+
+
 @router.get("/{notification_id}", response_model=NotificationResponse)
 async def get_notification(
     notification_id: int,
@@ -465,7 +492,7 @@ async def bulk_update_notifications(
 async def get_notification_analytics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get notification analytics and insights
@@ -634,17 +661,3 @@ async def update_notification_preferences(
         logger.error(f"Error updating notification preferences: {e}")
         await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@router.get("/types")
-async def get_notification_types():
-    """
-    Get available notification types
-    """
-    return {
-        "success": True,
-        "data": {
-            "types": NOTIFICATION_TYPES,
-            "count": len(NOTIFICATION_TYPES)
-        }
-    } 
\ No newline at end of file
@@ -11,7 +11,8 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import logging
 
-from core.dependencies import get_db, get_current_user
+from config.database import get_read_db
+from core.dependencies import get_current_user
 from models.database import User, SystemAnalytics, UserAnalytics, Agent, Conversation, Task
 from schemas.system_analytics import (
     SystemAnalyticsResponse,
@@ -33,7 +34,7 @@ async def system_health():
 @router.get("/")
 async def list_system_analytics(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List system analytics metrics (admin only)"""
     if current_user.role != "admin":
@@ -8,17 +8,56 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 import asyncio
 import os
-import sys
 from datetime import datetime
 from pathlib import Path
 
-from core.dependencies import get_db, get_current_user
+from core.dependencies import get_db, get_current_user, get_current_admin
+from core.loop_monitor import loop_monitor
+from core.system_sampler import RESOLUTIONS, system_sampler
+from core.lazy_imports import load_module
 from models import User
-from test.system_health_monitor import SystemHealthMonitor
-from test.logs_manager import LogsManager
 
 router = APIRouter(prefix="/system", tags=["system-health"])
 
+# The monitoring tools pull in the whole test tooling, so they are imported on first use
+async def get_health_monitor():
+    monitor_module = await load_module("test.system_health_monitor")
+    return monitor_module.SystemHealthMonitor()
+
+async def get_logs_manager():
+    logs_module = await load_module("test.logs_manager")
+    return logs_module.LogsManager()
+
+@router.get("/loop-lag", response_model=Dict[str, Any])
+async def get_loop_lag(current_user: Dict[str, Any] = Depends(get_current_admin)):
+    """
+    Event loop lag histogram, per-route stall histograms and recent blocking stacks
+    """
+    return {
+        "success": True,
+        "data": loop_monitor.snapshot()
+    }
+
+@router.get("/metrics-history", response_model=Dict[str, Any])
+async def get_metrics_history(
+    resolution: str = "1m",
+    limit: int = 60,
+    current_user: Dict[str, Any] = Depends(get_current_admin)
+):
+    """
+    Resource samples from the background sampler - raw, 1 minute or 1 hour rollups
+    """
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    return {
+        "success": True,
+        "data": {
+            "resolution": resolution,
+            "interval_seconds": RESOLUTIONS[resolution] or system_sampler.interval,
+            "points": system_sampler.series(resolution, max(1, min(limit, 2000)))
+        }
+    }
+
 @router.post("/health-check", response_model=Dict[str, Any])
 async def run_health_check(
     background_tasks: BackgroundTasks,
@@ -31,11 +70,11 @@ async def run_health_check(
     """
     try:
         # Create system health monitor
-        monitor = SystemHealthMonitor()
+        monitor = await get_health_monitor()
         
         # Clean up old files if requested (default: True)
         if auto_cleanup:
-            logs_manager = LogsManager()
+            logs_manager = await get_logs_manager()
             cleanup_results = logs_manager.cleanup_all_categories(keep_files=1)
             print(f"🗑️ Auto-cleanup completed: {cleanup_results}")
         
@@ -65,7 +104,7 @@ async def get_health_status(
     """
     try:
         # Use logs manager to get latest health report
-        logs_manager = LogsManager()
+        logs_manager = await get_logs_manager()
         latest_data = logs_manager.get_latest_log("system_health")
         
         if latest_data:
@@ -97,7 +136,7 @@ async def get_test_history(
     Get system test history
     """
     try:
-        logs_manager = LogsManager()
+        logs_manager = await get_logs_manager()
         
         # Get system health logs
         health_logs = logs_manager.get_logs("system_health", limit)
@@ -138,63 +177,33 @@ async def get_system_info(
     Get basic system information
     """
     try:
-        import platform
-        import psutil
-        import pkg_resources
+        static = system_sampler.static_info()
+        sample = await system_sampler.current()
         
         # System information
         system_info = {
-            "os": {
-                "name": platform.system(),
-                "version": platform.version(),
-                "release": platform.release(),
-                "machine": platform.machine(),
-                "processor": platform.processor(),
-            },
-            "python": {
-                "version": sys.version,
-                "version_info": {
-                    "major": sys.version_info.major,
-                    "minor": sys.version_info.minor,
-                    "micro": sys.version_info.micro
-                },
-                "executable": sys.executable,
-                "platform": sys.platform,
-            },
+            "os": static["os"],
+            "python": static["python"],
             "resources": {
                 "memory": {
-                    "total_gb": round(psutil.virtual_memory().total / (1024**3), 2),
-                    "available_gb": round(psutil.virtual_memory().available / (1024**3), 2),
-                    "used_percent": psutil.virtual_memory().percent
+                    "total_gb": round(sample["memory_total"] / (1024**3), 2),
+                    "available_gb": round(sample["memory_available"] / (1024**3), 2),
+                    "used_percent": sample["memory_percent"]
                 },
                 "cpu": {
-                    "cores": psutil.cpu_count(),
-                    "usage_percent": psutil.cpu_percent(interval=1)
+                    "cores": static["cpu_cores"],
+                    "usage_percent": sample["cpu_percent"]
                 },
                 "disk": {
-                    "total_gb": round(psutil.disk_usage('/').total / (1024**3), 2),
-                    "free_gb": round(psutil.disk_usage('/').free / (1024**3), 2),
-                    "used_percent": round((psutil.disk_usage('/').used / psutil.disk_usage('/').total) * 100, 2)
+                    "total_gb": round(sample["disk_total"] / (1024**3), 2),
+                    "free_gb": round(sample["disk_free"] / (1024**3), 2),
+                    "used_percent": sample["disk_percent"]
                 }
-            }
+            },
+            "sampled_at": datetime.fromtimestamp(sample["ts"]).isoformat(),
+            "packages": static["packages"]
         }
         
-        # Installed packages (important ones only)
-        important_packages = [
-            "fastapi", "sqlalchemy", "alembic", "uvicorn", 
-            "pydantic", "python-jose", "passlib", "requests"
-        ]
-        
-        installed_packages = []
-        for package in pkg_resources.working_set:
-            if package.project_name.lower() in important_packages:
-                installed_packages.append({
-                    "name": package.project_name,
-                    "version": package.version
-                })
-        
-        system_info["packages"] = installed_packages
-        
         return {
             "success": True,
             "message": "System information loaded successfully",
@@ -216,43 +225,20 @@ async def get_quick_status(
     Get quick system status
     """
     try:
-        import requests
-        import psutil
-        import sqlite3
-        from pathlib import Path
+        sample = await system_sampler.current()
         
         status = {
             "timestamp": datetime.now().isoformat(),
-            "server_status": "unknown",
-            "database_status": "unknown",
-            "memory_usage": psutil.virtual_memory().percent,
-            "cpu_usage": psutil.cpu_percent(),
-            "disk_usage": psutil.disk_usage('/').percent,
+            # This request is being served, so the server is up
+            "server_status": "running",
+            "database_status": "connected" if sample["db_connected"] else "not_found",
+            "memory_usage": sample["memory_percent"],
+            "cpu_usage": sample["cpu_percent"],
+            "disk_usage": sample["disk_percent"],
             "health_score": 0
         }
-        
-        # Check server
-        try:
-            response = requests.get("http://localhost:8000/docs", timeout=3)
-            status["server_status"] = "running" if response.status_code == 200 else "error"
-        except:
-            status["server_status"] = "offline"
-        
-        # Check database
-        try:
-            db_path = Path(__file__).parent.parent.parent / "data" / "database.db"
-            if db_path.exists():
-                conn = sqlite3.connect(str(db_path))
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-                tables_count = cursor.fetchone()[0]
-                conn.close()
-                status["database_status"] = "connected"
-                status["tables_count"] = tables_count
-            else:
-                status["database_status"] = "not_found"
-        except:
-            status["database_status"] = "error"
+        if sample["db_connected"]:
+            status["tables_count"] = sample["db_tables"]
         
         # Quick score calculation
         score = 0
@@ -288,7 +274,7 @@ async def get_logs_summary(
     Get summary of all log files
     """
     try:
-        logs_manager = LogsManager()
+        logs_manager = await get_logs_manager()
         summary = logs_manager.get_logs_summary()
         
         return {
@@ -314,7 +300,7 @@ async def clear_old_logs(
     Clear old log files
     """
     try:
-        logs_manager = LogsManager()
+        logs_manager = await get_logs_manager()
         deleted_count = logs_manager.cleanup_old_logs(category, keep_days)
         
         return {
@@ -339,7 +325,7 @@ async def auto_cleanup_logs(
     Automatically cleanup old log files, keeping only the most recent ones
     """
     try:
-        logs_manager = LogsManager()
+        logs_manager = await get_logs_manager()
         
         # Cleanup all categories
         cleanup_results = logs_manager.cleanup_all_categories(keep_files=keep_files)
@@ -372,34 +358,16 @@ async def get_simple_health_status(
     Returns user-friendly information without technical details
     """
     try:
-        import psutil
-        import sqlite3
-        from pathlib import Path
-        
-        # Quick system info
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        cpu_percent = psutil.cpu_percent(interval=1)
-        
-        # Check database
-        db_path = Path(__file__).parent.parent.parent / "data" / "database.db"
-        database_connected = False
-        features_count = 0
-        
-        try:
-            if db_path.exists():
-                conn = sqlite3.connect(str(db_path))
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-                features_count = cursor.fetchone()[0]
-                conn.close()
-                database_connected = True
-        except:
-            database_connected = False
+        sample = await system_sampler.current()
+        memory_percent = sample["memory_percent"]
+        disk_percent = sample["disk_percent"]
+        cpu_percent = sample["cpu_percent"]
+        database_connected = sample["db_connected"]
+        features_count = sample["db_tables"] or 0
         
         # Calculate overall score
-        memory_score = 100 - memory.percent
-        disk_score = 100 - (disk.used / disk.total * 100)
+        memory_score = 100 - memory_percent
+        disk_score = 100 - disk_percent
         cpu_score = 100 - cpu_percent
         db_score = 100 if database_connected else 0
         
@@ -418,14 +386,14 @@ async def get_simple_health_status(
         # Generate simple issues based on metrics
         issues = []
         
-        if memory.percent > 80:
+        if memory_percent > 80:
             issues.append({
                 "type": "warning",
                 "message": "Your computer's memory is almost full",
                 "solution": "Close some programs you're not using to free up memory"
             })
         
-        if (disk.used / disk.total * 100) > 90:
+        if disk_percent > 90:
             issues.append({
                 "type": "error", 
                 "message": "Your storage space is almost full",
@@ -456,8 +424,8 @@ async def get_simple_health_status(
                 "system_status": status,
                 "features_working": working_features,
                 "total_features": 8,
-                "memory_usage": round(memory.percent, 1),
-                "storage_usage": round((disk.used / disk.total * 100), 1),
+                "memory_usage": round(memory_percent, 1),
+                "storage_usage": round(disk_percent, 1),
                 "connection_status": database_connected,
                 "last_check": datetime.utcnow().isoformat(),
                 "issues": issues,
@@ -11,6 +11,7 @@ import logging
 from datetime import datetime, timedelta
 import json
 
+from config.database import get_read_db
 from core.dependencies import get_db, get_current_user
 from models.database import User, UserAnalytics, Agent, Conversation, Task, ActivityLog
 from schemas.user_analytics import (
@@ -53,7 +54,7 @@ async def list_user_analytics(
     start_date: Optional[datetime] = Query(None, description="Start date for filtering"),
     end_date: Optional[datetime] = Query(None, description="End date for filtering"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List user analytics events with filtering and pagination
@@ -184,7 +185,7 @@ async def get_user_behavior_analysis(
     user_id: Optional[int] = Query(None, description="User ID to analyze (admin only)"),
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get comprehensive user behavior analysis
@@ -300,7 +301,7 @@ async def get_user_engagement_metrics(
     user_id: Optional[int] = Query(None, description="User ID to analyze (admin only)"),
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get user engagement metrics and scores
@@ -410,7 +411,7 @@ async def get_user_productivity_report(
     user_id: Optional[int] = Query(None, description="User ID to analyze (admin only)"),
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get user productivity report and insights
@@ -527,7 +528,7 @@ async def get_user_productivity_report(
 async def get_user_insights(
     user_id: Optional[int] = Query(None, description="User ID to analyze (admin only)"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get personalized user insights and recommendations
@@ -631,7 +632,7 @@ async def export_user_analytics(
     end_date: Optional[datetime] = Query(None, description="End date for export"),
     format: str = Query("json", description="Export format (json, csv)"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Export user analytics data
@@ -3,11 +3,12 @@ Users API Endpoints
 All user management related routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import Dict, Any, List
 from models.shared import SuccessResponse, UserUpdate, UserResponse
 from core.dependencies import get_current_user, get_current_admin
 from services.user_service import UserService
+from services.usage_service import usage_tracker
 from config.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -162,6 +163,21 @@ async def get_user_statistics(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/usage", response_model=SuccessResponse)
+async def get_user_usage(
+    current_user: Dict = Depends(get_current_user),
+    days: int = Query(default=30, ge=1, le=365)
+):
+    """Get token and cost usage against the daily and monthly quotas"""
+    try:
+        usage = await usage_tracker.get_usage("user", current_user["user_id"], days)
+        return SuccessResponse(
+            message="Usage retrieved successfully",
+            data=usage
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Removed duplicate notifications endpoint - use /api/notifications/ instead
 
 # Admin endpoints
@@ -216,6 +232,22 @@ async def get_user_by_id(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/admin/{user_id}/usage", response_model=SuccessResponse)
+async def get_user_usage_by_admin(
+    user_id: int,
+    current_user: Dict = Depends(get_current_admin),
+    days: int = Query(default=30, ge=1, le=365)
+):
+    """Get a user's token and cost usage (admin only)"""
+    try:
+        usage = await usage_tracker.get_usage("user", user_id, days)
+        return SuccessResponse(
+            message="Usage retrieved successfully",
+            data=usage
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/admin/{user_id}", response_model=SuccessResponse)
 async def update_user_by_admin(
     user_id: int,
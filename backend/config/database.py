@@ -3,13 +3,20 @@ Database Configuration
 SQLAlchemy database setup and connection management
 """
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from config.settings import settings
 
+import asyncio
+import functools
+import itertools
 import logging
 import sqlite3
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
 from models.database import Base
 
 # Create logger
@@ -18,12 +25,16 @@ logger = logging.getLogger(__name__)
 # Create database URL
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+def to_async_url(url: str) -> str:
+    """Convert a sync database URL to its async driver form"""
+    return (
+        url.replace("sqlite:///", "sqlite+aiosqlite:///")
+        if url.startswith("sqlite")
+        else url.replace("postgresql://", "postgresql+asyncpg://")
+    )
+
 # Create async database URL
-ASYNC_DATABASE_URL = (
-    SQLALCHEMY_DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
-    if SQLALCHEMY_DATABASE_URL.startswith("sqlite")
-    else SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-)
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
 
 # Determine if using SQLite
 is_sqlite = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
@@ -35,8 +46,7 @@ sync_engine = create_engine(
     connect_args={"check_same_thread": False} if is_sqlite else {},
     # Enable foreign key support for SQLite
     pool_pre_ping=True,
-    # Enable SQLite debugging
-    echo=True
+    echo=settings.DATABASE_ECHO
 )
 
 # Enable foreign key support for SQLite
@@ -54,23 +64,199 @@ async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
     connect_args={"check_same_thread": False} if is_sqlite else {},
     pool_pre_ping=True,
-    echo=True
+    echo=settings.DATABASE_ECHO
 )
 
+# Read engines - replicas from settings, or a read-only pool on the SQLite file
+def _create_read_engines():
+    urls = [to_async_url(url) for url in settings.DATABASE_REPLICA_URLS]
+    if not urls and is_sqlite and settings.DATABASE_READ_ONLY_POOL:
+        db_path = SQLALCHEMY_DATABASE_URL.replace("sqlite:///", "", 1)
+        urls = [f"sqlite+aiosqlite:///file:{db_path}?mode=ro&uri=true"]
+    
+    return [
+        create_async_engine(
+            url,
+            connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+            pool_pre_ping=True,
+            echo=settings.DATABASE_ECHO
+        )
+        for url in urls
+    ]
+
+read_engines = _create_read_engines()
+_read_engine_cycle = itertools.cycle(read_engines) if read_engines else None
+
+# Query and pool metrics for /metrics
+if settings.METRICS_ENABLED:
+    from core import metrics
+    
+    for engine in (async_engine, *read_engines):
+        metrics.instrument_engine(engine)
+
+# SQL spans for traced requests
+if settings.TRACING_ENABLED:
+    from core import tracing
+    
+    for engine in (async_engine, *read_engines):
+        tracing.instrument_engine(engine)
+
+# Opt-in query instrumentation - no cursor hooks are installed unless enabled
+if settings.QUERY_PROFILING:
+    from core.query_profiler import instrument_engine
+    
+    for engine in (async_engine, *read_engines):
+        instrument_engine(engine)
+
+# Request scoped routing state
+_current_user_id: ContextVar[Optional[int]] = ContextVar("db_current_user_id", default=None)
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+_recent_writes: Dict[int, float] = {}
+
+def set_current_user_id(user_id: Optional[int]):
+    """Bind the authenticated user to the current request for read-your-writes"""
+    _current_user_id.set(user_id)
+
+def _user_recently_wrote(user_id: Optional[int]) -> bool:
+    if user_id is None:
+        return False
+    last_write = _recent_writes.get(user_id)
+    return last_write is not None and time.monotonic() - last_write < settings.READ_YOUR_WRITES_SECONDS
+
+def _record_write(user_id: Optional[int]):
+    if user_id is None:
+        return
+    now = time.monotonic()
+    _recent_writes[user_id] = now
+    # Drop expired entries so the map stays bounded by active writers
+    if len(_recent_writes) > 10000:
+        for key, written_at in list(_recent_writes.items()):
+            if now - written_at >= settings.READ_YOUR_WRITES_SECONDS:
+                _recent_writes.pop(key, None)
+
+def _is_read_statement(clause) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, "is_select", False):
+        return True
+    if getattr(clause, "is_text", False):
+        return str(clause).lstrip()[:6].upper() == "SELECT"
+    return False
+
+class RoutingSession(Session):
+    """Session that sends reads of read-only sessions to a replica and everything else to the primary"""
+    
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if getattr(clause, "is_dml", False):
+            self.info["has_writes"] = True
+        
+        if self._use_replica(clause):
+            if "replica" not in self.info:
+                self.info["replica"] = next(_read_engine_cycle)
+            return self.info["replica"].sync_engine
+        return async_engine.sync_engine
+    
+    def _use_replica(self, clause) -> bool:
+        if _read_engine_cycle is None or self._flushing:
+            return False
+        if not (self.info.get("read_only") or _read_only.get()):
+            return False
+        if self.info.get("has_writes") or not _is_read_statement(clause):
+            return False
+        return not _user_recently_wrote(_current_user_id.get())
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _track_committed_writes(session):
+    if session.info.get("has_writes"):
+        _record_write(_current_user_id.get())
+
+def read_only(func):
+    """Mark a service method as read-only so its queries may be served by a replica"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
 # Create session factories
 AsyncSessionLocal = sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
+    async_engine, class_=AsyncSession, expire_on_commit=False, sync_session_class=RoutingSession
 )
 
-def init_db():
-    """Initialize database with all models"""
-    try:
-        # Create all tables
-        Base.metadata.create_all(bind=sync_engine)
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Database initialization error: {e}")
-        raise
+# Schema version check - runs once at startup instead of create_all on every boot
+MIGRATIONS_DIRECTORY = Path(__file__).resolve().parent.parent / "migrations"
+# The schema create_all built before revisions were tracked
+BASELINE_REVISION = "022_fix_messages_column"
+
+def _alembic_config():
+    from alembic.config import Config
+    
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIRECTORY))
+    config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
+    return config
+
+def _get_current_revision(connection):
+    from alembic.runtime.migration import MigrationContext
+    
+    return MigrationContext.configure(connection).get_current_revision()
+
+def _bootstrap_schema(connection, script) -> bool:
+    """Create tables from the models and stamp head on an empty database; stamp the baseline
+    on a pre-Alembic one so the later migrations still run. Returns whether it needs upgrading.
+    """
+    from alembic.runtime.migration import MigrationContext
+    
+    context = MigrationContext.configure(connection)
+    if inspect(connection).get_table_names():
+        context.stamp(script, BASELINE_REVISION)
+        return True
+    Base.metadata.create_all(connection)
+    context.stamp(script, "head")
+    return False
+
+async def check_schema_version() -> str:
+    """Verify the database is at the Alembic head revision, migrating once if allowed"""
+    from alembic.script import ScriptDirectory
+    
+    config = _alembic_config()
+    script = ScriptDirectory.from_config(config)
+    head = script.get_current_head()
+    
+    async with async_engine.connect() as conn:
+        current = await conn.run_sync(_get_current_revision)
+    
+    if current == head:
+        logger.info(f"Database schema is at revision {head}")
+        return head
+    
+    if not settings.DATABASE_AUTO_MIGRATE:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. "
+            "Run 'alembic upgrade head' or set DATABASE_AUTO_MIGRATE=true"
+        )
+    
+    if current is None:
+        # Fresh database, or one created by create_all before revisions were tracked
+        logger.info("Database has no schema revision, bootstrapping it")
+        async with async_engine.begin() as conn:
+            needs_upgrade = await conn.run_sync(_bootstrap_schema, script)
+        current = BASELINE_REVISION if needs_upgrade else head
+    
+    if current != head:
+        from alembic import command
+        
+        logger.info(f"Migrating database schema from {current} to {head}")
+        await asyncio.to_thread(command.upgrade, config, "head")
+    
+    return head
 
 async def get_db():
     """Dependency for getting async database session"""
@@ -80,5 +266,14 @@ async def get_db():
         finally:
             await session.close()
 
-# Initialize database on startup
-init_db() 
\ No newline at end of file
+async def get_read_db():
+    """Dependency for read-only endpoints - reads go to a replica when one is configured
+
+    Read-your-writes is tracked per process: a user whose write went through another worker
+    may read from a replica for up to replica lag.
+    """
+    async with AsyncSessionLocal(info={"read_only": True}) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
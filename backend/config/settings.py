@@ -18,6 +18,11 @@ class Settings:
     DEBUG = True
     RELOAD = True
     
+    # Routers to skip entirely (package names under api/, e.g. "training_lab,marketplace")
+    DISABLED_ROUTERS: List[str] = [
+        name.strip() for name in os.getenv("DISABLED_ROUTERS", "").split(",") if name.strip()
+    ]
+    
     # CORS Settings
     CORS_ORIGINS: List[str] = ["*"]
     CORS_ALLOW_CREDENTIALS = True
@@ -26,13 +31,32 @@ class Settings:
     
     # Database
     DATABASE_URL = "sqlite:///data/database.db"
-    DATABASE_ECHO = True
+    DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"  # Log every statement - debugging only
+    
+    # Query profiling - per-request query stats, slow-query log and N+1 detection
+    QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() == "true"
+    QUERY_PROFILE_HEADERS = DEBUG  # Expose X-DB-* summary headers on responses
+    QUERY_PROFILE_SLOWEST = 5  # Slowest statements kept per request
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    N_PLUS_ONE_THRESHOLD = 5  # Same-shape statements in one request before flagging N+1
+    
+    # Database read routing - comma separated replica URLs for read-only sessions
+    DATABASE_REPLICA_URLS: List[str] = [
+        url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    DATABASE_READ_ONLY_POOL = os.getenv("DATABASE_READ_ONLY_POOL", "false").lower() == "true"  # SQLite: separate read-only pool on the same file
+    READ_YOUR_WRITES_SECONDS = 5  # Keep a user on the primary this long after a write
+    DATABASE_AUTO_MIGRATE = os.getenv("DATABASE_AUTO_MIGRATE", "true").lower() == "true"  # false: fail fast on schema mismatch
     
     # Security - FIXED: Improved JWT settings
     SECRET_KEY = "dpro-ai-agent-super-secure-jwt-secret-key-2024-updated-for-production-use"
     ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours (was 30 minutes)
     REFRESH_TOKEN_EXPIRE_DAYS = 30     # 30 days (was 7 days)
     ALGORITHM = "HS256"
+    PRINCIPAL_CACHE_TTL = 60  # seconds an authenticated user's active flag and role are trusted without a query
+    PRINCIPAL_CACHE_SIZE = 10000
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING = 64  # Logins beyond this many in-flight hashes get 503
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -50,16 +74,149 @@ class Settings:
     UPLOAD_DIRECTORY = "./files"
     
     # Logging
-    LOG_LEVEL = "INFO"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     LOG_DIRECTORY = "./logs"
+    LOG_JSON = os.getenv("LOG_JSON", "true").lower() == "true"  # JSON lines; false for plain text
+    LOG_TO_FILE = os.getenv("LOG_TO_FILE", "false").lower() == "true"  # Also write LOG_DIRECTORY/backend.log
+    # Per-module levels, e.g. LOG_LEVELS="services.agent_service=DEBUG,sqlalchemy.engine=INFO"
+    LOG_LEVELS: Dict[str, str] = {
+        "sqlalchemy.engine": "WARNING",
+        **{
+            name.strip(): level.strip().upper()
+            for name, _, level in (
+                item.partition("=") for item in os.getenv("LOG_LEVELS", "").split(",") if "=" in item
+            )
+        }
+    }
+    LOG_SAMPLE_BURST = 20  # Records per call site per window before sampling kicks in
+    LOG_SAMPLE_WINDOW_SECONDS = 60
+    
+    # Event loop monitor - lag sampling and stack capture for blocking calls
+    LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    LOOP_MONITOR_INTERVAL_MS = 50
+    LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))  # Capture the blocking stack above this
+    LOOP_LAG_FAIL_MS = float(os.getenv("LOOP_LAG_FAIL_MS", "0")) or None  # Test mode: fail requests that block longer
+    
+    # Metrics - Prometheus text format on /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Shared directory for multiple uvicorn workers; each worker writes its samples there
+    METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", os.getenv("PROMETHEUS_MULTIPROC_DIR", ""))
+    METRICS_FLUSH_SECONDS = 5
+    
+    # Tracing - spans for routes, services, SQL and provider calls
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))  # Fraction of requests traced (traceparent flags win)
+    TRACE_RECENT_SIZE = 200  # Finished traces kept for /debug/traces/recent
+    TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")  # OTLP/JSON lines, e.g. ./logs/traces.jsonl
+    TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")  # OTLP/HTTP collector, e.g. http://localhost:4318
+    TRACE_SERVICE_NAME = "agent-player-backend"
+    
+    # On-demand profiling - X-Profile: 1 from an admin, tracemalloc endpoints under /debug
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+    PROFILE_SAMPLE_INTERVAL_MS = 5
+    PROFILE_MAX_SECONDS = 60  # Sampling stops after this even if the request is still running
+    PROFILE_MAX_STORED = 20  # Profiles and memory snapshots kept in memory
+    
+    # System sampler - background resource samples for the health endpoints
+    SYSTEM_SAMPLER_ENABLED = os.getenv("SYSTEM_SAMPLER_ENABLED", "true").lower() == "true"
+    SYSTEM_SAMPLE_INTERVAL_SECONDS = float(os.getenv("SYSTEM_SAMPLE_INTERVAL_SECONDS", "10"))
+    SYSTEM_SAMPLE_BUFFER_SIZE = 360  # Raw samples kept in memory (an hour at the default interval)
+    SYSTEM_DISK_PATH = "/"
+    SYSTEM_METRICS_PERSIST = os.getenv("SYSTEM_METRICS_PERSIST", "true").lower() == "true"
+    SYSTEM_METRICS_DIRECTORY = "./logs/system"  # Append-only JSON lines: raw per day, 1m and 1h rollups per month
+    SYSTEM_METRICS_RAW_RETENTION_DAYS = 7
+    
+    # Usage quotas - tokens and USD cost per user and per agent, 0 means unlimited
+    QUOTA_USER_DAILY_TOKENS = int(os.getenv("QUOTA_USER_DAILY_TOKENS", "1000000"))
+    QUOTA_USER_MONTHLY_TOKENS = int(os.getenv("QUOTA_USER_MONTHLY_TOKENS", "20000000"))
+    QUOTA_USER_DAILY_COST = float(os.getenv("QUOTA_USER_DAILY_COST", "10"))
+    QUOTA_USER_MONTHLY_COST = float(os.getenv("QUOTA_USER_MONTHLY_COST", "100"))
+    QUOTA_AGENT_DAILY_TOKENS = int(os.getenv("QUOTA_AGENT_DAILY_TOKENS", "0"))
+    QUOTA_AGENT_MONTHLY_TOKENS = int(os.getenv("QUOTA_AGENT_MONTHLY_TOKENS", "0"))
+    QUOTA_AGENT_DAILY_COST = float(os.getenv("QUOTA_AGENT_DAILY_COST", "0"))
+    QUOTA_AGENT_MONTHLY_COST = float(os.getenv("QUOTA_AGENT_MONTHLY_COST", "0"))
+    USAGE_FLUSH_SECONDS = 10  # Counters are written to usage_counters in one batch this often
+    
+    # Job queue - durable background jobs in the jobs table, run by workers in every process
+    JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+    JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "2"))  # Jobs running at once per process
+    JOB_POLL_SECONDS = 1.0  # Idle workers look for new jobs this often
+    JOB_LEASE_SECONDS = 60  # A job whose worker stops renewing its lease is claimed again after this
+    JOB_MAX_ATTEMPTS = 3
+    JOB_RETRY_BACKOFF_SECONDS = 10  # Doubled after every failed attempt
+    JOB_RETENTION_DAYS = 7  # Finished and failed jobs are deleted after this
+    
+    # Board execution
+    BOARD_EXECUTION_CONCURRENCY = int(os.getenv("BOARD_EXECUTION_CONCURRENCY", "8"))  # Nodes running at once per execution
+    BOARD_EXECUTION_MAX_TIMEOUT = 3600  # Upper bound for the timeout a caller may request, in seconds
+    BOARD_EXECUTION_ATTEMPTS = 2  # A run cut off by a dead worker is retried once from the start
+    BOARD_LOG_FLUSH_SECONDS = 2.0  # execution_log and progress are written to the execution row this often
+    BOARD_EVENTS_HISTORY = 1000  # Events kept per running execution for late and reconnecting subscribers
+    BOARD_EVENTS_KEEPALIVE_SECONDS = 15
+    BOARD_EVENTS_POLL_SECONDS = 1.0  # SSE for executions running in another process follows the row instead
+    # Node results are reused while a node's type, config and inputs are unchanged (shared via CACHE_URL)
+    BOARD_NODE_CACHE_ENABLED = os.getenv("BOARD_NODE_CACHE_ENABLED", "true").lower() == "true"
+    BOARD_NODE_CACHE_TTL = int(os.getenv("BOARD_NODE_CACHE_TTL", "86400"))  # 24 hours
+    BOARD_NODE_CACHE_MAX_ENTRIES = int(os.getenv("BOARD_NODE_CACHE_MAX_ENTRIES", "5000"))  # LRU bound of the in-process backend
+    BOARD_GRAPH_CACHE_MAX_ENTRIES = int(os.getenv("BOARD_GRAPH_CACHE_MAX_ENTRIES", "500"))  # compiled graphs kept per process
+    BOARD_COPY_CHUNK_SIZE = int(os.getenv("BOARD_COPY_CHUNK_SIZE", "1000"))  # rows per statement when copying boards
+    BOARD_REVISION_SNAPSHOT_INTERVAL = int(os.getenv("BOARD_REVISION_SNAPSHOT_INTERVAL", "50"))  # deltas between full snapshots
+    
+    # Board triggers - cron schedules fired by whichever worker holds the scheduler lease, and events
+    BOARD_TRIGGERS_ENABLED = os.getenv("BOARD_TRIGGERS_ENABLED", "true").lower() == "true"
+    BOARD_SCHEDULER_LEASE_SECONDS = 30  # Another worker takes over scheduling after this if the leader dies
+    BOARD_SCHEDULER_WINDOW_SECONDS = 60  # Triggers due within this are held in memory; the rest stay in the table
+    BOARD_TRIGGER_MISFIRE_GRACE_SECONDS = int(os.getenv("BOARD_TRIGGER_MISFIRE_GRACE_SECONDS", "60"))  # Later than this is a missed run
+    BOARD_TRIGGER_MAX_CATCH_UP = 10  # Missed runs replayed at most by catch_up="all"
+    
+    # Board sandbox - code and parse nodes run in worker processes, never on the event loop
+    # Code nodes run arbitrary Python as the server's user - the process pool bounds resources, it does
+    # not isolate. Enable only where everyone who can edit a board may run code on this host.
+    BOARD_CODE_NODES_ENABLED = os.getenv("BOARD_CODE_NODES_ENABLED", "false").lower() == "true"
+    BOARD_SANDBOX_WORKERS = int(os.getenv("BOARD_SANDBOX_WORKERS", str(min(4, os.cpu_count() or 1))))
+    BOARD_SANDBOX_MAX_IN_FLIGHT = 16  # Nodes handed to the pool at once; the rest wait on the event loop
+    BOARD_SANDBOX_TASKS_PER_CHILD = 200  # Workers are replaced after this many nodes to give memory back
+    # Per-node limits - a node's config["limits"] may change them up to the maximums
+    BOARD_NODE_CPU_SECONDS = float(os.getenv("BOARD_NODE_CPU_SECONDS", "10"))
+    BOARD_NODE_MAX_CPU_SECONDS = 120
+    BOARD_NODE_MEMORY_MB = int(os.getenv("BOARD_NODE_MEMORY_MB", "256"))
+    BOARD_NODE_MAX_MEMORY_MB = 2048
+    BOARD_NODE_TIMEOUT = float(os.getenv("BOARD_NODE_TIMEOUT", "30"))  # Wall clock, in seconds
+    BOARD_NODE_MAX_TIMEOUT = 600
+    
+    # Board artifacts - node outputs this large are written to disk once and passed by reference
+    BOARD_ARTIFACTS_ENABLED = os.getenv("BOARD_ARTIFACTS_ENABLED", "true").lower() == "true"
+    BOARD_ARTIFACT_DIRECTORY = os.getenv("BOARD_ARTIFACT_DIRECTORY", "./data/artifacts")
+    BOARD_ARTIFACT_THRESHOLD_BYTES = int(os.getenv("BOARD_ARTIFACT_THRESHOLD_BYTES", str(256 * 1024)))
+    BOARD_EXECUTION_RETENTION_DAYS = int(os.getenv("BOARD_EXECUTION_RETENTION_DAYS", "30"))  # Finished executions and their artifacts are pruned after this
     
     # Cache
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
     CACHE_TTL = 300  # 5 minutes
+    CACHE_MAX_ENTRIES = 10000  # LRU bound of the in-process cache
+    CACHE_URL = os.getenv("CACHE_URL", "")  # redis://host:6379/0 to share entries between workers
     
     # Rate Limiting
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
     RATE_LIMIT_REQUESTS = 100
     RATE_LIMIT_PERIOD = 60  # seconds
+    # Routes that call a model provider get their own, stricter budget (POST only)
+    RATE_LIMIT_AI_REQUESTS = int(os.getenv("RATE_LIMIT_AI_REQUESTS", "20"))
+    RATE_LIMIT_AI_PERIOD = 60
+    RATE_LIMIT_AI_ROUTES = [
+        r"^/chat/conversations/[^/]+/(messages|ai-response)$",
+        r"^/chat/c/[^/]+/messages$",
+        r"^/agents/[^/]+/test$",
+        r"^/api/boards/boards/[^/]+/execute$",  # Queued runs call LLM agents
+    ]
+    # Login and registration, per client IP
+    RATE_LIMIT_AUTH_REQUESTS = 10
+    RATE_LIMIT_AUTH_PERIOD = 60
+    RATE_LIMIT_AUTH_ROUTES = [r"^/auth/login$", r"^/auth/register"]
+    RATE_LIMIT_EXEMPT_PATHS = ["/health", "/metrics", "/docs", "/redoc", "/openapi.json"]
+    RATE_LIMIT_COMPACT_SECONDS = 60  # How often idle keys are dropped from the in-memory store
+    RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", os.getenv("CACHE_URL", ""))  # redis:// shares budgets between workers
 
 # Global settings instance
 settings = Settings()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Board List Benchmark - Queries and latency per board list page, per-board counts vs one statement
+
+Usage (from the backend directory):
+    python -m core.board_list_benchmark                     # 10k boards, 20 per page
+    python -m core.board_list_benchmark --boards 50000 --limit 50
+    python -m core.board_list_benchmark --depth 200         # how deep the "deep page" is
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, Board, BoardExecution, BoardNode, User
+
+NODES_PER_BOARD = 5
+EXECUTIONS_PER_BOARD = 3
+ROUNDS = 20
+INSERT_CHUNK = 2000
+
+class QueryCounter:
+    """Counts statements sent to the database while it is active"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+async def populate(session_factory, boards: int):
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        user = User(
+            email="benchmark@example.com", username="benchmark", full_name="Benchmark User",
+            password_hash="-", role="user", is_active=True
+        )
+        db.add(user)
+        await db.flush()
+
+        for start in range(0, boards, INSERT_CHUNK):
+            board_rows, node_rows, execution_rows = [], [], []
+            for index in range(start, min(start + INSERT_CHUNK, boards)):
+                board_id = str(uuid.uuid4())
+                updated_at = now - timedelta(seconds=index)
+                board_rows.append({
+                    "id": board_id, "name": f"Board {index}", "user_id": user.id,
+                    "execution_count": EXECUTIONS_PER_BOARD, "last_execution": updated_at,
+                    "created_at": updated_at, "updated_at": updated_at
+                })
+                node_rows.extend({
+                    "id": str(uuid.uuid4()), "board_id": board_id, "node_type": "noop",
+                    "label": f"Node {node}", "position_x": 0.0, "position_y": 0.0
+                } for node in range(NODES_PER_BOARD))
+                execution_rows.extend({
+                    "id": str(uuid.uuid4()), "board_id": board_id, "user_id": user.id, "status": "completed"
+                } for _ in range(EXECUTIONS_PER_BOARD))
+            await db.execute(insert(Board), board_rows)
+            await db.execute(insert(BoardNode), node_rows)
+            await db.execute(insert(BoardExecution), execution_rows)
+        await db.commit()
+        return user.id
+
+async def legacy_page(db: AsyncSession, user_id: int, limit: int, skip: int) -> List[Dict[str, Any]]:
+    """The old endpoint: count, one page by offset, then two COUNT queries per board"""
+    query = select(Board).where(Board.user_id == user_id)
+    await db.execute(select(func.count()).select_from(query.subquery()))
+    result = await db.execute(query.order_by(Board.updated_at.desc()).offset(skip).limit(limit))
+    boards = []
+    for board in result.scalars().all():
+        node_count = (await db.execute(select(func.count()).where(BoardNode.board_id == board.id))).scalar()
+        execution_count = (await db.execute(
+            select(func.count()).where(BoardExecution.board_id == board.id)
+        )).scalar()
+        boards.append({"id": board.id, "node_count": node_count, "execution_count": execution_count})
+    return boards
+
+async def measure(session_factory, counter: QueryCounter, page: Callable) -> Dict[str, float]:
+    latencies = []
+    queries = 0
+    for _ in range(ROUNDS):
+        async with session_factory() as db:
+            before = counter.count
+            started = time.perf_counter()
+            await page(db)
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries = counter.count - before
+    return {"queries": queries, "p50": statistics.median(latencies), "max": max(latencies)}
+
+async def run_benchmark(boards: int, limit: int, depth: int):
+    from services.board_service import board_service
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        user_id = await populate(session_factory, boards)
+        counter = QueryCounter(engine)
+
+        # Walk the cursor chain once to find the cursor of the deep page
+        deep_cursor = None
+        async with session_factory() as db:
+            for _ in range(depth):
+                page = await board_service.list_boards(db, user_id, limit=limit, cursor=deep_cursor)
+                deep_cursor = page["next_cursor"]
+                if deep_cursor is None:
+                    break
+
+        deep_skip = depth * limit
+        results = {
+            "legacy, first page": await measure(
+                session_factory, counter, lambda db: legacy_page(db, user_id, limit, 0)
+            ),
+            "legacy, deep page": await measure(
+                session_factory, counter, lambda db: legacy_page(db, user_id, limit, deep_skip)
+            ),
+            "service, first page": await measure(
+                session_factory, counter, lambda db: board_service.list_boards(db, user_id, limit=limit)
+            ),
+            "service, deep page (skip)": await measure(
+                session_factory, counter, lambda db: board_service.list_boards(db, user_id, limit=limit, skip=deep_skip)
+            ),
+            "service, deep page (cursor)": await measure(
+                session_factory, counter, lambda db: board_service.list_boards(db, user_id, limit=limit, cursor=deep_cursor)
+            ),
+        }
+        await engine.dispose()
+
+    print(f"Boards:          {boards} ({NODES_PER_BOARD} nodes, {EXECUTIONS_PER_BOARD} executions each)")
+    print(f"Page size:       {limit}, deep page at row {deep_skip}")
+    print(f"{'':30}{'queries':>8}{'p50 ms':>10}{'max ms':>10}")
+    for name, result in results.items():
+        print(f"{name:30}{result['queries']:>8}{result['p50']:>10.2f}{result['max']:>10.2f}")
+
+def main():
+    """Main function to run the board list benchmark"""
+    parser = argparse.ArgumentParser(description="Board list queries and latency benchmark")
+    parser.add_argument("--boards", type=int, default=10000, help="boards owned by the benchmark user")
+    parser.add_argument("--limit", type=int, default=20, help="boards per page")
+    parser.add_argument("--depth", type=int, default=400, help="page number of the deep page")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.boards, args.limit, args.depth))
+
+if __name__ == "__main__":
+    main()
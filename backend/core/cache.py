@@ -0,0 +1,241 @@
+"""
+Cache
+TTL/LRU memoization for async service methods with single-flight recompute and tag invalidation
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from config.settings import settings
+from core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# Arguments that never take part in a cache key
+_SKIPPED_ARGUMENTS = ("self", "cls", "db")
+
+class LocalCacheBackend:
+    """In-process LRU of serialized values - the stand-in when no shared backend is configured"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, data: bytes, ttl: float, tags: Tuple[str, ...]):
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, data, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    async def delete(self, key: str):
+        self._remove(key)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+class RedisCacheBackend:
+    """Shared backend for multi-worker deployments; tags are Redis sets of keys"""
+
+    def __init__(self, url: str, prefix: str = "agent-player:cache:"):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self.prefix + key)
+
+    async def set(self, key: str, data: bytes, ttl: float, tags: Tuple[str, ...]):
+        expire_ms = max(1, int(ttl * 1000))
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + key, data, px=expire_ms)
+            for tag in tags:
+                tag_key = f"{self.prefix}tag:{tag}"
+                pipe.sadd(tag_key, key)
+                pipe.pexpire(tag_key, expire_ms, gt=True)
+                pipe.pexpire(tag_key, expire_ms, nx=True)
+            await pipe.execute()
+
+    async def delete(self, key: str):
+        await self._client.delete(self.prefix + key)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = await self._client.smembers(tag_key)
+            if keys:
+                removed += await self._client.delete(*(self.prefix + key.decode("utf-8") for key in keys))
+            await self._client.delete(tag_key)
+        return removed
+
+    async def clear(self):
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+def create_backend(max_entries: Optional[int] = None, prefix: str = "agent-player:cache:"):
+    if settings.CACHE_URL.startswith(("redis://", "rediss://")):
+        try:
+            return RedisCacheBackend(settings.CACHE_URL, prefix)
+        except ImportError:
+            logger.warning("CACHE_URL is set but redis is not installed - using the in-process cache")
+    return LocalCacheBackend(max_entries or settings.CACHE_MAX_ENTRIES)
+
+class Cache:
+    """Front for a backend: values are pickled, so every caller gets its own copy"""
+
+    def __init__(self, backend, default_ttl: float):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+        # Bumped on invalidation so a recompute that started before it is not stored
+        self._tag_generations: Dict[str, int] = {}
+
+    async def get_or_compute(self, name: str, key: str, compute: Callable[[], Awaitable[Any]],
+                             ttl: Optional[float] = None, tags: Tuple[str, ...] = ()) -> Any:
+        while True:
+            data = await self._backend_get(key)
+            record_cache(name, data is not None)
+            if data is not None:
+                return pickle.loads(data)
+
+            # Single flight: callers that miss while a recompute runs wait for its result
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                return pickle.loads(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The computing caller was cancelled - try again
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generations = tuple(self._tag_generations.get(tag, 0) for tag in tags)
+        try:
+            value = await compute()
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if generations == tuple(self._tag_generations.get(tag, 0) for tag in tags):
+                await self._backend_set(key, data, self.default_ttl if ttl is None else ttl, tags)
+            future.set_result(data)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved for the case where there are none
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Tuple[str, ...] = ()):
+        """Store a value directly, replacing whatever is cached under key"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        await self._backend_set(key, data, self.default_ttl if ttl is None else ttl, tags)
+
+    async def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+        try:
+            await self.backend.invalidate_tags(tags)
+        except Exception as e:
+            logger.warning("Cache invalidation of %s failed: %s", ", ".join(tags), e)
+
+    async def delete(self, key: str):
+        await self.backend.delete(key)
+
+    async def clear(self):
+        self._tag_generations.clear()
+        await self.backend.clear()
+
+    # A failing shared backend degrades to uncached calls instead of failing requests
+    async def _backend_get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Cache read failed: %s", e)
+            return None
+
+    async def _backend_set(self, key: str, data: bytes, ttl: float, tags: Tuple[str, ...]):
+        try:
+            await self.backend.set(key, data, ttl, tags)
+        except Exception as e:
+            logger.warning("Cache write failed: %s", e)
+
+# Global cache instance
+cache = Cache(create_backend(), settings.CACHE_TTL)
+
+def cached(ttl: Optional[float] = None, tags: Tuple[str, ...] = (), name: Optional[str] = None):
+    """Memoize an async function; tags may use its argument names, e.g. "user:{user_id}"
+
+    self, cls and db are left out of the key; other arguments are keyed by repr.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        cache_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                argument: value for argument, value in bound.arguments.items()
+                if argument not in _SKIPPED_ARGUMENTS
+            }
+            key = f"{func.__module__}.{func.__qualname__}({', '.join(f'{argument}={value!r}' for argument, value in arguments.items())})"
+            entry_tags = tuple(tag.format(**arguments) for tag in tags)
+            return await cache.get_or_compute(
+                cache_name, key, lambda: func(*args, **kwargs), ttl=ttl, tags=entry_tags
+            )
+        return wrapper
+    return decorator
+
+async def invalidate(*tags: str):
+    await cache.invalidate_tags(*tags)
@@ -0,0 +1,132 @@
+"""
+Cron
+Five-field cron expressions (minute hour day month weekday) and their next run time, in UTC
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Optional, Tuple
+
+class CronError(ValueError):
+    """The expression is malformed or can never match"""
+
+# (name, lowest, highest) of each field, in expression order
+FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+MONTH_NAMES = {name: index for index, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+WEEKDAY_NAMES = {name: index for index, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# A valid expression matches within this many years (29 February of a leap year at the worst)
+SEARCH_YEARS = 8
+
+def _value(token: str, names: Dict[str, int], field: str) -> int:
+    token = token.lower()
+    if token in names:
+        return names[token]
+    if not token.isdigit():
+        raise CronError(f"Invalid {field} value: {token!r}")
+    return int(token)
+
+def _parse_field(text: str, field: str, lowest: int, highest: int, names: Dict[str, int]) -> Tuple[FrozenSet[int], bool]:
+    """(allowed values, whether the field is an unrestricted *)"""
+    values = set()
+    for item in text.split(","):
+        base, _, step_text = item.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"Invalid {field} step: {step_text!r}")
+            step = int(step_text)
+        if base == "*":
+            start, end = lowest, highest
+        elif "-" in base:
+            start_text, _, end_text = base.partition("-")
+            start, end = _value(start_text, names, field), _value(end_text, names, field)
+        else:
+            start = _value(base, names, field)
+            end = highest if step_text else start
+        if not lowest <= start <= end <= highest:
+            raise CronError(f"{field.capitalize()} out of range in {item!r} (allowed {lowest}-{highest})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values), text == "*"
+
+class CronExpression:
+    """A parsed expression; next_after() jumps field by field instead of testing every minute
+
+    Like cron, a day matches when either day-of-month or weekday matches if both are restricted,
+    and weekday 7 is Sunday as well as 0.
+    """
+    __slots__ = ("expression", "minutes", "hours", "days", "months", "weekdays", "any_day", "any_weekday")
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != len(FIELDS):
+            raise CronError(f"Expected {len(FIELDS)} fields (minute hour day month weekday), got {len(fields)}")
+        parsed = [
+            _parse_field(text, name, lowest, highest, MONTH_NAMES if name == "month" else WEEKDAY_NAMES if name == "weekday" else {})
+            for text, (name, lowest, highest) in zip(fields, FIELDS)
+        ]
+        (minutes, _), (hours, _), (days, any_day), (months, _), (weekdays, any_weekday) = parsed
+        self.minutes = tuple(sorted(minutes))
+        self.hours = tuple(sorted(hours))
+        self.days = days
+        self.months = months
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.any_day = any_day
+        self.any_weekday = any_weekday
+        # Fails fast on expressions like "0 0 30 2 *"
+        self.next_after(datetime(2000, 1, 1))
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+    def matches_day(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first matching minute strictly after moment"""
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + SEARCH_YEARS
+        while current.year <= limit:
+            if current.month not in self.months:
+                year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+                current = datetime(year, month, 1)
+                continue
+            if not self.matches_day(current):
+                current = datetime(current.year, current.month, current.day) + timedelta(days=1)
+                continue
+            if current.hour not in self.hours:
+                index = bisect_left(self.hours, current.hour)
+                if index == len(self.hours):
+                    current = datetime(current.year, current.month, current.day) + timedelta(days=1)
+                else:
+                    current = current.replace(hour=self.hours[index], minute=0)
+                continue
+            index = bisect_left(self.minutes, current.minute)
+            if index == len(self.minutes):
+                current = current.replace(minute=0) + timedelta(hours=1)
+                continue
+            return current.replace(minute=self.minutes[index])
+        raise CronError(f"{self.expression!r} never matches")
+
+def parse_cron(expression: Optional[str]) -> CronExpression:
+    if not expression or not expression.strip():
+        raise CronError("A cron expression is required")
+    return CronExpression(expression)
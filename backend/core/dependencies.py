@@ -6,7 +6,9 @@ Common dependencies for authentication and validation
 from fastapi import Depends, HTTPException, status, Header
 from typing import Dict, Any, Optional
 from core.security import security
-from config.database import get_db
+from core.principal_cache import Principal, principal_cache, token_identifier
+from core.tracing import traced
+from config.database import get_db, set_current_user_id
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from models.database import User
@@ -15,17 +17,18 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from config.settings import settings
+import logging
 
+# Create logger
+logger = logging.getLogger(__name__)
+
+@traced("auth.get_current_user")
 async def get_current_user(
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get current authenticated user from JWT token"""
-    print(f"🔐 AUTH DEBUG: Starting authentication check")
-    print(f"🔐 AUTH DEBUG: Authorization header: {authorization[:50] if authorization else 'None'}...")
-    
     if not authorization:
-        print(f"🔐 AUTH DEBUG: No authorization header provided")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authorization header missing",
@@ -34,66 +37,63 @@ async def get_current_user(
     
     try:
         # Extract token from "Bearer <token>"
-        print(f"🔐 AUTH DEBUG: Parsing authorization header...")
         scheme, token = authorization.split()
-        print(f"🔐 AUTH DEBUG: Scheme: {scheme}, Token: {token[:30]}...")
-        
-        if scheme.lower() != "bearer":
-            print(f"🔐 AUTH DEBUG: Invalid scheme: {scheme}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    except ValueError as e:
-        print(f"🔐 AUTH DEBUG: Error parsing header: {e}")
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authorization header format",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication scheme",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     # Verify token
-    print(f"🔐 AUTH DEBUG: Verifying JWT token...")
-    try:
-        user_data = security.get_user_from_token(token)
-        print(f"🔐 AUTH DEBUG: Token verification result: {user_data}")
-    except Exception as e:
-        print(f"🔐 AUTH DEBUG: Token verification error: {e}")
-        user_data = None
-        
+    user_data = security.get_user_from_token(token)
     if not user_data:
-        print(f"🔐 AUTH DEBUG: Token verification failed")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if user exists and is active
-    print(f"🔐 AUTH DEBUG: Checking user in database...")
-    print(f"🔐 AUTH DEBUG: Looking for user_id: {user_data.get('user_id')}")
-    
-    try:
-        query = select(User).where(
-            User.id == user_data["user_id"],
-            User.is_active == True
+    user_data["token_id"] = token_identifier(user_data.get("token_id"), token)
+    if principal_cache.is_revoked(user_data["token_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        result = await db.execute(query)
-        user = result.scalar_one_or_none()
-        print(f"🔐 AUTH DEBUG: Database query result: {user}")
-    except Exception as e:
-        print(f"🔐 AUTH DEBUG: Database query error: {e}")
-        user = None
     
-    if not user:
-        print(f"🔐 AUTH DEBUG: User not found or inactive in database")
+    # Check if user exists and is active - cached for PRINCIPAL_CACHE_TTL seconds
+    principal = principal_cache.get(user_data["user_id"])
+    if principal is None:
+        try:
+            result = await db.execute(
+                select(User.id, User.is_active, User.role).where(User.id == user_data["user_id"])
+            )
+            row = result.one_or_none()
+        except Exception as e:
+            logger.error(f"Failed to load user {user_data['user_id']}: {e}")
+            row = None
+        
+        if row is not None:
+            principal = Principal(row.id, bool(row.is_active), row.role)
+            principal_cache.put(principal)
+    
+    if principal is None or not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
     
-    print(f"🔐 AUTH DEBUG: Authentication successful for user: {user_data.get('email')}")
+    # The stored role wins over the one baked into the token
+    user_data["role"] = principal.role
+    set_current_user_id(user_data["user_id"])
     return user_data
 
 async def get_current_admin(
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import Profiler - Show the import-time tree of the application
+
+Usage (from the backend directory):
+    python -m core.import_profiler                 # profiles main:app
+    python -m core.import_profiler main:app --min-ms 5 --top 20
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+class ImportNode:
+    __slots__ = ("name", "self_us", "cumulative_us", "children")
+
+    def __init__(self, name: str, self_us: int, cumulative_us: int):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children: List["ImportNode"] = []
+
+def run_import_time(target: str) -> str:
+    """Import the target in a fresh interpreter with -X importtime and return its report"""
+    module_name, _, attribute = target.partition(":")
+    code = f"import importlib; module = importlib.import_module({module_name!r})"
+    if attribute:
+        code += f"; getattr(module, {attribute!r})"
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(BACKEND_DIR),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else "Import failed", file=sys.stderr)
+    return result.stderr
+
+def build_tree(report: str) -> List[ImportNode]:
+    """Build the import tree - importtime prints children before their parent"""
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in report.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        node = ImportNode(name, int(self_us), int(cumulative_us))
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+def print_tree(nodes: List[ImportNode], min_ms: float, depth: int = 0):
+    for node in sorted(nodes, key=lambda n: n.cumulative_us, reverse=True):
+        if node.cumulative_us / 1000 < min_ms:
+            continue
+        print(f"{node.cumulative_us / 1000:9.1f} ms {node.self_us / 1000:8.1f} ms  {'  ' * depth}{node.name}")
+        print_tree(node.children, min_ms, depth + 1)
+
+def iter_nodes(nodes: List[ImportNode]):
+    for node in nodes:
+        yield node
+        yield from iter_nodes(node.children)
+
+def main():
+    """Main function to run the import profiler"""
+    parser = argparse.ArgumentParser(description="Import-time tree for the application")
+    parser.add_argument("target", nargs="?", default="main:app", help="module[:attribute] to import")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="hide subtrees cheaper than this")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules by self time")
+    args = parser.parse_args()
+
+    roots = build_tree(run_import_time(args.target))
+    total_us = sum(node.cumulative_us for node in roots)
+
+    print(f"Import time for {args.target}: {total_us / 1000:.1f} ms")
+    print(f"{'cumulative':>12} {'self':>11}  module")
+    print_tree(roots, args.min_ms)
+
+    print(f"\nSlowest {args.top} modules by self time:")
+    for node in sorted(iter_nodes(roots), key=lambda n: n.self_us, reverse=True)[:args.top]:
+        print(f"{node.self_us / 1000:9.1f} ms  {node.name}")
+
+if __name__ == "__main__":
+    main()
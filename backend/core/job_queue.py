@@ -0,0 +1,261 @@
+"""
+Job Queue
+Durable background jobs in the jobs table - leased to in-process workers, retried with backoff
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.database import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+
+class QueueHandlers(NamedTuple):
+    run: JobHandler
+    on_failed: Optional[FailureHandler]
+
+class JobQueue:
+    """Workers claim jobs with a lease they keep renewing; a job whose worker died is claimed again
+    once its lease runs out, so several uvicorn workers can share the table.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: Dict[str, QueueHandlers] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_prune = 0.0
+        self._maintenance: List[Callable[[], Awaitable[Any]]] = []
+
+    def register(self, queue: str, handler: JobHandler, on_failed: Optional[FailureHandler] = None):
+        """handler(payload) runs the job; on_failed(payload, error) once it has no attempts left"""
+        self.handlers[queue] = QueueHandlers(handler, on_failed)
+
+    def add_maintenance(self, task: Callable[[], Awaitable[Any]]):
+        """task() runs hourly alongside job pruning, in one worker of each process"""
+        self._maintenance.append(task)
+
+    def enqueue(self, db: AsyncSession, queue: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        """Add a job to the caller's session - it is committed with whatever else the caller writes"""
+        job = Job(
+            queue=queue,
+            payload=payload,
+            status="queued",
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+            available_at=datetime.utcnow()
+        )
+        db.add(job)
+        return job
+
+    def wake(self):
+        """Let an idle worker look for work now instead of at its next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Job claim failed: %s", e)
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                if index == 0 and time.monotonic() >= self._next_prune:
+                    self._next_prune = time.monotonic() + 3600
+                    await self._prune()
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Bookkeeping failed; the lease runs out and the job is claimed again
+                logger.error("Job %s (%s) could not be settled: %s", job.id, job.queue, e)
+
+    def _claimable(self, now: datetime):
+        return and_(
+            Job.queue.in_(list(self.handlers)),
+            or_(
+                and_(Job.status == "queued", Job.available_at <= now),
+                and_(Job.status == "running", Job.locked_until < now)
+            )
+        )
+
+    async def _claim(self) -> Optional[Job]:
+        """Take the oldest available job; a conditional UPDATE decides races between workers"""
+        if not self.handlers:
+            return None
+        async with AsyncSessionLocal() as session:
+            while True:
+                now = datetime.utcnow()
+                result = await session.execute(
+                    select(Job.id).where(self._claimable(now)).order_by(Job.available_at, Job.id).limit(1)
+                )
+                job_id = result.scalar()
+                if job_id is None:
+                    return None
+                claimed = await session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, self._claimable(now))
+                    .values(
+                        status="running",
+                        locked_by=self.worker_id,
+                        locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                        attempts=Job.attempts + 1
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    return await session.get(Job, job_id)
+                # Another worker got there first - try the next one
+
+    async def _run(self, job: Job):
+        handlers = self.handlers[job.queue]
+        if job.attempts > job.max_attempts:
+            # Its last worker stopped renewing the lease mid-run
+            await self._fail(job, handlers, "Worker stopped while running the job")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        started = time.perf_counter()
+        try:
+            await handlers.run(job.payload or {})
+        except asyncio.CancelledError:
+            await asyncio.shield(self._release(job.id))
+            raise
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            logger.error("Job %s (%s) attempt %s failed: %s", job.id, job.queue, job.attempts, error)
+            if job.attempts >= job.max_attempts:
+                await self._fail(job, handlers, error)
+            else:
+                await self._retry(job, error)
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self._update(job.id, status="done", completed_at=datetime.utcnow(), locked_by=None, locked_until=None)
+        logger.info("Job %s (%s) done in %.0f ms", job.id, job.queue, (time.perf_counter() - started) * 1000)
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                await self._update(
+                    job_id, locked_until=datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+                )
+            except Exception as e:
+                logger.warning("Lease renewal for job %s failed: %s", job_id, e)
+
+    async def _retry(self, job: Job, error: str):
+        backoff = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        await self._update(
+            job.id, status="queued", last_error=error, locked_by=None, locked_until=None,
+            available_at=datetime.utcnow() + timedelta(seconds=backoff)
+        )
+
+    async def _fail(self, job: Job, handlers: QueueHandlers, error: str):
+        await self._update(
+            job.id, status="failed", last_error=error, locked_by=None, locked_until=None,
+            completed_at=datetime.utcnow()
+        )
+        if handlers.on_failed is not None:
+            try:
+                await handlers.on_failed(job.payload or {}, error)
+            except Exception as e:
+                logger.error("Failure handler for job %s (%s) failed: %s", job.id, job.queue, e)
+
+    async def _release(self, job_id: int):
+        """Shutdown mid-job: queue it again without using up an attempt"""
+        try:
+            await self._update(
+                job_id, status="queued", locked_by=None, locked_until=None, attempts=Job.attempts - 1
+            )
+        except Exception as e:
+            logger.warning("Could not release job %s: %s", job_id, e)
+
+    async def _update(self, job_id: int, **values):
+        """Update a job this worker holds"""
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == self.worker_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    delete(Job).where(Job.status.in_(("done", "failed")), Job.completed_at < cutoff)
+                )
+                await session.commit()
+            if result.rowcount:
+                logger.info("Pruned %s finished jobs", result.rowcount)
+        except Exception as e:
+            logger.warning("Job pruning failed: %s", e)
+        for task in self._maintenance:
+            try:
+                await task()
+            except Exception as e:
+                logger.warning("Maintenance task %s failed: %s", getattr(task, "__qualname__", task), e)
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per queue and status"""
+        async with AsyncSessionLocal(info={"read_only": True}) as session:
+            result = await session.execute(
+                select(Job.queue, Job.status, func.count()).group_by(Job.queue, Job.status)
+            )
+            counts: Dict[str, Dict[str, int]] = {}
+            for queue, status, count in result:
+                counts.setdefault(queue, {})[status] = count
+        return counts
+
+# Global job queue instance
+job_queue = JobQueue(settings.JOB_QUEUE_WORKERS)
@@ -0,0 +1,156 @@
+"""
+JSON Patch
+RFC 6902 patches - apply them to a document and compute the patch between two documents
+"""
+
+import copy
+from typing import Any, Dict, List, Tuple
+
+Operation = Dict[str, Any]
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or does not apply to the document"""
+
+def _parse_pointer(pointer: Any) -> List[str]:
+    """RFC 6901 pointer to its unescaped tokens; "" is the whole document"""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def _index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise JsonPatchError(f"Path not found: /{'/'.join(map(_escape, tokens))}")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_index(document, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(map(_escape, tokens))}")
+    return document
+
+def _parent(document: Any, pointer: Any) -> Tuple[Any, str]:
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        raise JsonPatchError("The document root has no parent")
+    return _resolve(document, tokens[:-1]), tokens[-1]
+
+def _add(document: Any, pointer: Any, value: Any) -> Any:
+    if pointer == "":
+        return value
+    parent, token = _parent(document, pointer)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to {pointer!r}")
+    return document
+
+def _remove(document: Any, pointer: Any) -> Tuple[Any, Any]:
+    """(document, removed value)"""
+    parent, token = _parent(document, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return document, parent.pop(token)
+    if isinstance(parent, list):
+        return document, parent.pop(_index(parent, token, allow_end=False))
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Equality as RFC 6902 test defines it - JSON types must match (true is not 1), numbers compare by value"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+def apply_patch(document: Any, operations: List[Operation], in_place: bool = False) -> Any:
+    """Apply the operations in order and return the patched document
+
+    The input is left untouched unless in_place is set; values taken from the operations are
+    copied either way, so the patched document never shares state with the patch.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("A patch is a list of operations")
+    if not in_place:
+        document = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict) or "path" not in operation:
+            raise JsonPatchError(f"Invalid operation: {operation!r}")
+        op, path = operation.get("op"), operation["path"]
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op!r} needs a value")
+
+        if op == "add":
+            document = _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            document, _ = _remove(document, path)
+        elif op == "replace":
+            if path == "":
+                document = copy.deepcopy(operation["value"])
+            else:
+                document, _ = _remove(document, path)
+                document = _add(document, path, copy.deepcopy(operation["value"]))
+        elif op in ("move", "copy"):
+            source = operation.get("from")
+            if op == "move":
+                if isinstance(source, str) and isinstance(path, str) and path.startswith(source + "/"):
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                document, value = _remove(document, source)
+            else:
+                value = copy.deepcopy(_resolve(document, _parse_pointer(source)))
+            document = _add(document, path, value)
+        elif op == "test":
+            if not _json_equal(_resolve(document, _parse_pointer(path)), operation["value"]):
+                raise JsonPatchError(f"Test failed at {path}")
+        else:
+            raise JsonPatchError(f"Unknown operation: {op!r}")
+    return document
+
+def make_patch(source: Any, target: Any, path: str = "") -> List[Operation]:
+    """Operations turning source into target
+
+    Dicts are compared key by key and equal-length lists item by item; anything else that
+    differs is replaced whole.
+    """
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations: List[Operation] = []
+        for key in source:
+            if key not in target:
+                operations.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in source:
+                operations.append({"op": "add", "path": child, "value": value})
+            else:
+                operations.extend(make_patch(source[key], value, child))
+        return operations
+    if isinstance(source, list) and isinstance(target, list) and len(source) == len(target):
+        operations = []
+        for index, (old, new) in enumerate(zip(source, target)):
+            operations.extend(make_patch(old, new, f"{path}/{index}"))
+        return operations
+    if type(source) is type(target) and source == target:
+        return []
+    return [{"op": "replace", "path": path, "value": target}]
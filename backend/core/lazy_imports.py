@@ -0,0 +1,39 @@
+"""
+Lazy Imports
+Load heavy provider SDKs once, on first use, off the event loop
+"""
+
+import asyncio
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Dict
+
+_modules: Dict[str, ModuleType] = {}
+_lock = threading.Lock()
+
+def is_available(module_name: str) -> bool:
+    """Check that an optional dependency is installed without importing it"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def import_module(module_name: str) -> ModuleType:
+    """Import a module once - later calls are a dict lookup"""
+    module = _modules.get(module_name)
+    if module is None:
+        with _lock:
+            module = _modules.get(module_name)
+            if module is None:
+                module = importlib.import_module(module_name)
+                _modules[module_name] = module
+    return module
+
+async def load_module(module_name: str) -> ModuleType:
+    """Import a module in a worker thread so the first use doesn't block the event loop"""
+    module = _modules.get(module_name)
+    if module is not None:
+        return module
+    return await asyncio.to_thread(import_module, module_name)
@@ -0,0 +1,64 @@
+"""
+Leases
+Named locks in the leases table - one holder across all workers, taken over once it stops renewing
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from config.database import AsyncSessionLocal
+from models.database import Lease
+
+logger = logging.getLogger(__name__)
+
+class LeaseLock:
+    """acquire() takes the lease when it is free or expired and renews it when already held
+
+    The holder must call acquire() again well before ttl_seconds pass; a holder that dies simply
+    stops renewing and the lease goes to the next caller once it expires.
+    """
+
+    def __init__(self, name: str, holder: str, ttl_seconds: float):
+        self.name = name
+        self.holder = holder
+        self.ttl_seconds = ttl_seconds
+        self.held_until = None
+
+    @property
+    def held(self) -> bool:
+        return self.held_until is not None and datetime.utcnow() < self.held_until
+
+    async def acquire(self) -> bool:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(Lease)
+                .where(Lease.name == self.name, or_(Lease.holder == self.holder, Lease.expires_at < now))
+                .values(holder=self.holder, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                # Nobody has taken it yet - or somebody holds it and the insert fails
+                session.add(Lease(name=self.name, holder=self.holder, expires_at=expires_at))
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                self.held_until = None
+                return False
+        if self.held_until is None:
+            logger.info("Lease %s acquired by %s", self.name, self.holder)
+        self.held_until = expires_at
+        return True
+
+    async def release(self):
+        """Give the lease up so another worker can take it without waiting for it to expire"""
+        if self.held_until is None:
+            return
+        self.held_until = None
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Lease).where(Lease.name == self.name, Lease.holder == self.holder))
+            await session.commit()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Login Benchmark - Logins/sec and event-loop lag under concurrent login load
+
+Usage (from the backend directory):
+    python -m core.login_benchmark                      # 200 logins, 20 concurrent
+    python -m core.login_benchmark --logins 500 --concurrency 50
+    python -m core.login_benchmark --blocking           # verify bcrypt on the loop, for comparison
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.security import security
+from models.database import Base, User
+
+BENCHMARK_EMAIL = "benchmark@example.com"
+BENCHMARK_PASSWORD = "benchmark-password"
+LAG_INTERVAL = 0.005
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event):
+    """Sleep a fixed interval and record how late the loop wakes us up"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL) * 1000)
+
+async def create_benchmark_user(session_factory):
+    async with session_factory() as db:
+        db.add(User(
+            email=BENCHMARK_EMAIL,
+            username="benchmark",
+            full_name="Benchmark User",
+            password_hash=security.hash_password(BENCHMARK_PASSWORD),
+            role="user",
+            is_active=True
+        ))
+        await db.commit()
+
+async def run_benchmark(logins: int, concurrency: int, blocking: bool):
+    from services.auth_service import AuthService
+
+    auth_service = AuthService()
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await create_benchmark_user(session_factory)
+        password_hash = security.hash_password(BENCHMARK_PASSWORD)
+
+        limiter = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def login_once():
+            async with limiter:
+                started = time.perf_counter()
+                if blocking:
+                    # The pre-pool behaviour: bcrypt runs on the event loop thread
+                    security.verify_password(BENCHMARK_PASSWORD, password_hash)
+                else:
+                    async with session_factory() as db:
+                        await auth_service.login(db, BENCHMARK_EMAIL, BENCHMARK_PASSWORD)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        lag_samples: List[float] = []
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login_once() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await lag_task
+        await engine.dispose()
+
+    print(f"Mode:            {'blocking verify on the loop' if blocking else 'AuthService.login (hash pool)'}")
+    print(f"Logins:          {logins} ({concurrency} concurrent)")
+    print(f"Logins/sec:      {logins / elapsed:.1f}")
+    print(f"Login p50/p99:   {percentile(latencies, 50):.1f} / {percentile(latencies, 99):.1f} ms")
+    print(f"Loop lag p50:    {percentile(lag_samples, 50):.2f} ms")
+    print(f"Loop lag p99:    {percentile(lag_samples, 99):.2f} ms")
+    print(f"Loop lag max:    {max(lag_samples, default=0.0):.2f} ms")
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[min(98, max(0, int(pct) - 1))]
+
+def main():
+    """Main function to run the login benchmark"""
+    parser = argparse.ArgumentParser(description="Login throughput and event-loop lag benchmark")
+    parser.add_argument("--logins", type=int, default=200, help="total number of logins")
+    parser.add_argument("--concurrency", type=int, default=20, help="logins in flight at once")
+    parser.add_argument("--blocking", action="store_true", help="verify passwords on the event loop instead")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.logins, args.concurrency, args.blocking))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Event Loop Monitor
+Always-on loop lag sampling with stack capture and route attribution for blocking calls
+"""
+
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class LoopBlockedError(AssertionError):
+    """Raised in test mode when a request blocks the event loop for longer than LOOP_LAG_FAIL_MS"""
+
+class LagHistogram:
+    __slots__ = ("counts", "total", "sum_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(LAG_BUCKETS_MS, value_ms)] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.total:
+            return 0.0
+        target = self.total * pct / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(LAG_BUCKETS_MS[index]) if index < len(LAG_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(LAG_BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets
+        }
+
+class Stall:
+    """One period where the loop did not run for longer than the threshold"""
+    __slots__ = ("started", "detected_at", "duration_ms", "route", "task", "stack")
+
+    def __init__(self, started: float, route: str, task: Optional[asyncio.Task], stack: str):
+        self.started = started
+        self.detected_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.route = route
+        self.task = weakref.ref(task) if task is not None else None
+        self.stack = stack
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "detected_at": self.detected_at,
+            "duration_ms": round(self.duration_ms, 2) if self.duration_ms is not None else None,
+            "stack": self.stack
+        }
+
+class LoopLagMonitor:
+    """Heartbeat coroutine measures lag; a watchdog thread captures the stack of whatever blocks the loop"""
+
+    def __init__(self, interval: float, threshold_ms: float, max_stalls: int = 50):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.lag = LagHistogram()
+        self.route_stalls: Dict[str, LagHistogram] = {}
+        self.stalls: Deque[Stall] = deque(maxlen=max_stalls)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._last_tick = time.perf_counter()
+        self._pending: Optional[Stall] = None
+        self._task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None and not self._heartbeat.done()
+
+    def start(self):
+        """Start sampling on the running loop (restarts if the loop changed, e.g. per-request test clients)"""
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self._stopped.set()
+
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._pending = None
+        self._stopped = threading.Event()
+        self._heartbeat = loop.create_task(self._run_heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._run_watchdog, args=(self._stopped,), name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag_ms = max(0.0, (now - self._last_tick - self.interval) * 1000)
+            self._last_tick = now
+            self.lag.observe(lag_ms)
+            self._finish_pending(lag_ms)
+
+    def _run_watchdog(self, stopped: threading.Event):
+        # Polls twice per threshold so a stall is caught while the blocking call is still on the stack
+        poll = min(self.interval, self.threshold_ms / 2000)
+        while not stopped.wait(poll):
+            last_tick = self._last_tick
+            blocked_ms = (time.perf_counter() - last_tick - self.interval) * 1000
+            if blocked_ms < self.threshold_ms or self._pending is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            task = asyncio.current_task(self._loop)
+            with self._lock:
+                if self._last_tick == last_tick and self._pending is None:
+                    self._pending = Stall(last_tick, self._route_for(task), task, stack)
+            del frame
+
+    def _finish_pending(self, lag_ms: float) -> Optional[Stall]:
+        with self._lock:
+            stall, self._pending = self._pending, None
+        if stall is None:
+            return None
+
+        stall.duration_ms = lag_ms
+        self.stalls.append(stall)
+        self.route_stalls.setdefault(stall.route, LagHistogram()).observe(lag_ms)
+        logger.warning(
+            f"Event loop blocked for {lag_ms:.0f} ms in {stall.route}\n{stall.stack}"
+        )
+        return stall
+
+    def _route_for(self, task: Optional[asyncio.Task]) -> str:
+        scope = self._task_scopes.get(task) if task is not None else None
+        if scope is None:
+            return getattr(task, "get_name", lambda: "unknown")() if task is not None else "unknown"
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        return f"{scope.get('method', '')} {path}".strip()
+
+    def track_request(self, scope: Dict[str, Any]):
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_scopes[task] = scope
+
+    def release_request(self) -> List[Stall]:
+        """Forget the current request and return the stalls it caused"""
+        task = asyncio.current_task()
+        if task is None:
+            return []
+        self._task_scopes.pop(task, None)
+
+        # A stall still pending here ended when this task yielded back to the loop
+        if self._pending is not None and self._pending.task is not None and self._pending.task() is task:
+            self._finish_pending(max(0.0, (time.perf_counter() - self._last_tick - self.interval) * 1000))
+        return [stall for stall in self.stalls if stall.task is not None and stall.task() is task]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold_ms,
+            "lag": self.lag.to_dict(),
+            "routes": {
+                route: histogram.to_dict()
+                for route, histogram in sorted(self.route_stalls.items(), key=lambda item: -item[1].max_ms)
+            },
+            "recent_stalls": [stall.to_dict() for stall in reversed(self.stalls)]
+        }
+
+class LoopMonitorMiddleware:
+    """ASGI middleware that attributes loop stalls to the route being served"""
+
+    def __init__(self, app, monitor: "LoopLagMonitor", fail_ms: Optional[float] = None):
+        self.app = app
+        self.monitor = monitor
+        self.fail_ms = fail_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.monitor.start()
+        self.monitor.track_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stalls = self.monitor.release_request()
+
+        # Test mode guard - surface the blocking call as a failure in the test client
+        if self.fail_ms is not None:
+            worst = max(stalls, key=lambda stall: stall.duration_ms or 0.0, default=None)
+            if worst is not None and (worst.duration_ms or 0.0) > self.fail_ms:
+                raise LoopBlockedError(
+                    f"{worst.route} blocked the event loop for {worst.duration_ms:.0f} ms "
+                    f"(limit {self.fail_ms:.0f} ms)\n{worst.stack}"
+                )
+
+# Global loop monitor instance - in test mode stalls are captured down to the failure limit
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    threshold_ms=min(settings.LOOP_LAG_THRESHOLD_MS, settings.LOOP_LAG_FAIL_MS or settings.LOOP_LAG_THRESHOLD_MS)
+)
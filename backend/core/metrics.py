@@ -0,0 +1,366 @@
+"""
+Metrics
+In-process Prometheus collectors for API, database, LLM, cache and WebSocket telemetry
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from config.settings import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LabelKey = Tuple[str, ...]
+
+# Collectors are only updated from the event loop thread, so plain dict and list
+# updates are enough - there are no locks on the request path
+
+class Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelKey, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> Dict[LabelKey, Any]:
+        return self._values
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # [per-bucket counts (last is +Inf), sum, count]
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Plain, JSON serialisable view of every metric"""
+        return {
+            metric.name: {
+                "type": metric.metric_type,
+                "help": metric.documentation,
+                "labels": list(metric.label_names),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(key), value] for key, value in metric.samples().items()]
+            }
+            for metric in self._metrics.values()
+        }
+
+registry = MetricsRegistry()
+
+# HTTP
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+websocket_connections = registry.gauge("websocket_connections", "Open WebSocket connections")
+
+# Database
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",)
+)
+db_pool_checkouts = registry.counter("db_pool_checkouts_total", "Connections checked out of the pool")
+db_pool_checked_out = registry.gauge("db_pool_checked_out", "Connections currently checked out")
+db_pool_wait = registry.histogram(
+    "db_pool_wait_seconds", "Time spent acquiring a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+# LLM providers
+llm_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time until the first token arrives (full response for non-streaming calls)",
+    ("provider", "model")
+)
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "Total LLM request latency", ("provider", "model", "status")
+)
+llm_tokens = registry.counter("llm_tokens_total", "Tokens processed by LLM providers", ("provider", "model", "kind"))
+
+# Caches
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by result", ("cache", "result"))
+
+# Board triggers
+board_trigger_lag = registry.histogram(
+    "board_trigger_lag_seconds", "Delay between a trigger's scheduled or event time and its run being queued",
+    ("trigger_type",), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 15.0, 60.0, 300.0, 3600.0)
+)
+board_trigger_runs = registry.counter(
+    "board_trigger_runs_total", "Trigger runs by outcome (queued, missed, failed)", ("trigger_type", "outcome")
+)
+board_scheduler_leader = registry.gauge("board_scheduler_leader", "1 while this worker holds the scheduler lease")
+board_scheduler_pending = registry.gauge("board_scheduler_pending", "Cron triggers due within the scheduler window")
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+def record_llm_call(provider: str, model: str, started: float, status: str = "success",
+                    first_token_at: Optional[float] = None, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """Record one LLM call - `started`/`first_token_at` are time.perf_counter() values"""
+    finished = time.perf_counter()
+    model = model or "unknown"
+    llm_request_duration.observe(finished - started, provider=provider, model=model, status=status)
+    if status == "success":
+        llm_time_to_first_token.observe((first_token_at or finished) - started, provider=provider, model=model)
+    if prompt_tokens:
+        llm_tokens.inc(prompt_tokens, provider=provider, model=model, kind="prompt")
+    if completion_tokens:
+        llm_tokens.inc(completion_tokens, provider=provider, model=model, kind="completion")
+
+# Database instrumentation
+def _statement_operation(statement: str) -> str:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return operation if operation in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("metrics_query_start")
+    if start_times:
+        db_query_duration.observe(time.perf_counter() - start_times.pop(), operation=_statement_operation(statement))
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    db_pool_checkouts.inc()
+    db_pool_checked_out.inc()
+
+def _on_checkin(dbapi_connection, connection_record):
+    db_pool_checked_out.dec()
+
+def instrument_engine(engine):
+    """Attach query timing and pool metrics to an engine (async engines use their sync_engine)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    pool = sync_engine.pool
+    event.listen(pool, "checkout", _on_checkout)
+    event.listen(pool, "checkin", _on_checkin)
+
+    # Engine.raw_connection goes through pool.connect(), so timing it gives the checkout wait
+    pool_connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return pool_connect()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template, in-flight requests and WebSockets"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            websocket_connections.inc()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                websocket_connections.dec()
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=_route_template(scope) or "unmatched",
+                status=status_code
+            )
+
+def _route_template(scope) -> Optional[str]:
+    route = scope.get("route")
+    return getattr(route, "path", None)
+
+# Multiprocess mode - each worker writes its samples to a shared directory and any
+# worker serving /metrics merges them
+def _worker_file(directory: Path, pid: int) -> Path:
+    return directory / f"metrics_{pid}.json"
+
+def write_worker_metrics(metrics: Optional[Dict[str, Dict[str, Any]]] = None):
+    """Write this worker's samples atomically so another worker can aggregate them"""
+    directory = Path(settings.METRICS_MULTIPROCESS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = _worker_file(directory, os.getpid())
+    temporary = target.with_suffix(".tmp")
+    temporary.write_text(json.dumps({"pid": os.getpid(), "metrics": metrics or registry.collect()}))
+    os.replace(temporary, target)
+
+def remove_worker_metrics():
+    """Drop this worker's file on shutdown so its samples leave the merged output"""
+    _worker_file(Path(settings.METRICS_MULTIPROCESS_DIR), os.getpid()).unlink(missing_ok=True)
+
+async def run_metrics_writer():
+    """Background task for multiprocess mode - snapshot on the loop, write in a thread"""
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        await asyncio.to_thread(write_worker_metrics, registry.collect())
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _merge_worker_metrics() -> Dict[str, Dict[str, Any]]:
+    """Sum samples over the files of live workers; files of workers that died without
+    cleaning up are removed"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for path in Path(settings.METRICS_MULTIPROCESS_DIR).glob("metrics_*.json"):
+        try:
+            worker = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(worker["pid"]):
+            path.unlink(missing_ok=True)
+            continue
+
+        for name, metric in worker["metrics"].items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                    current[2] += value[2]
+                else:
+                    target["samples"][key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: List[str], values: List[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def render_metrics() -> str:
+    """Prometheus text exposition of this worker, or of all workers in multiprocess mode"""
+    if settings.METRICS_MULTIPROCESS_DIR:
+        write_worker_metrics()
+        metrics = _merge_worker_metrics()
+    else:
+        metrics = registry.collect()
+
+    lines: List[str] = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labels = metric["labels"]
+        for values, value in metric["samples"]:
+            if metric["type"] == "histogram":
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(list(metric["buckets"]) + [math.inf], counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels, values, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels, values)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels, values)} {count}")
+            else:
+                lines.append(f"{name}{_format_labels(labels, values)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,78 @@
+"""
+Principal Cache
+Short-lived in-process cache of authenticated users plus a revoked token set
+"""
+
+import hashlib
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+from config.settings import settings
+from core.metrics import record_cache
+
+class Principal(NamedTuple):
+    user_id: int
+    is_active: bool
+    role: Optional[str]
+
+def token_identifier(token_id: Optional[str], token: str) -> str:
+    """Token id (jti) when the token carries one, otherwise a digest of the token itself"""
+    return token_id or hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class PrincipalCache:
+    """Active flag and role per user for PRINCIPAL_CACHE_TTL seconds, with explicit invalidation"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._principals: Dict[int, Tuple[float, Principal]] = {}
+        self._revoked_tokens: Dict[str, float] = {}
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        entry = self._principals.get(user_id)
+        if entry is not None and time.monotonic() >= entry[0]:
+            self._principals.pop(user_id, None)
+            entry = None
+        record_cache("principal", entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, principal: Principal):
+        now = time.monotonic()
+        if len(self._principals) >= self.max_size:
+            # Drop expired entries first, then the oldest if the cache is still full
+            for user_id, (expires_at, _) in list(self._principals.items()):
+                if expires_at <= now:
+                    self._principals.pop(user_id, None)
+            if len(self._principals) >= self.max_size:
+                self._principals.pop(next(iter(self._principals)), None)
+        self._principals[principal.user_id] = (now + self.ttl, principal)
+
+    def invalidate_user(self, user_id: int):
+        """Forget a user - call after deactivation, deletion or a role change"""
+        self._principals.pop(user_id, None)
+
+    def revoke_token(self, identifier: str, expires_at: Optional[float] = None):
+        """Reject a token until it would have expired anyway (expires_at is a unix timestamp)"""
+        if expires_at is None:
+            expires_at = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        now = time.time()
+        if len(self._revoked_tokens) >= self.max_size:
+            for key, revoked_until in list(self._revoked_tokens.items()):
+                if revoked_until <= now:
+                    self._revoked_tokens.pop(key, None)
+        self._revoked_tokens[identifier] = expires_at
+
+    def is_revoked(self, identifier: str) -> bool:
+        revoked_until = self._revoked_tokens.get(identifier)
+        if revoked_until is None:
+            return False
+        if time.time() >= revoked_until:
+            self._revoked_tokens.pop(identifier, None)
+            return False
+        return True
+
+    def clear(self):
+        self._principals.clear()
+        self._revoked_tokens.clear()
+
+# Global principal cache instance
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_SIZE)
@@ -0,0 +1,134 @@
+"""
+Query Profiler
+Per-request SQL statistics, slow-query log and N+1 detection on SQLAlchemy cursor events
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("db.slow_query")
+
+_NUMBER_LITERAL = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PARAMETER_LIST = re.compile(r"\((\s*(\?|%s|:\w+|\$\d+)\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """Reduce a statement to its shape - literals and IN lists collapsed"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PARAMETER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+class QueryStats:
+    """Queries issued while handling a single request"""
+    __slots__ = ("count", "total_ms", "slowest", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+        self.slowest.append((elapsed_ms, statement))
+        if len(self.slowest) > settings.QUERY_PROFILE_SLOWEST:
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[settings.QUERY_PROFILE_SLOWEST:]
+
+    def repeated_shapes(self) -> List[Tuple[str, int]]:
+        """Statements of the same shape run often enough to look like N+1"""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def slowest_ms(self) -> float:
+        return max((elapsed for elapsed, _ in self.slowest), default=0.0)
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            f"Slow query ({elapsed_ms:.1f} ms): {_WHITESPACE.sub(' ', statement)[:1000]}"
+        )
+
+def instrument_engine(engine):
+    """Attach the cursor timing hooks to an engine (async engines use their sync_engine)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryProfilerMiddleware:
+    """ASGI middleware that collects QueryStats per request and reports them"""
+
+    def __init__(self, app, expose_headers: bool = False):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = list(message.get("headers", []))
+                headers.extend(
+                    (name.encode("latin-1"), value.encode("latin-1", "replace"))
+                    for name, value in summary_headers(stats)
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            _current_stats.reset(token)
+            for shape, count in stats.repeated_shapes():
+                logger.warning(
+                    f"Possible N+1 on {scope['method']} {scope['path']}: "
+                    f"{count} x {shape[:300]}"
+                )
+
+def summary_headers(stats: QueryStats) -> List[Tuple[str, str]]:
+    headers = [
+        ("X-DB-Query-Count", str(stats.count)),
+        ("X-DB-Time-Ms", f"{stats.total_ms:.2f}"),
+        ("X-DB-Slowest-Ms", f"{stats.slowest_ms():.2f}"),
+        ("Server-Timing", f"db;dur={stats.total_ms:.2f};desc=\"{stats.count} queries\""),
+    ]
+    repeated = stats.repeated_shapes()
+    if repeated:
+        headers.append(("X-DB-N-Plus-One", "; ".join(f"{count}x {shape[:120]}" for shape, count in repeated[:3])))
+    return headers
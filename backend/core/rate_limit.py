@@ -0,0 +1,192 @@
+"""
+Rate Limiting
+GCRA rate limits per user or client IP and route class, with RateLimit-* response headers
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+from config.settings import settings
+from core.security import security
+
+logger = logging.getLogger(__name__)
+
+class RateLimitPolicy(NamedTuple):
+    name: str
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        """Emission interval - one request's worth of budget comes back this often"""
+        return self.period / self.limit
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+def decide(policy: RateLimitPolicy, tat: float, now: float, allowed: bool) -> RateLimitDecision:
+    """Headers from the theoretical arrival time (tat) left behind by a GCRA check"""
+    backlog = max(0.0, tat - now)
+    remaining = max(0, math.floor((policy.period - backlog) / policy.interval + 1e-9))
+    retry_after = 0.0 if allowed else max(0.0, backlog + policy.interval - policy.period)
+    return RateLimitDecision(allowed, policy.limit, remaining, backlog, retry_after)
+
+class MemoryRateLimitStore:
+    """One float per key; keys whose budget has fully refilled are dropped on compaction"""
+
+    def __init__(self, compact_every: float):
+        self.compact_every = compact_every
+        self._tats: Dict[str, float] = {}
+        self._next_compaction = time.monotonic() + compact_every
+
+    async def hit(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        if now >= self._next_compaction:
+            self._compact(now)
+
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + policy.interval
+        if new_tat - policy.period > now:
+            return False, tat, now
+        self._tats[key] = new_tat
+        return True, new_tat, now
+
+    def _compact(self, now: float):
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        self._next_compaction = now + self.compact_every
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+# GCRA in one round trip; Redis TIME keeps workers on different hosts on the same clock
+_GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - period > now then
+    return {0, tostring(tat), tostring(now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat), tostring(now)}
+"""
+
+class RedisRateLimitStore:
+    """Shared budgets for multiple workers; keys expire when the budget has refilled"""
+
+    def __init__(self, url: str, prefix: str = "agent-player:ratelimit:"):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_GCRA_SCRIPT)
+        self.prefix = prefix
+
+    async def hit(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float, float]:
+        allowed, tat, now = await self._script(keys=[self.prefix + key], args=[policy.interval, policy.period])
+        return bool(allowed), float(tat), float(now)
+
+def create_store():
+    if settings.RATE_LIMIT_STORAGE_URL.startswith(("redis://", "rediss://")):
+        try:
+            return RedisRateLimitStore(settings.RATE_LIMIT_STORAGE_URL)
+        except ImportError:
+            logger.warning("RATE_LIMIT_STORAGE_URL is set but redis is not installed - limits are per worker")
+    return MemoryRateLimitStore(settings.RATE_LIMIT_COMPACT_SECONDS)
+
+def _client_identity(scope) -> Tuple[Optional[str], str]:
+    """(user key or None, ip key) - the token is only decoded here, authentication happens later"""
+    user_key = None
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            if authorization.lower().startswith("bearer "):
+                user_data = security.get_user_from_token(authorization[7:].strip())
+                if user_data and user_data.get("user_id") is not None:
+                    user_key = f"user:{user_data['user_id']}"
+            break
+    client = scope.get("client")
+    return user_key, f"ip:{client[0] if client else 'unknown'}"
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the default, AI and auth budgets
+
+    AI-generating routes and login/registration get their own, stricter buckets, so
+    chatting does not eat into the budget for browsing and vice versa.
+    """
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store or create_store()
+        self.default_policy = RateLimitPolicy("default", settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD)
+        self.route_policies: List[Tuple[Pattern, RateLimitPolicy, bool]] = [
+            (re.compile(pattern), RateLimitPolicy("ai", settings.RATE_LIMIT_AI_REQUESTS, settings.RATE_LIMIT_AI_PERIOD), False)
+            for pattern in settings.RATE_LIMIT_AI_ROUTES
+        ] + [
+            # Auth routes are always keyed by IP - the caller has no token yet
+            (re.compile(pattern), RateLimitPolicy("auth", settings.RATE_LIMIT_AUTH_REQUESTS, settings.RATE_LIMIT_AUTH_PERIOD), True)
+            for pattern in settings.RATE_LIMIT_AUTH_ROUTES
+        ]
+        self.exempt_paths = set(settings.RATE_LIMIT_EXEMPT_PATHS)
+
+    def _policy(self, method: str, path: str) -> Tuple[RateLimitPolicy, bool]:
+        if method == "POST":
+            for pattern, policy, by_ip in self.route_policies:
+                if pattern.match(path):
+                    return policy, by_ip
+        return self.default_policy, False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        policy, by_ip = self._policy(scope["method"], scope["path"])
+        user_key, ip_key = _client_identity(scope)
+        key = f"{policy.name}:{ip_key if by_ip or user_key is None else user_key}"
+        try:
+            allowed, tat, now = await self.store.hit(key, policy)
+        except Exception as e:
+            # Fail open - a store outage should not take the API down with it
+            logger.warning("Rate limit check failed: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        decision = decide(policy, tat, now, allowed)
+        headers = [
+            (b"ratelimit-limit", str(decision.limit).encode("latin-1")),
+            (b"ratelimit-remaining", str(decision.remaining).encode("latin-1")),
+            (b"ratelimit-reset", str(math.ceil(decision.reset_after)).encode("latin-1")),
+            (b"ratelimit-policy", f"{policy.limit};w={int(policy.period)}".encode("latin-1")),
+        ]
+
+        if not decision.allowed:
+            body = json.dumps({"detail": "Rate limit exceeded"}).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(max(1, math.ceil(decision.retry_after))).encode("latin-1")),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,247 @@
+"""
+Request Profiler
+Admin-triggered sampling profiles (X-Profile: 1) in folded-stack format, and tracemalloc snapshots
+"""
+
+import asyncio
+import itertools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from core.principal_cache import Principal, principal_cache, token_identifier
+from core.security import security
+from models.database import User
+
+class RequestProfile:
+    __slots__ = ("profile_id", "method", "path", "started_at", "duration_ms", "samples", "stacks")
+
+    def __init__(self, profile_id: str, method: str, path: str):
+        self.profile_id = profile_id
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def folded(self) -> str:
+        """Folded stacks ("root;child;leaf count") for flamegraph.pl, speedscope or inferno"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples
+        }
+
+class StackSampler:
+    """Samples the loop thread while the profiled task is the one running; await time shows as <waiting>
+
+    Sync dependencies and handlers run in the threadpool and also show as <waiting>.
+    """
+
+    def __init__(self, profile: RequestProfile, task: asyncio.Task, interval: float):
+        self.profile = profile
+        self.task = task
+        self.interval = interval
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        deadline = time.monotonic() + settings.PROFILE_MAX_SECONDS
+        while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+            if asyncio.current_task(self._loop) is not self.task:
+                stack = "<waiting>"
+            else:
+                frame = sys._current_frames().get(self._thread_id)
+                stack = _fold(frame)
+                del frame
+            self.profile.stacks[stack] += 1
+            self.profile.samples += 1
+
+def _fold(frame) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({code.co_filename.rsplit('/', 2)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames)) or "<unknown>"
+
+class RequestProfiler:
+    """Keeps the last PROFILE_MAX_STORED profiles; one request is profiled at a time"""
+
+    def __init__(self):
+        self.profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._active = False
+
+    def begin(self, method: str, path: str) -> Optional[StackSampler]:
+        if self._active:
+            return None
+        self._active = True
+        profile = RequestProfile(f"{int(time.time())}-{next(self._ids)}", method, path)
+        sampler = StackSampler(profile, asyncio.current_task(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        sampler.start()
+        return sampler
+
+    def end(self, sampler: StackSampler, started: float):
+        sampler.stop()
+        sampler.profile.duration_ms = (time.perf_counter() - started) * 1000
+        self.profiles[sampler.profile.profile_id] = sampler.profile
+        while len(self.profiles) > settings.PROFILE_MAX_STORED:
+            self.profiles.popitem(last=False)
+        self._active = False
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self.profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.summary() for profile in reversed(self.profiles.values())]
+
+request_profiler = RequestProfiler()
+
+async def _is_admin_request(scope) -> bool:
+    authorization = None
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+
+    token = authorization[7:].strip()
+    user_data = security.get_user_from_token(token)
+    if not user_data or principal_cache.is_revoked(token_identifier(user_data.get("token_id"), token)):
+        return False
+    # The role comes from the database, as in get_current_user - never from the token's claim
+    principal = principal_cache.get(user_data["user_id"])
+    if principal is None:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(User.id, User.is_active, User.role).where(User.id == user_data["user_id"])
+            )
+            row = result.one_or_none()
+        if row is None:
+            return False
+        principal = Principal(row.id, bool(row.is_active), row.role)
+        principal_cache.put(principal)
+    return principal.is_active and principal.role == "admin"
+
+class ProfilingMiddleware:
+    """Profile a request when an admin sends X-Profile: 1 - otherwise a single header lookup"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(
+            name == b"x-profile" and value == b"1" for name, value in scope.get("headers", [])
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not await _is_admin_request(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = request_profiler.begin(scope["method"], scope["path"])
+        if sampler is None:
+            await self.app(scope, receive, _with_header(send, b"x-profile", b"busy"))
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _with_header(send, b"x-profile-id", sampler.profile.profile_id.encode("latin-1")))
+        finally:
+            request_profiler.end(sampler, started)
+
+def _with_header(send, name: bytes, value: bytes):
+    async def send_with_header(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": list(message.get("headers", [])) + [(name, value)]}
+        await send(message)
+    return send_with_header
+
+# tracemalloc snapshots
+class MemoryProfiler:
+    def __init__(self):
+        self.snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def start(self, frames: int) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        tracemalloc.stop()
+        self.snapshots.clear()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traceback_frames": tracemalloc.get_traceback_limit(),
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": list(self.snapshots)
+        }
+
+    async def take_snapshot(self) -> str:
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc is not running")
+        snapshot = await asyncio.to_thread(_filtered_snapshot)
+        snapshot_id = f"{int(time.time())}-{next(self._ids)}"
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > settings.PROFILE_MAX_STORED:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    async def diff(self, base_id: str, target_id: str, key_type: str, limit: int) -> List[Dict[str, Any]]:
+        base = self.snapshots.get(base_id)
+        target = self.snapshots.get(target_id)
+        if base is None or target is None:
+            raise KeyError(base_id if base is None else target_id)
+
+        stats = await asyncio.to_thread(target.compare_to, base, key_type)
+        return [
+            {
+                "location": str(stat.traceback[0]) if stat.traceback else "<unknown>",
+                "traceback": [str(frame) for frame in stat.traceback] if key_type == "traceback" else None,
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count
+            }
+            for stat in stats[:limit]
+        ]
+
+def _filtered_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+memory_profiler = MemoryProfiler()
@@ -3,18 +3,31 @@ Security Module
 JWT token management and password handling
 """
 
+import asyncio
 import bcrypt
 import jwt
 import hashlib
+import hmac
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from config.settings import settings
 
+class PasswordHashingBusy(Exception):
+    """Raised when too many password hashes are already queued"""
+
 class SecurityManager:
     def __init__(self):
         self.secret_key = settings.SECRET_KEY
         self.algorithm = settings.ALGORITHM
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        # bcrypt releases the GIL, so a small dedicated pool keeps it off the event loop
+        # without competing with the default executor used by asyncio.to_thread
+        self._hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+        self._pending_hashes = 0
     
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
@@ -24,25 +37,47 @@ class SecurityManager:
         return hashed.decode('utf-8')
     
     def verify_password(self, password: str, hashed_password: str) -> bool:
-        """Verify password against hash (supports both bcrypt and SHA-256)"""
+        """Verify password against hash (supports both bcrypt and legacy SHA-256)"""
         try:
-            # First try bcrypt
-            try:
-                password_bytes = password.encode('utf-8')
-                hashed_bytes = hashed_password.encode('utf-8')
-                return bcrypt.checkpw(password_bytes, hashed_bytes)
-            except Exception:
-                # If bcrypt fails, try SHA-256
+            if self.needs_rehash(hashed_password):
                 sha256_hash = hashlib.sha256(password.encode()).hexdigest()
-                return sha256_hash == hashed_password
+                return hmac.compare_digest(sha256_hash, hashed_password)
+            
+            password_bytes = password.encode('utf-8')
+            hashed_bytes = hashed_password.encode('utf-8')
+            return bcrypt.checkpw(password_bytes, hashed_bytes)
         except Exception:
             return False
     
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Legacy SHA-256 hashes should be replaced with bcrypt"""
+        return not hashed_password.startswith("$2")
+    
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password on the password hashing pool"""
+        return await self._run_hash(self.hash_password, password)
+    
+    async def verify_password_async(self, password: str, hashed_password: str) -> bool:
+        """Verify password on the password hashing pool"""
+        return await self._run_hash(self.verify_password, password, hashed_password)
+    
+    async def _run_hash(self, func, *args):
+        # Shed load instead of queueing unbounded work behind a burst of logins
+        if self._pending_hashes >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHashingBusy("Too many concurrent password checks")
+        
+        self._pending_hashes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._hash_executor, func, *args)
+        finally:
+            self._pending_hashes -= 1
+    
     def create_access_token(self, data: Dict[str, Any]) -> str:
         """Create JWT access token"""
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
-        to_encode.update({"exp": expire, "type": "access"})
+        to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
         
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
@@ -51,7 +86,7 @@ class SecurityManager:
         """Create JWT refresh token"""
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        to_encode.update({"exp": expire, "type": "refresh"})
+        to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
         
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
@@ -74,7 +109,9 @@ class SecurityManager:
                 "user_id": payload.get("user_id"),
                 "email": payload.get("email"),
                 "username": payload.get("username"),
-                "role": payload.get("role")
+                "role": payload.get("role"),
+                "token_id": payload.get("jti"),
+                "expires_at": payload.get("exp")
             }
         return None
 
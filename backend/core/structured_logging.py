@@ -0,0 +1,221 @@
+"""
+Structured Logging
+Queue-backed JSON logging with request ids, per-module levels, sampling and secret redaction
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Keys whose values never reach a log line, in "key=value", "key: value" and dict reprs
+SECRET_KEYS = (
+    "api_key_encrypted", "api_key", "apikey", "password_hash", "password", "secret_key",
+    "secret", "access_token", "refresh_token", "token", "authorization",
+)
+_SECRET_PATTERN = re.compile(
+    r"(?P<key>(?<!\w)['\"]?(?:%s)['\"]?\s*[:=]\s*)(?:Bearer\s+)?(?P<value>\"[^\"]*\"|'[^']*'|[^\s,}]+)"
+    % "|".join(SECRET_KEYS),
+    re.IGNORECASE
+)
+_BEARER_PATTERN = re.compile(r"Bearer\s+[A-Za-z0-9\-_\.=]+")
+
+def _mask(match: re.Match) -> str:
+    value = match.group("value")
+    quote = value[0] if value[0] in "'\"" else ""
+    return f"{match.group('key')}{quote}***{quote}"
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+def redact(text: str) -> str:
+    """Mask secret values in an already formatted message
+
+    >>> redact('{"password": "hunter 2", "user": "bob"}')
+    '{"password": "***", "user": "bob"}'
+    >>> redact("{'api_key': 'sk-1, 2', 'model': 'gpt'}")
+    "{'api_key': '***', 'model': 'gpt'}"
+    >>> redact("token=abc123 cache_token=1 secret: s3cr3t")
+    'token=*** cache_token=1 secret: ***'
+    >>> redact("Authorization: Bearer eyJ.x-y_z")
+    'Authorization: ***'
+    >>> redact("upstream rejected Bearer eyJ.x-y_z")
+    'upstream rejected Bearer ***'
+    """
+    text = _SECRET_PATTERN.sub(_mask, text)
+    return _BEARER_PATTERN.sub("Bearer ***", text)
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the request id of the calling context - runs on the caller's thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Let through at most `burst` records per call site per window, then count the rest"""
+
+    def __init__(self, burst: int, window: float):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Errors are never sampled
+        if record.levelno >= logging.ERROR:
+            return True
+
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._sites[site] = [now, 1, 0]
+                if suppressed:
+                    record.sampled_out = suppressed
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Resolve the message on the caller's thread; formatting and I/O happen on the writer thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        sampled_out = getattr(record, "sampled_out", None)
+        if sampled_out:
+            entry["sampled_out"] = sampled_out
+        if record.exc_text:
+            entry["exception"] = redact(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RedactingFormatter(logging.Formatter):
+    """Plain text format for local development, with the same redaction"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            text = f"{text} [request_id={request_id}]"
+        return redact(text)
+
+def configure_logging():
+    """Route every record through a queue to a background writer thread"""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if settings.LOG_JSON else RedactingFormatter(settings.LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_TO_FILE:
+        log_directory = Path(settings.LOG_DIRECTORY)
+        log_directory.mkdir(parents=True, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_directory / "backend.log", maxBytes=50 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_BURST, settings.LOG_SAMPLE_WINDOW_SECONDS))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+
+    # uvicorn installs its own stdout handlers; send its records through the queue as well
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class RequestIdMiddleware:
+    """ASGI middleware that binds X-Request-ID (incoming or generated) to the request's log records"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_id.reset(token)
@@ -0,0 +1,271 @@
+"""
+System Sampler
+Background CPU/memory/disk/process/database sampling into a ring buffer and compact append-only time series
+"""
+
+import asyncio
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields averaged (and maxed) when samples are rolled up into 1m and 1h points
+ROLLUP_FIELDS = (
+    "cpu_percent", "memory_percent", "memory_used", "disk_percent", "disk_used",
+    "process_rss", "process_cpu_percent", "process_threads", "db_size",
+)
+RESOLUTIONS = {"raw": 0, "1m": 60, "1h": 3600}
+
+IMPORTANT_PACKAGES = (
+    "fastapi", "sqlalchemy", "alembic", "uvicorn",
+    "pydantic", "python-jose", "passlib", "requests",
+)
+
+def _database_path() -> Optional[Path]:
+    url = settings.DATABASE_URL
+    if not url.startswith("sqlite:///"):
+        return None
+    return Path(url.replace("sqlite:///", "", 1))
+
+class Rollup:
+    """Accumulates samples of one time bucket and emits a single point when the bucket changes"""
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.bucket: Optional[int] = None
+        self.count = 0
+        self.sums: Dict[str, float] = {}
+        self.maxima: Dict[str, float] = {}
+
+    def add(self, sample: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        bucket = int(sample["ts"]) // self.seconds * self.seconds
+        point = self.flush() if self.bucket is not None and bucket != self.bucket else None
+        self.bucket = bucket
+        self.count += 1
+        for field in ROLLUP_FIELDS:
+            value = sample.get(field)
+            if value is None:
+                continue
+            self.sums[field] = self.sums.get(field, 0.0) + value
+            self.maxima[field] = max(self.maxima.get(field, value), value)
+        return point
+
+    def flush(self) -> Optional[Dict[str, Any]]:
+        if not self.count:
+            return None
+        point: Dict[str, Any] = {"ts": self.bucket, "n": self.count}
+        for field, total in self.sums.items():
+            point[field] = round(total / self.count, 2)
+            point[f"{field}_max"] = self.maxima[field]
+        self.bucket = None
+        self.count = 0
+        self.sums = {}
+        self.maxima = {}
+        return point
+
+class SystemSampler:
+    """Samples at SYSTEM_SAMPLE_INTERVAL_SECONDS; readers get the latest sample without touching psutil"""
+
+    def __init__(self, interval: float, buffer_size: int):
+        self.interval = interval
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.history: Dict[str, Deque[Dict[str, Any]]] = {
+            "1m": deque(maxlen=24 * 60),
+            "1h": deque(maxlen=30 * 24),
+        }
+        self._rollups = {name: Rollup(RESOLUTIONS[name]) for name in self.history}
+        self._task: Optional[asyncio.Task] = None
+        self._process = None
+        self._static: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        try:
+            import psutil
+        except ImportError:
+            logger.warning("psutil is not installed - system sampling disabled")
+            return
+        self._process = psutil.Process()
+        # cpu_percent(interval=None) measures since the previous call; prime both counters
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        self._task = asyncio.create_task(self._run(), name="system-sampler")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        points = {name: rollup.flush() for name, rollup in self._rollups.items()}
+        await asyncio.to_thread(self._persist, None, points)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.warning("System sample failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def sample(self) -> Dict[str, Any]:
+        """Collect one sample off the event loop, buffer it and append it to the time series"""
+        sample = await asyncio.to_thread(self._collect)
+        self.samples.append(sample)
+        points = {}
+        for name, rollup in self._rollups.items():
+            point = rollup.add(sample)
+            if point is not None:
+                self.history[name].append(point)
+                points[name] = point
+        if settings.SYSTEM_METRICS_PERSIST:
+            await asyncio.to_thread(self._persist, sample, points)
+        return sample
+
+    def _collect(self) -> Dict[str, Any]:
+        import psutil
+
+        if self._process is None:
+            self._process = psutil.Process()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(settings.SYSTEM_DISK_PATH)
+        with self._process.oneshot():
+            process_rss = self._process.memory_info().rss
+            process_cpu = self._process.cpu_percent(interval=None)
+            process_threads = self._process.num_threads()
+
+        sample = {
+            "ts": round(time.time(), 3),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "memory_total": memory.total,
+            "memory_available": memory.available,
+            "memory_used": memory.used,
+            "disk_percent": round(disk.used / disk.total * 100, 2) if disk.total else 0.0,
+            "disk_total": disk.total,
+            "disk_used": disk.used,
+            "disk_free": disk.free,
+            "process_rss": process_rss,
+            "process_cpu_percent": process_cpu,
+            "process_threads": process_threads,
+            "db_size": None,
+            "db_tables": None,
+            "db_connected": False,
+        }
+
+        db_path = _database_path()
+        if db_path is not None and db_path.exists():
+            try:
+                sample["db_size"] = db_path.stat().st_size
+                conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=1)
+                try:
+                    sample["db_tables"] = conn.execute(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE type='table'"
+                    ).fetchone()[0]
+                finally:
+                    conn.close()
+                sample["db_connected"] = True
+            except Exception as e:
+                logger.debug("Database sample failed: %s", e)
+        return sample
+
+    def _persist(self, sample: Optional[Dict[str, Any]], points: Dict[str, Optional[Dict[str, Any]]]):
+        """One compact JSON line per sample or rollup point - raw files per day, rollups per month"""
+        directory = Path(settings.SYSTEM_METRICS_DIRECTORY)
+        directory.mkdir(parents=True, exist_ok=True)
+        if sample is not None:
+            day = datetime.fromtimestamp(sample["ts"], tz=timezone.utc).strftime("%Y%m%d")
+            path = directory / f"system_metrics_raw_{day}.jsonl"
+            if not path.exists():
+                self._prune(directory)
+            self._append(path, sample)
+        for name, point in points.items():
+            if point is None:
+                continue
+            month = datetime.fromtimestamp(point["ts"], tz=timezone.utc).strftime("%Y%m")
+            self._append(directory / f"system_metrics_{name}_{month}.jsonl", point)
+
+    @staticmethod
+    def _append(path: Path, record: Dict[str, Any]):
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    @staticmethod
+    def _prune(directory: Path):
+        cutoff = time.time() - settings.SYSTEM_METRICS_RAW_RETENTION_DAYS * 86400
+        for path in directory.glob("system_metrics_raw_*.jsonl"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        return self.samples[-1] if self.samples else None
+
+    async def current(self) -> Dict[str, Any]:
+        """Latest sample, or a fresh one when the sampler is not running yet"""
+        sample = self.latest()
+        if sample is None or time.time() - sample["ts"] > self.interval * 3:
+            sample = await asyncio.to_thread(self._collect)
+            self.samples.append(sample)
+        return sample
+
+    def series(self, resolution: str, limit: int) -> List[Dict[str, Any]]:
+        points = self.samples if resolution == "raw" else self.history[resolution]
+        return list(points)[-limit:]
+
+    def static_info(self) -> Dict[str, Any]:
+        """Platform, Python and package versions - these don't change while the process runs"""
+        if self._static is None:
+            packages = []
+            for name in IMPORTANT_PACKAGES:
+                try:
+                    packages.append({"name": name, "version": metadata.version(name)})
+                except metadata.PackageNotFoundError:
+                    continue
+            self._static = {
+                "os": {
+                    "name": platform.system(),
+                    "version": platform.version(),
+                    "release": platform.release(),
+                    "machine": platform.machine(),
+                    "processor": platform.processor(),
+                },
+                "python": {
+                    "version": sys.version,
+                    "version_info": {
+                        "major": sys.version_info.major,
+                        "minor": sys.version_info.minor,
+                        "micro": sys.version_info.micro
+                    },
+                    "executable": sys.executable,
+                    "platform": sys.platform,
+                },
+                "cpu_cores": os.cpu_count(),
+                "packages": packages
+            }
+        return self._static
+
+# Global system sampler instance
+system_sampler = SystemSampler(settings.SYSTEM_SAMPLE_INTERVAL_SECONDS, settings.SYSTEM_SAMPLE_BUFFER_SIZE)
@@ -0,0 +1,347 @@
+"""
+Tracing
+Context-propagated spans for routes, services, SQL statements and provider calls
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = "internal"
+SPAN_KIND_SERVER = "server"
+SPAN_KIND_CLIENT = "client"
+
+# OTLP span kind numbers
+_OTLP_KINDS = {SPAN_KIND_INTERNAL: 1, SPAN_KIND_SERVER: 2, SPAN_KIND_CLIENT: 3}
+
+class Trace:
+    """Spans of one sampled trace, collected until the root span ends"""
+    __slots__ = ("trace_id", "spans", "root")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.root: Optional["Span"] = None
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], kind: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        if trace.root is None:
+            trace.root = self
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+        # Spans still open when the root ends (e.g. background work) are not exported
+        if self.trace.root is self:
+            tracer.finish(self.trace)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _OTLP_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}} for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+# None: no trace. False: inside a trace that was not sampled, so children are skipped too
+_current_span: ContextVar[Any] = ContextVar("current_span", default=None)
+
+class Tracer:
+    """Head-sampled tracer that keeps recent traces in memory and hands finished ones to an exporter"""
+
+    def __init__(self, sample_rate: float, recent_size: int):
+        self.sample_rate = sample_rate
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent_size)
+        self._export_queue: Optional["queue.SimpleQueue[Optional[Dict[str, Any]]]"] = None
+        self._exporter: Optional[threading.Thread] = None
+
+    def start_span(self, name: str, kind: str = SPAN_KIND_INTERNAL, trace_id: Optional[str] = None,
+                   parent_id: Optional[str] = None, sampled: Optional[bool] = None, **attributes) -> Optional[Span]:
+        """Start a span under the current one; returns None when the trace is not sampled"""
+        parent = _current_span.get()
+        if parent is False:
+            return None
+        if isinstance(parent, Span):
+            return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        return Span(Trace(trace_id or os.urandom(16).hex()), name, parent_id, kind, attributes)
+
+    def finish(self, trace: Trace):
+        root = trace.root
+        summary = {
+            "trace_id": trace.trace_id,
+            "name": root.name,
+            "start": root.start_ns / 1e9,
+            "duration_ms": round(root.duration_ms, 3),
+            "span_count": len(trace.spans),
+            "spans": [span.to_dict() for span in sorted(trace.spans, key=lambda span: span.start_ns)]
+        }
+        self.recent.append(summary)
+        if self._export_queue is not None:
+            self._export_queue.put({"resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{"scope": {"name": "agent-player"}, "spans": [span.to_otlp() for span in trace.spans]}]
+            }]})
+
+    def slowest(self, limit: int) -> List[Dict[str, Any]]:
+        return sorted(self.recent, key=lambda trace: trace["duration_ms"], reverse=True)[:limit]
+
+    def start_exporter(self):
+        """Write finished traces as OTLP/JSON - to a local file and, if configured, an OTLP/HTTP collector"""
+        if self._exporter is not None or not (settings.TRACE_EXPORT_FILE or settings.TRACE_OTLP_ENDPOINT):
+            return
+        self._export_queue = queue.SimpleQueue()
+        self._exporter = threading.Thread(target=self._run_exporter, name="trace-exporter", daemon=True)
+        self._exporter.start()
+
+    def stop_exporter(self):
+        if self._exporter is None:
+            return
+        self._export_queue.put(None)
+        self._exporter.join(timeout=5)
+        self._exporter = None
+        self._export_queue = None
+
+    def _run_exporter(self):
+        export_queue = self._export_queue
+        export_file = None
+        if settings.TRACE_EXPORT_FILE:
+            Path(settings.TRACE_EXPORT_FILE).parent.mkdir(parents=True, exist_ok=True)
+            export_file = open(settings.TRACE_EXPORT_FILE, "a", encoding="utf-8")
+        try:
+            while True:
+                payload = export_queue.get()
+                if payload is None:
+                    break
+                if export_file is not None:
+                    export_file.write(json.dumps(payload) + "\n")
+                    export_file.flush()
+                if settings.TRACE_OTLP_ENDPOINT:
+                    self._post_otlp(payload)
+        finally:
+            if export_file is not None:
+                export_file.close()
+
+    def _post_otlp(self, payload: Dict[str, Any]):
+        request = urllib.request.Request(
+            settings.TRACE_OTLP_ENDPOINT.rstrip("/") + "/v1/traces",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logger.warning("Trace export to %s failed: %s", settings.TRACE_OTLP_ENDPOINT, e)
+
+tracer = Tracer(settings.TRACE_SAMPLE_RATE, settings.TRACE_RECENT_SIZE)
+
+@contextmanager
+def start_span(name: str, kind: str = SPAN_KIND_INTERNAL, **attributes):
+    """Run a block inside a child span of the current trace"""
+    span = tracer.start_span(name, kind, **attributes)
+    token = _current_span.set(span if span is not None else (False if _current_span.get() is False else None))
+    try:
+        yield span
+    except BaseException as e:
+        if span is not None:
+            span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        if span is not None:
+            span.end()
+
+def traced(name: Optional[str] = None):
+    """Decorator that wraps a function (sync or async) in a span named after it"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    # Not inside a traced request - don't start new traces from service calls
+                    return await func(*args, **kwargs)
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with start_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if isinstance(span, Span) else None
+
+# SQL statements - spans are created without becoming the current span
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    span = None
+    if isinstance(parent, Span):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        span = Span(parent.trace, f"db {operation}", parent.span_id, SPAN_KIND_CLIENT,
+                    {"db.system": conn.dialect.name, "db.statement": statement[:500]})
+    conn.info.setdefault("trace_spans", []).append(span)
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        span = spans.pop()
+        if span is not None:
+            span.end()
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    spans = connection.info.get("trace_spans") if connection is not None else None
+    if spans:
+        span = spans.pop()
+        if span is not None:
+            span.record_error(exception_context.original_exception)
+            span.end()
+
+def instrument_engine(engine):
+    """Trace SQL statements on an engine (async engines use their sync_engine)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+_TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+def _parse_traceparent(value: str):
+    """W3C traceparent: version-traceid-parentid-flags; (None, None, None) starts a fresh trace"""
+    match = _TRACEPARENT.fullmatch(value.strip())
+    if match is None:
+        return None, None, None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None, None, None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+class TracingMiddleware:
+    """ASGI middleware that opens the root server span for each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = sampled = None
+        for header, value in scope.get("headers", []):
+            if header == b"traceparent":
+                trace_id, parent_id, sampled = _parse_traceparent(value.decode("latin-1"))
+                break
+
+        span = tracer.start_span(
+            f"{scope['method']} {scope['path']}", SPAN_KIND_SERVER,
+            trace_id=trace_id, parent_id=parent_id, sampled=sampled,
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        token = _current_span.set(span if span is not None else False)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start" and span is not None:
+                span.set_attribute("http.status_code", message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((b"traceparent", f"00-{span.trace_id}-{span.span_id}-01".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            if span is not None:
+                span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            if span is not None:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope['method']} {route}"
+                    span.set_attribute("http.route", route)
+                span.end()
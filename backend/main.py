@@ -3,87 +3,91 @@ FastAPI Main Application
 Agent Player Backend Server
 """
 
+import asyncio
+import importlib
 import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
-from sqlalchemy import text
-
-# Import routers
-from api.auth import endpoints as auth_endpoints
-from api.users import endpoints as users_endpoints
-from api.agents import endpoints as agents_endpoints
-from api.chat import endpoints as chat_endpoints
-from api.tasks import endpoints as task_endpoints
-from api.licensing import endpoints as licensing_endpoints
-from api.training_lab import endpoints as training_lab_endpoints
-from api.marketplace import endpoints as marketplace_endpoints
-from api.formbuilder import endpoints as formbuilder_endpoints
-from api.boards import endpoints as boards_endpoints
-from api.notifications import endpoints as notifications_endpoints
-from api.activity_logs import endpoints as activity_logs_endpoints
-from api.agent_capabilities import endpoints as agent_capabilities_endpoints
-from api.agent_performance import endpoints as agent_performance_endpoints
-from api.system_analytics import endpoints as system_analytics_endpoints
-from api.system_health import endpoints as system_health_endpoints
-from api.system_settings import endpoints as system_settings_endpoints
-from api.user_analytics import endpoints as user_analytics_endpoints
+from datetime import datetime
+
+# Routers: (module, prefix, tag). Modules are imported by include_routers, so routers
+# listed in settings.DISABLED_ROUTERS are never imported by the worker
+ROUTERS = [
+    ("api.auth.endpoints", "/auth", "Authentication"),
+    ("api.users.endpoints", "/users", "Users"),
+    ("api.agents.endpoints", "/agents", "Agents"),
+    ("api.chat.endpoints", "/chat", "Chat"),
+    ("api.tasks.endpoints", "/task/tasks", "Tasks"),
+    ("api.licensing.endpoints", "/license/licensing", "Licensing"),
+    ("api.training_lab.endpoints", "/training/training-lab", "Training Lab"),
+    ("api.marketplace.endpoints", "/market/marketplace", "Marketplace"),
+    ("api.formbuilder.endpoints", "/api/formbuilder", "Form Builder"),
+    ("api.boards.endpoints", "/api/boards", "Boards"),
+    ("api.notifications.endpoints", "/api/notifications", "Notifications"),
+    ("api.activity_logs.endpoints", "/api/activity-logs", "Activity Logs"),
+    ("api.agent_capabilities.endpoints", "/api/agent-capabilities", "Agent Capabilities"),
+    ("api.agent_performance.endpoints", "/api/agent-performance", "Agent Performance"),
+    ("api.system_analytics.endpoints", "/api/system-analytics", "System Analytics"),
+    ("api.system_health.endpoints", "/api/system-health", "System Health"),
+    ("api.system_settings.endpoints", "/api/system-settings", "System Settings"),
+    ("api.user_analytics.endpoints", "/api/user-analytics", "User Analytics"),
+    ("api.debug.endpoints", "/debug", "Debug"),
+]
 
 # Import database
-from models.database import Base
-from config.database import async_engine, AsyncSessionLocal  # FIXED: Import AsyncSessionLocal from config.database too
+from config.database import check_schema_version
+from config.settings import settings
+from core.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from core.structured_logging import RequestIdMiddleware, configure_logging
+from core import metrics
+from core.tracing import TracingMiddleware, tracer
+from core.rate_limit import RateLimitMiddleware
+from core.request_profiler import ProfilingMiddleware
+from core.system_sampler import system_sampler
+from core.job_queue import job_queue
+from services.board_sandbox import node_sandbox
+from services.board_triggers import trigger_scheduler
+from services.usage_service import usage_tracker
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging - records are written by a background thread, flushed at exit
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# ADDED: Database initialization function
-async def initialize_database():
-    """Initialize database and ensure all tables exist"""
-    try:
-        logger.info("🔧 Initializing database...")
-        
-        async with async_engine.begin() as conn:
-            # Create all tables
-            await conn.run_sync(Base.metadata.create_all)
-            
-            # Ensure messages table exists with correct schema
-            await conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    conversation_id INTEGER NOT NULL,
-                    content TEXT NOT NULL,
-                    message_role VARCHAR(50) NOT NULL,
-                    message_type VARCHAR(50) DEFAULT 'text',
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (conversation_id) REFERENCES conversations(id)
-                );
-            """))
-            
-            await conn.commit()
-            logger.info("✅ Database schema initialized")
-            
-    except Exception as schema_error:
-        logger.warning(f"Database schema warning: {schema_error}")
-
-    try:
-        async with async_engine.begin() as conn:
-            await conn.commit()
-            logger.info("✅ Database initialized successfully")
-            
-    except Exception as e:
-        logger.error(f"❌ Database initialization error: {e}")
-
 # Application lifespan manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting AI Agent Player Backend...")
-    await initialize_database()
+    await check_schema_version()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    tracer.start_exporter()
+    metrics_writer = None
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROCESS_DIR:
+        metrics_writer = asyncio.create_task(metrics.run_metrics_writer())
+    if settings.SYSTEM_SAMPLER_ENABLED:
+        system_sampler.start()
+    usage_tracker.start()
+    if settings.JOB_QUEUE_ENABLED:
+        job_queue.start()
+    if settings.BOARD_TRIGGERS_ENABLED:
+        trigger_scheduler.start()
     yield
     # Shutdown
     logger.info("🛑 Shutting down AI Agent Player Backend...")
+    await loop_monitor.stop()
+    await system_sampler.stop()
+    # Another worker takes over scheduling; running jobs go back to the queue and their usage is flushed
+    await trigger_scheduler.stop()
+    await job_queue.stop()
+    node_sandbox.shutdown()
+    await usage_tracker.stop()
+    if metrics_writer is not None:
+        metrics_writer.cancel()
+        metrics.remove_worker_metrics()
+    tracer.stop_exporter()
 
 # Create FastAPI application with lifespan
 app = FastAPI(
@@ -93,6 +97,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-user/IP request budgets - inside CORS so 429 responses still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -102,25 +110,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query stats when query profiling is enabled
+if settings.QUERY_PROFILING:
+    from core.query_profiler import QueryProfilerMiddleware
+    
+    app.add_middleware(QueryProfilerMiddleware, expose_headers=settings.QUERY_PROFILE_HEADERS)
+
+# Attribute event loop stalls to routes
+if settings.LOOP_MONITOR_ENABLED or settings.LOOP_LAG_FAIL_MS:
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor, fail_ms=settings.LOOP_LAG_FAIL_MS)
+
+# Admin-triggered request profiling (X-Profile: 1)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Request latency, in-flight and WebSocket metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Root span per request - inner spans come from services, SQL and provider calls
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Request ids on log records and responses - added last so it wraps every other middleware
+app.add_middleware(RequestIdMiddleware)
+
 # Include API routers
-app.include_router(auth_endpoints.router, prefix="/auth", tags=["Authentication"])
-app.include_router(users_endpoints.router, prefix="/users", tags=["Users"])
-app.include_router(agents_endpoints.router, prefix="/agents", tags=["Agents"])
-app.include_router(chat_endpoints.router, prefix="/chat", tags=["Chat"])
-app.include_router(task_endpoints.router, prefix="/task/tasks", tags=["Tasks"])
-app.include_router(licensing_endpoints.router, prefix="/license/licensing", tags=["Licensing"])
-app.include_router(training_lab_endpoints.router, prefix="/training/training-lab", tags=["Training Lab"])
-app.include_router(marketplace_endpoints.router, prefix="/market/marketplace", tags=["Marketplace"])
-app.include_router(formbuilder_endpoints.router, prefix="/api/formbuilder", tags=["Form Builder"])
-app.include_router(boards_endpoints.router, prefix="/api/boards", tags=["Boards"])
-app.include_router(notifications_endpoints.router, prefix="/api/notifications", tags=["Notifications"])
-app.include_router(activity_logs_endpoints.router, prefix="/api/activity-logs", tags=["Activity Logs"])
-app.include_router(agent_capabilities_endpoints.router, prefix="/api/agent-capabilities", tags=["Agent Capabilities"])
-app.include_router(agent_performance_endpoints.router, prefix="/api/agent-performance", tags=["Agent Performance"])
-app.include_router(system_analytics_endpoints.router, prefix="/api/system-analytics", tags=["System Analytics"])
-app.include_router(system_health_endpoints.router, prefix="/api/system-health", tags=["System Health"])
-app.include_router(system_settings_endpoints.router, prefix="/api/system-settings", tags=["System Settings"])
-app.include_router(user_analytics_endpoints.router, prefix="/api/user-analytics", tags=["User Analytics"])
+def include_routers(app: FastAPI):
+    """Import and mount every enabled router"""
+    for module_name, prefix, tag in ROUTERS:
+        if module_name.split(".")[1] in settings.DISABLED_ROUTERS:
+            continue
+        module = importlib.import_module(module_name)
+        app.include_router(module.router, prefix=prefix, tags=[tag])
+
+include_routers(app)
 
 # Health check endpoint
 @app.get("/health")
@@ -143,6 +167,14 @@ async def system_status():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text format metrics"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
 # Root endpoint
 @app.get("/")
 async def root():
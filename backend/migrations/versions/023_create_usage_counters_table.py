@@ -0,0 +1,38 @@
+"""Create usage_counters table
+
+Revision ID: 023_create_usage_counters
+Revises: 022_fix_messages_column
+Create Date: 2025-07-28 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '023_create_usage_counters'
+down_revision = '022_fix_messages_column'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Per-user and per-agent daily/monthly token and cost totals"""
+    op.create_table('usage_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=10), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cost', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('requests', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'scope_id', 'period', name='uq_usage_counters_scope_period')
+    )
+    op.create_index(op.f('ix_usage_counters_id'), 'usage_counters', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_usage_counters_id'), table_name='usage_counters')
+    op.drop_table('usage_counters')
@@ -0,0 +1,45 @@
+"""Create jobs table
+
+Revision ID: 024_create_jobs
+Revises: 023_create_usage_counters
+Create Date: 2025-07-29 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '024_create_jobs'
+down_revision = '023_create_usage_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Durable background job queue"""
+    op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('queue', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_jobs_queue'), 'jobs', ['queue'], unique=False)
+    # Claim query: next queued job per queue by available_at
+    op.create_index('ix_jobs_status_available_at', 'jobs', ['status', 'available_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_available_at', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_queue'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
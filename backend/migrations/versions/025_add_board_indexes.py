@@ -0,0 +1,31 @@
+"""Add board listing and graph loading indexes
+
+Revision ID: 025_add_board_indexes
+Revises: 024_create_jobs
+Create Date: 2025-07-30 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '025_add_board_indexes'
+down_revision = '024_create_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Keyset pagination of boards, per-board node/connection loads and recent executions"""
+    op.create_index('ix_boards_updated_at_id', 'boards', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_boards_user_id_updated_at', 'boards', ['user_id', 'updated_at'], unique=False)
+    op.create_index(op.f('ix_board_nodes_board_id'), 'board_nodes', ['board_id'], unique=False)
+    op.create_index(op.f('ix_board_connections_board_id'), 'board_connections', ['board_id'], unique=False)
+    op.create_index('ix_board_executions_board_id_created_at', 'board_executions', ['board_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_board_executions_board_id_created_at', table_name='board_executions')
+    op.drop_index(op.f('ix_board_connections_board_id'), table_name='board_connections')
+    op.drop_index(op.f('ix_board_nodes_board_id'), table_name='board_nodes')
+    op.drop_index('ix_boards_user_id_updated_at', table_name='boards')
+    op.drop_index('ix_boards_updated_at_id', table_name='boards')
@@ -0,0 +1,26 @@
+"""Add board version column
+
+Revision ID: 026_add_board_version
+Revises: 025_add_board_indexes
+Create Date: 2025-07-31 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '026_add_board_version'
+down_revision = '025_add_board_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Version of a board's graph - compiled graphs are cached per (board_id, version)"""
+    with op.batch_alter_table('boards') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('boards') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,38 @@
+"""Create board revisions table
+
+Revision ID: 027_create_board_revisions
+Revises: 026_add_board_version
+Create Date: 2025-08-01 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '027_create_board_revisions'
+down_revision = '026_add_board_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """board_data history - JSON-patch deltas against periodic full snapshots"""
+    op.create_table('board_revisions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('board_id', sa.String(length=36), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_board_revisions_board_id_revision', 'board_revisions', ['board_id', 'revision'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_board_revisions_board_id_revision', table_name='board_revisions')
+    op.drop_table('board_revisions')
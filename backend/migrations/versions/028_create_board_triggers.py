@@ -0,0 +1,59 @@
+"""Create board triggers and leases tables
+
+Revision ID: 028_create_board_triggers
+Revises: 027_create_board_revisions
+Create Date: 2025-08-04 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '028_create_board_triggers'
+down_revision = '027_create_board_revisions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Cron and event triggers for boards, and the lease that elects the scheduling worker"""
+    op.create_table('board_triggers',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('board_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=True),
+        sa.Column('trigger_type', sa.String(length=20), nullable=False),
+        sa.Column('cron_expression', sa.String(length=100), nullable=True),
+        sa.Column('event', sa.String(length=50), nullable=True),
+        sa.Column('filter', sa.JSON(), nullable=True),
+        sa.Column('input_data', sa.JSON(), nullable=True),
+        sa.Column('catch_up', sa.String(length=10), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(), nullable=True),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.Column('run_count', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_board_triggers_board_id', 'board_triggers', ['board_id'])
+    op.create_index('ix_board_triggers_schedule', 'board_triggers', ['trigger_type', 'is_active', 'next_run_at'])
+    op.create_index('ix_board_triggers_event', 'board_triggers', ['event', 'user_id', 'is_active'])
+
+    op.create_table('leases',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('holder', sa.String(length=100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('leases')
+    op.drop_index('ix_board_triggers_event', table_name='board_triggers')
+    op.drop_index('ix_board_triggers_schedule', table_name='board_triggers')
+    op.drop_index('ix_board_triggers_board_id', table_name='board_triggers')
+    op.drop_table('board_triggers')
@@ -19,6 +19,8 @@ from .database import (
     BoardNode,
     BoardConnection,
     BoardExecution,
+    BoardRevision,
+    BoardTrigger,
     BoardTemplate
 )
 __all__ = [
@@ -37,6 +39,8 @@ __all__ = [
     'BoardNode',
     'BoardConnection',
     'BoardExecution',
+    'BoardRevision',
+    'BoardTrigger',
     'BoardTemplate'
 ]
 
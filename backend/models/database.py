@@ -4,7 +4,7 @@ Base SQLAlchemy model and common database utilities
 """
 
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Enum as SQLEnum, MetaData, text, Column, Text
+from sqlalchemy import String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Enum as SQLEnum, MetaData, text, Column, Text, UniqueConstraint, Index
 from datetime import datetime
 import enum
 from sqlalchemy.sql import func
@@ -249,6 +249,11 @@ class ChatSessionHistory(Base):
 class Board(Base):
     """Board model - represents a visual workflow board"""
     __tablename__ = "boards"
+    __table_args__ = (
+        # Keyset pagination of board lists: newest change first
+        Index("ix_boards_updated_at_id", "updated_at", "id"),
+        Index("ix_boards_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(String(36), primary_key=True)
     name = Column(String(200), nullable=False)
@@ -268,6 +273,7 @@ class Board(Base):
     is_executable = Column(Boolean, default=False, nullable=False)
     execution_count = Column(Integer, default=0, nullable=False)
     last_execution = Column(DateTime, nullable=True)
+    version = Column(Integer, default=1, nullable=False)  # bumped on every node, connection or board_data change
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -282,7 +288,7 @@ class BoardNode(Base):
     __tablename__ = "board_nodes"
 
     id = Column(String(36), primary_key=True)
-    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False, index=True)
     node_type = Column(String(50), nullable=False)
     label = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
@@ -312,7 +318,7 @@ class BoardConnection(Base):
     __tablename__ = "board_connections"
 
     id = Column(String(36), primary_key=True)
-    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False, index=True)
     source_node_id = Column(String(36), ForeignKey("board_nodes.id", ondelete="CASCADE"), nullable=False)
     target_node_id = Column(String(36), ForeignKey("board_nodes.id", ondelete="CASCADE"), nullable=False)
     source_port = Column(String(50), nullable=True)
@@ -335,6 +341,7 @@ class BoardConnection(Base):
 class BoardExecution(Base):
     """Board execution model - tracks workflow executions"""
     __tablename__ = "board_executions"
+    __table_args__ = (Index("ix_board_executions_board_id_created_at", "board_id", "created_at"),)
 
     id = Column(String(36), primary_key=True)
     board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
@@ -358,6 +365,46 @@ class BoardExecution(Base):
     board = relationship("Board", back_populates="executions")
     user = relationship("User", back_populates="board_executions")
 
+class BoardRevision(Base):
+    """Board revision model - board_data history as periodic snapshots and JSON-patch deltas"""
+    __tablename__ = "board_revisions"
+    __table_args__ = (Index("ix_board_revisions_board_id_revision", "board_id", "revision", unique=True),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)  # Board.version after the change
+    kind = Column(String(10), nullable=False)  # snapshot (data is board_data) or delta (data is a JSON patch)
+    data = Column(JSON, nullable=False)
+    size = Column(Integer, nullable=False)  # bytes of data as JSON
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class BoardTrigger(Base):
+    """Board trigger model - runs a board on a cron schedule or when an event happens"""
+    __tablename__ = "board_triggers"
+    __table_args__ = (
+        Index("ix_board_triggers_schedule", "trigger_type", "is_active", "next_run_at"),
+        Index("ix_board_triggers_event", "event", "user_id", "is_active"),
+    )
+
+    id = Column(String(36), primary_key=True)
+    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String(200), nullable=True)
+    trigger_type = Column(String(20), nullable=False)  # cron or event
+    cron_expression = Column(String(100), nullable=True)  # 5 fields, UTC
+    event = Column(String(50), nullable=True)  # chat_message, form_submission, notification
+    filter = Column(JSON, nullable=True)  # Condition on the event payload, same format as connection conditions
+    input_data = Column(JSON, nullable=True)
+    catch_up = Column(String(10), default="once", nullable=False)  # Missed cron runs: skip, once or all
+    is_active = Column(Boolean, default=True, nullable=False)
+    next_run_at = Column(DateTime, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
+    run_count = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
 class BoardTemplate(Base):
     """Board template model - predefined board templates"""
     __tablename__ = "board_templates"
@@ -449,4 +496,45 @@ class SystemSettings(Base):
     default_value = Column(Text, nullable=True)
     updated_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False) 
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class UsageCounter(Base):
+    """Token and cost totals per user or agent for one day or month - written in batches by the usage tracker"""
+    __tablename__ = "usage_counters"
+    __table_args__ = (UniqueConstraint("scope", "scope_id", "period", name="uq_usage_counters_scope_period"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(10), nullable=False)  # user, agent
+    scope_id = Column(Integer, nullable=False)
+    period = Column(String(10), nullable=False)  # 2025-07-21 (day) or 2025-07 (month), UTC
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    cost = Column(Float, default=0.0, nullable=False)  # USD
+    requests = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class Job(Base):
+    """Durable background job - claimed by workers with a renewable lease, retried with backoff"""
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_available_at", "status", "available_at"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String(50), nullable=False, index=True)  # Handler name, e.g. board_execution
+    payload = Column(JSON, nullable=True)
+    status = Column(String(20), default="queued", nullable=False)  # queued, running, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Not claimed before this (retry backoff)
+    locked_by = Column(String(100), nullable=True)  # Worker holding the lease
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+
+class Lease(Base):
+    """Named lock held by one process until it expires - the holder keeps renewing it"""
+    __tablename__ = "leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
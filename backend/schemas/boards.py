@@ -24,6 +24,11 @@ class BoardUpdate(BaseModel):
     is_public: Optional[bool] = Field(None, description="Whether board is public")
 
 
+class BoardPatchRequest(BaseModel):
+    operations: List[Dict[str, Any]] = Field(..., min_length=1, description="JSON Patch (RFC 6902) operations on board_data")
+    base_version: Optional[int] = Field(None, description="Board version the operations were made against")
+
+
 class BoardResponse(BaseModel):
     success: bool = True
     message: Optional[str] = None
@@ -45,6 +50,7 @@ class BoardExecutionRequest(BaseModel):
     input_data: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Input data for execution")
     execution_mode: Optional[str] = Field("normal", description="Execution mode (normal, debug, test)")
     timeout: Optional[int] = Field(300, description="Execution timeout in seconds")
+    use_cache: Optional[bool] = Field(True, description="Reuse results of nodes unchanged since an earlier run")
 
 
 class BoardExecutionResponse(BaseModel):
@@ -132,6 +138,39 @@ class BoardTemplateListResponse(BaseModel):
     data: Dict[str, Any]
 
 
+class BoardFromTemplateRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200, description="Name of the new board")
+    description: Optional[str] = Field(None, max_length=1000, description="Board description (defaults to the template's)")
+
+
+# Board Trigger Schemas
+class BoardTriggerCreate(BaseModel):
+    name: Optional[str] = Field(None, max_length=200, description="Trigger name")
+    trigger_type: str = Field(..., description="Trigger type (cron, event)")
+    cron_expression: Optional[str] = Field(None, max_length=100, description="Cron schedule in UTC, e.g. '*/15 * * * *'")
+    event: Optional[str] = Field(None, description="Event (chat_message, form_submission, notification)")
+    filter: Optional[Dict[str, Any]] = Field(None, description="Condition the event payload must match")
+    input_data: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Input data for each run")
+    catch_up: str = Field("once", description="Missed cron runs (skip, once, all)")
+    is_active: bool = Field(True, description="Whether the trigger fires")
+
+
+class BoardTriggerUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=200, description="Trigger name")
+    cron_expression: Optional[str] = Field(None, max_length=100, description="Cron schedule in UTC")
+    event: Optional[str] = Field(None, description="Event (chat_message, form_submission, notification)")
+    filter: Optional[Dict[str, Any]] = Field(None, description="Condition the event payload must match")
+    input_data: Optional[Dict[str, Any]] = Field(None, description="Input data for each run")
+    catch_up: Optional[str] = Field(None, description="Missed cron runs (skip, once, all)")
+    is_active: Optional[bool] = Field(None, description="Whether the trigger fires")
+
+
+class BoardTriggerResponse(BaseModel):
+    success: bool = True
+    message: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
 # Complex Board Operations
 class BoardImportRequest(BaseModel):
     template_id: Optional[int] = Field(None, description="Template ID to import from")
@@ -13,21 +13,37 @@ from datetime import datetime
 from fastapi import HTTPException
 import logging
 from sqlalchemy.sql import text
+from config.database import read_only
+from core.lazy_imports import load_module
+from core.cache import cached, invalidate
+from core.metrics import record_llm_call
+from core.tracing import SPAN_KIND_CLIENT, start_span, traced
+from services.usage_service import QuotaExceeded, usage_tracker
+from services.board_node_cache import node_results
+
+# Create logger
+logger = logging.getLogger(__name__)
 
 class AgentService:
     """Agent management service"""
     
+    @traced()
     async def get_all_agents(self, db: AsyncSession) -> List[Dict[str, Any]]:
         """Get all agents"""
         try:
-            query = select(Agent).where(Agent.is_active == True).order_by(Agent.created_at.desc())
-            result = await db.execute(query)
-            agents = result.scalars().all()
-            return [self._agent_to_dict(agent) for agent in agents]
+            return await self._load_all_agents(db)
         except Exception as e:
             logging.error(f"Error getting all agents: {e}")
             return []
     
+    # Errors propagate out of cached loaders so a failed query is never cached as a result
+    @cached(tags=("agents",))
+    async def _load_all_agents(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        query = select(Agent).where(Agent.is_active == True).order_by(Agent.created_at.desc())
+        result = await db.execute(query)
+        agents = result.scalars().all()
+        return [self._agent_to_dict(agent) for agent in agents]
+    
     async def get_main_agents(self, db: AsyncSession) -> List[Dict[str, Any]]:
         """Get main agents only"""
         try:
@@ -54,6 +70,7 @@ class AgentService:
             logging.error(f"Error getting child agents: {e}")
             return []
     
+    @traced()
     async def get_agent_by_id(self, db: AsyncSession, agent_id: int) -> Optional[Dict[str, Any]]:
         """Get specific agent by ID"""
         try:
@@ -67,6 +84,12 @@ class AgentService:
             logging.error(f"Error getting agent by ID {agent_id}: {e}")
             return None
     
+    async def _invalidate_agent_caches(self, agent_id: Optional[int] = None):
+        """Drop cached agent lists and statistics after a write, and board node results of a changed agent"""
+        await invalidate("agents")
+        if agent_id is not None:
+            await node_results.invalidate_tags(f"agent:{agent_id}")
+    
     def _validate_openai_key(self, api_key: str) -> bool:
         """Validate OpenAI API key by format check"""
         if not api_key or not api_key.strip():
@@ -83,6 +106,7 @@ class AgentService:
         # Just check format
         return len(api_key) >= 20
     
+    @traced()
     async def create_agent(self, db: AsyncSession, name: str, description: str, agent_type: str,
                     model_provider: str, model_name: str, system_prompt: str,
                     temperature: float, max_tokens: int, api_key: str,
@@ -123,6 +147,7 @@ class AgentService:
             db.add(new_agent)
             await db.commit()
             await db.refresh(new_agent)
+            await self._invalidate_agent_caches()
             return new_agent.id
             
         except Exception as e:
@@ -130,6 +155,7 @@ class AgentService:
             logging.error(f"Error creating agent: {e}")
             raise Exception(f"Agent creation failed: {str(e)}")
     
+    @traced()
     async def update_agent(self, db: AsyncSession, agent_id: int, updates: Dict[str, Any]) -> bool:
         """Update existing agent"""
         try:
@@ -152,6 +178,7 @@ class AgentService:
                     
             agent.updated_at = datetime.utcnow()
             await db.commit()
+            await self._invalidate_agent_caches(agent_id)
             return True
             
         except Exception as e:
@@ -159,6 +186,7 @@ class AgentService:
             logging.error(f"Error updating agent {agent_id}: {e}")
             return False
     
+    @traced()
     async def delete_agent(self, db: AsyncSession, agent_id: int) -> bool:
         """Delete agent (soft delete)"""
         try:
@@ -168,14 +196,17 @@ class AgentService:
             )
             result = await db.execute(query)
             await db.commit()
+            await self._invalidate_agent_caches(agent_id=agent_id)
             return result.rowcount > 0
         except Exception as e:
             await db.rollback()
             logging.error(f"Error deleting agent {agent_id}: {e}")
             return False
     
-    async def test_agent(self, db: AsyncSession, agent_id: int, test_message: str) -> Dict[str, Any]:
-        """Test agent with a message using real API calls"""
+    @traced()
+    async def test_agent(self, db: AsyncSession, agent_id: int, test_message: str,
+                         user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Test agent with a message using real API calls - usage is counted against user_id and the agent"""
         start_time = time.time()
         
         try:
@@ -190,20 +221,24 @@ class AgentService:
             
             # ✅ IMPROVED: Check model provider first, then validate API key only if needed
             model_provider = agent.get("model_provider", "").lower()
-            logging.info(f"🔍 TESTING AGENT - ID: {agent.get('id')}, Provider: '{model_provider}', Original: '{agent.get('model_provider')}'")
-            logging.info(f"🔍 Agent Details - Name: '{agent.get('name')}', Model: '{agent.get('model_name')}', Endpoint: '{agent.get('api_endpoint')}'")
-            
-            # Local providers that don't need API keys
-            local_providers = ["ollama", "lmstudio", "textgen", "localai", "llamafile", "jan", "vllm", "llamacppserver"]
+            logger.debug(
+                "Testing agent %s (%s) provider=%r model=%r endpoint=%r",
+                agent.get("id"), agent.get("name"), model_provider, agent.get("model_name"), agent.get("api_endpoint")
+            )
             
-            logging.warning(f"🔍 DEBUG: provider='{model_provider}', in_local_list={model_provider in local_providers}")
-            logging.warning(f"🔍 DEBUG: All agent keys: {list(agent.keys())}")
-            logging.warning(f"🔍 DEBUG: model_provider exact: '{agent.get('model_provider')}'")
+            # Token and cost budgets are checked before any provider call
+            try:
+                await usage_tracker.check(user_id, agent_id)
+            except QuotaExceeded as e:
+                return {
+                    "status": "error",
+                    "message": str(e),
+                    "error": "quota_exceeded",
+                    "quota": e.to_dict()
+                }
             
             # Handle specific providers with proper logic flow
-            logging.warning(f"🔀 ENTERING PROVIDER LOGIC - provider: '{model_provider}'")
             if model_provider == "openai":
-                logging.warning(f"🟦 ENTERING OPENAI SECTION")
                 # Only validate API key for OpenAI
                 api_key = agent.get("api_key_encrypted")
                 if not api_key or not self._validate_openai_key(api_key):
@@ -215,11 +250,11 @@ class AgentService:
                 
                 # Make real OpenAI API call
                 try:
-                    from openai import OpenAI
-                    import json
+                    # Imported once, off the event loop, on the first OpenAI call
+                    openai = await load_module("openai")
                     
                     # Create OpenAI client with API key
-                    client = OpenAI(api_key=api_key)
+                    client = openai.OpenAI(api_key=api_key)
                     
                     # Prepare the messages for OpenAI
                     messages = []
@@ -233,19 +268,28 @@ class AgentService:
                     messages.append({"role": "user", "content": test_message})
                     
                     # Make the API call using new v1+ format
-                    response = client.chat.completions.create(
-                        model=agent.get("model_name", "gpt-3.5-turbo"),
-                        messages=messages,
-                        temperature=agent.get("temperature", 0.7),
-                        max_tokens=min(agent.get("max_tokens", 1000), 4000),
-                        top_p=agent.get("top_p", 1.0),
-                        frequency_penalty=agent.get("frequency_penalty", 0.0),
-                        presence_penalty=agent.get("presence_penalty", 0.0)
-                    )
+                    llm_started = time.perf_counter()
+                    with start_span("openai.chat.completions", SPAN_KIND_CLIENT, **{"llm.model": agent.get("model_name")}):
+                        response = client.chat.completions.create(
+                            model=agent.get("model_name", "gpt-3.5-turbo"),
+                            messages=messages,
+                            temperature=agent.get("temperature", 0.7),
+                            max_tokens=min(agent.get("max_tokens", 1000), 4000),
+                            top_p=agent.get("top_p", 1.0),
+                            frequency_penalty=agent.get("frequency_penalty", 0.0),
+                            presence_penalty=agent.get("presence_penalty", 0.0)
+                        )
                     
                     # Extract the response
                     ai_response = response.choices[0].message.content
                     usage = response.usage
+                    record_llm_call(
+                        "openai", agent.get("model_name"), llm_started,
+                        prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens
+                    )
+                    cost = usage_tracker.record(
+                        user_id, agent_id, "openai", agent.get("model_name"), usage.prompt_tokens, usage.completion_tokens
+                    )
                     
                     response_time = round(time.time() - start_time, 3)
                     
@@ -269,7 +313,7 @@ class AgentService:
                             "tokens_used": usage.total_tokens,
                             "prompt_tokens": usage.prompt_tokens,
                             "completion_tokens": usage.completion_tokens,
-                            "cost_estimate": usage.total_tokens * 0.00002,  # Rough estimate
+                            "cost_estimate": cost,
                             "success": True
                         },
                         "performance": {
@@ -297,9 +341,6 @@ class AgentService:
             
             # For Ollama local models
             elif model_provider == "ollama":
-                logging.warning(f"🦙🔥 OLLAMA SECTION ENTERED! - Agent ID: {agent.get('id')}, Name: {agent.get('name')}")
-                logging.warning(f"🦙🔥 Provider: '{agent.get('model_provider')}', Model: '{agent.get('model_name')}'")
-                logging.warning(f"🦙🔥 Endpoint: '{agent.get('api_endpoint')}'")
                 try:
                     import requests
                     import json
@@ -340,34 +381,44 @@ class AgentService:
                     }
                     
                     # Make request to Ollama using OpenAI-compatible endpoint
-                    logging.warning(f"🔗 OLLAMA REQUEST URL: {full_url}")
-                    logging.warning(f"📤 OLLAMA PAYLOAD: {payload}")
+                    logger.debug("Ollama request to %s: %s", full_url, payload)
                     
-                    response = requests.post(
-                        full_url,
-                        json=payload,
-                        timeout=30
-                    )
+                    llm_started = time.perf_counter()
+                    with start_span("ollama.chat", SPAN_KIND_CLIENT, **{"llm.model": agent.get("model_name"), "http.url": full_url}) as span:
+                        response = requests.post(
+                            full_url,
+                            json=payload,
+                            timeout=30
+                        )
+                        if span is not None:
+                            span.set_attribute("http.status_code", response.status_code)
                     
-                    logging.warning(f"📊 OLLAMA RESPONSE STATUS: {response.status_code}")
                     if response.status_code != 200:
-                        logging.error(f"❌ OLLAMA ERROR RESPONSE: {response.text}")
+                        record_llm_call("ollama", agent.get("model_name"), llm_started, status="error")
+                        logger.error("Ollama returned %s: %s", response.status_code, response.text[:1000])
                     else:
-                        logging.warning(f"✅ OLLAMA SUCCESS RESPONSE LENGTH: {len(response.text)} chars")
+                        logger.debug("Ollama returned %s chars", len(response.text))
                     
                     if response.status_code == 200:
                         data = response.json()
-                        logging.info(f"✅ OLLAMA RESPONSE SUCCESS - Status: 200")
-                        logging.info(f"✅ Raw response keys: {list(data.keys())}")
                         # Handle OpenAI-compatible response format
                         if "choices" in data and len(data["choices"]) > 0:
                             ai_response = data["choices"][0]["message"]["content"]
-                            logging.info(f"✅ Using OpenAI format response: {ai_response[:100]}...")
                         else:
                             # Fallback to old format
                             ai_response = data.get("message", {}).get("content", "No response from Ollama")
-                            logging.warning(f"⚠️ Using fallback format response: {ai_response[:100]}...")
+                            logger.debug("Ollama response had no choices, used the message field")
                         
+                        usage = data.get("usage", {})
+                        record_llm_call(
+                            "ollama", agent.get("model_name"), llm_started,
+                            prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0)
+                        )
+                        cost = usage_tracker.record(
+                            user_id, agent_id, "ollama", agent.get("model_name"),
+                            usage.get("prompt_tokens", len(test_message.split())),
+                            usage.get("completion_tokens", len(ai_response.split()))
+                        )
                         response_time = round(time.time() - start_time, 3)
                         
                         return {
@@ -391,7 +442,7 @@ class AgentService:
                                 "tokens_used": data.get("usage", {}).get("total_tokens", len(test_message.split()) + len(ai_response.split())),
                                 "prompt_tokens": data.get("usage", {}).get("prompt_tokens", len(test_message.split())),
                                 "completion_tokens": data.get("usage", {}).get("completion_tokens", len(ai_response.split())),
-                                "cost_estimate": 0.0,  # Ollama is free
+                                "cost_estimate": cost,
                                 "success": True,
                                 "model_info": data.get("model", ""),
                                 "done_reason": data.get("done_reason", "")
@@ -413,9 +464,7 @@ class AgentService:
                         }
                         
                 except Exception as ollama_error:
-                    logging.error(f"❌ OLLAMA API ERROR: {ollama_error}")
-                    logging.error(f"❌ Endpoint: {full_url}")
-                    logging.error(f"❌ Model: {agent.get('model_name')}")
+                    logger.error("Ollama request to %s for model %r failed: %s", full_url, agent.get("model_name"), ollama_error)
                     return {
                         "status": "error",
                         "message": f"Ollama connection error: {str(ollama_error)}",
@@ -424,10 +473,7 @@ class AgentService:
                     }
             
             # For non-OpenAI providers, use mock responses
-            logging.error(f"🚨 CRITICAL: FALLING BACK TO MOCK RESPONSE for provider: '{model_provider}'")
-            logging.error(f"🚨 This means Ollama section was NOT reached - check why!")
-            logging.error(f"🚨 agent.get('model_provider') = '{agent.get('model_provider')}'")
-            logging.error(f"🚨 model_provider variable = '{model_provider}'")
+            logger.info("No live client for provider %r, returning a mock test response", model_provider)
             response_time = round(time.time() - start_time, 3)
             
             # Generate appropriate mock response
@@ -458,7 +504,7 @@ class AgentService:
                     "response_time": f"{response_time}s",
                     "timestamp": datetime.now().isoformat(),
                     "tokens_used": len(test_message.split()) + len(agent_response.split()),
-                    "cost_estimate": 0.002,
+                    "cost_estimate": 0.0,  # No provider was called
                     "success": True
                 },
                 "performance": {
@@ -477,23 +523,11 @@ class AgentService:
                 "error": str(e)
             }
     
+    @traced()
     async def get_agent_statistics(self, db: AsyncSession) -> Dict[str, Any]:
         """Get agent statistics"""
         try:
-            total = await db.scalar(select(func.count()).select_from(Agent).where(Agent.is_active == True))
-            main = await db.scalar(select(func.count()).select_from(Agent).where(
-                and_(Agent.agent_type == "main", Agent.is_active == True)
-            ))
-            child = await db.scalar(select(func.count()).select_from(Agent).where(
-                and_(Agent.agent_type == "child", Agent.is_active == True)
-            ))
-            
-            return {
-                "total_agents": total or 0,
-                "main_agents": main or 0, 
-                "child_agents": child or 0,
-                "active_agents": total or 0
-            }
+            return await self._load_agent_statistics(db)
         except Exception as e:
             logging.error(f"Error getting agent statistics: {e}")
             return {
@@ -503,6 +537,24 @@ class AgentService:
                 "active_agents": 0
             }
     
+    @cached(tags=("agents",))
+    @read_only
+    async def _load_agent_statistics(self, db: AsyncSession) -> Dict[str, Any]:
+        total = await db.scalar(select(func.count()).select_from(Agent).where(Agent.is_active == True))
+        main = await db.scalar(select(func.count()).select_from(Agent).where(
+            and_(Agent.agent_type == "main", Agent.is_active == True)
+        ))
+        child = await db.scalar(select(func.count()).select_from(Agent).where(
+            and_(Agent.agent_type == "child", Agent.is_active == True)
+        ))
+        
+        return {
+            "total_agents": total or 0,
+            "main_agents": main or 0, 
+            "child_agents": child or 0,
+            "active_agents": total or 0
+        }
+    
     async def get_agent_children(self, db: AsyncSession, agent_id: int) -> List[Dict[str, Any]]:
         """Get child agents of a specific agent"""
         try:
@@ -712,6 +764,7 @@ class AgentService:
                 is_public, sharing_json, agent_id, user_id
             ))
             await db.commit()
+            await self._invalidate_agent_caches()
             
             # Generate share URL
             share_url = f"/shared/agents/{agent_id}" if is_public else None
@@ -725,6 +778,7 @@ class AgentService:
             logging.error(f"Error sharing agent: {e}")
             return {"error": str(e)}
     
+    @read_only
     async def get_usage_history(self, db: AsyncSession, agent_id: int, days: int):
         """Get agent usage history"""
         try:
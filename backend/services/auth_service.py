@@ -5,10 +5,13 @@ Simplified authentication service using SQLAlchemy
 
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
-from core.security import security
+from core.security import security, PasswordHashingBusy
+from core.cache import invalidate
+from core.principal_cache import principal_cache, token_identifier
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, insert, func, and_
 from models.database import User, UserSession, ActivityLog
+from config.database import read_only
 import logging
 
 # Create logger
@@ -23,30 +26,32 @@ class AuthService:
     async def login(self, db: AsyncSession, email: str, password: str) -> Dict[str, Any]:
         """Login user and return tokens"""
         try:
-            logger.info(f"🔐 LOGIN: Starting login for email: {email}")
+            logger.debug("🔐 LOGIN: Starting login for email: %s", email)
             
             # Get user by email
             query = select(User).where(
                 and_(User.email == email, User.is_active == True)
             )
-            logger.info(f"🔐 LOGIN: Executing query: {query}")
-            
             result = await db.execute(query)
             user = result.scalar_one_or_none()
             
-            logger.info(f"🔐 LOGIN: User found: {user is not None}")
+            logger.debug("🔐 LOGIN: User found: %s", user is not None)
             
             if not user:
-                logger.warning(f"🔐 LOGIN: User not found for email: {email}")
+                logger.warning("🔐 LOGIN: User not found for email: %s", email)
                 raise ValueError("Invalid email or password")
             
             # Verify password
-            logger.info(f"🔐 LOGIN: Verifying password hash...")
-            if not self.security.verify_password(password, user.password_hash):
-                logger.warning(f"🔐 LOGIN: Invalid password for user: {email}")
+            logger.debug("🔐 LOGIN: Verifying password hash")
+            if not await self.security.verify_password_async(password, user.password_hash):
+                logger.warning("🔐 LOGIN: Invalid password for user: %s", email)
                 raise ValueError("Invalid email or password")
             
-            logger.info(f"🔐 LOGIN: Password verified successfully")
+            logger.debug("🔐 LOGIN: Password verified successfully")
+            
+            # Upgrade legacy SHA-256 hashes now that we have the plain password
+            if self.security.needs_rehash(user.password_hash):
+                user.password_hash = await self.security.hash_password_async(password)
             
             # Create tokens
             token_data = {
@@ -56,7 +61,7 @@ class AuthService:
                 "role": user.role
             }
             
-            logger.info(f"🔐 LOGIN: Creating tokens for user: {user.id}")
+            logger.debug("🔐 LOGIN: Creating tokens for user: %s", user.id)
             access_token = self.security.create_access_token(token_data)
             refresh_token = self.security.create_refresh_token(token_data)
             
@@ -67,7 +72,7 @@ class AuthService:
             # Log activity
             await self._log_activity(db, user.id, "login", "User logged in successfully")
             
-            logger.info(f"🔐 LOGIN: Login successful for user: {user.id}")
+            logger.debug("🔐 LOGIN: Login successful for user: %s", user.id)
             
             return {
                 "access_token": access_token,
@@ -89,10 +94,12 @@ class AuthService:
             }
             
         except ValueError as e:
-            logger.warning(f"🔐 LOGIN: Validation error: {str(e)}")
+            logger.warning("🔐 LOGIN: Validation error: %s", e)
+            raise
+        except PasswordHashingBusy:
             raise
         except Exception as e:
-            logger.error(f"🔐 LOGIN: Unexpected error: {str(e)}")
+            logger.error("🔐 LOGIN: Unexpected error: %s", e)
             raise Exception(f"Login failed: {str(e)}")
     
     async def register_admin(self, db: AsyncSession, email: str, username: str, 
@@ -120,7 +127,7 @@ class AuthService:
                 raise ValueError("Username already exists")
             
             # Hash password
-            password_hash = self.security.hash_password(password)
+            password_hash = await self.security.hash_password_async(password)
             
             # Create admin user
             new_user = User(
@@ -134,6 +141,7 @@ class AuthService:
             db.add(new_user)
             await db.commit()
             await db.refresh(new_user)
+            await invalidate("users")
             
             # Log activity
             await self._log_activity(db, new_user.id, "register", "Admin user registered")
@@ -182,6 +190,10 @@ class AuthService:
     
     async def logout(self, db: AsyncSession, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Logout user"""
+        # Revoke the token used for this request so it can't be replayed until it expires
+        if user_data.get("token_id"):
+            principal_cache.revoke_token(user_data["token_id"], user_data.get("expires_at"))
+        
         try:
             # Log activity
             await self._log_activity(db, user_data["user_id"], "logout", "User logged out")
@@ -231,6 +243,7 @@ class AuthService:
         except Exception as e:
             raise Exception(f"Token refresh failed: {str(e)}")
     
+    @read_only
     async def get_system_status(self, db: AsyncSession) -> Dict[str, Any]:
         """Get authentication system status"""
         try:
@@ -332,6 +345,11 @@ class AuthService:
             if session:
                 await db.delete(session)
                 await db.commit()
+                payload = self.security.verify_token(session.session_token) or {}
+                principal_cache.revoke_token(
+                    token_identifier(payload.get("jti"), session.session_token), payload.get("exp")
+                )
+                principal_cache.invalidate_user(session.user_id)
                 return True
             return False
             
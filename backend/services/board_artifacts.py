@@ -0,0 +1,226 @@
+"""
+Board Artifacts
+Large node outputs spilled to content-addressed files and passed between nodes by reference
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_KEY = "$artifact"
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+class ArtifactError(Exception):
+    """An artifact is invalid, not linked into the execution reading it, or gone - its executions were pruned"""
+
+def _check_sha(sha: Any) -> str:
+    if not isinstance(sha, str) or not _SHA256.fullmatch(sha):
+        raise ArtifactError("Invalid artifact reference")
+    return sha
+
+class ArtifactRef(dict):
+    """{"$artifact": sha256, "size": bytes, "kind": "text" or "bytes"} in place of a large value
+
+    It is a dict, so it goes into events and result_data as it is. Only instances the store
+    created are references - they survive the node cache and worker processes because both
+    pickle - while a plain dict with an "$artifact" key is just data. A reference reads its
+    content through a read-only memory map of the link in the execution it is bound to.
+    """
+
+    def __init__(self, sha: str, size: int, kind: str, execution_id: Optional[str] = None):
+        super().__init__({ARTIFACT_KEY: _check_sha(sha), "size": size, "kind": kind})
+        self.execution_id = execution_id
+
+    def __reduce__(self):
+        return ArtifactRef, (self.sha, self.size, self["kind"], self.execution_id)
+
+    @property
+    def sha(self) -> str:
+        return self[ARTIFACT_KEY]
+
+    @property
+    def size(self) -> int:
+        return self["size"]
+
+    @property
+    def path(self) -> Path:
+        if self.execution_id is None:
+            raise ArtifactError(f"Artifact {self.sha} is not linked into an execution")
+        return artifacts.execution_path(self.execution_id) / self.sha
+
+    @contextmanager
+    def view(self) -> Iterator[mmap.mmap]:
+        """The content as a read-only mmap - slicing and searching it do not load the whole file"""
+        try:
+            with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        except FileNotFoundError:
+            raise ArtifactError(f"Artifact {self.sha} no longer exists")
+
+    def read(self) -> Union[str, bytes]:
+        """The whole value, as it was before it was spilled"""
+        with self.view() as mapped:
+            data = mapped[:]
+        return data.decode("utf-8") if self["kind"] == "text" else data
+
+    def contains(self, needle: Any) -> bool:
+        encoded = needle if isinstance(needle, bytes) else str(needle).encode("utf-8")
+        with self.view() as mapped:
+            return mapped.find(encoded) != -1
+
+    def search(self, pattern: Any) -> bool:
+        encoded = pattern if isinstance(pattern, bytes) else str(pattern).encode("utf-8")
+        with self.view() as mapped:
+            return re.search(encoded, mapped) is not None
+
+def is_artifact(value: Any) -> bool:
+    return isinstance(value, ArtifactRef)
+
+def has_artifact_keys(value: Any) -> bool:
+    """Whether plain data uses the reserved "$artifact" key anywhere - input is rejected if it does"""
+    if isinstance(value, dict):
+        return ARTIFACT_KEY in value or any(has_artifact_keys(item) for item in value.values())
+    if isinstance(value, list):
+        return any(has_artifact_keys(item) for item in value)
+    return False
+
+class ArtifactStore:
+    """Blobs under blobs/<sha[:2]>/<sha>, hard-linked into executions/<execution_id>/ for every
+    execution that produced or reused them
+
+    A blob is written once however many nodes and executions produce the same content. Deleting
+    an execution's directory drops its links; collect() then removes blobs nobody links to.
+    """
+
+    # Blobs younger than this are left alone by collect() - they may be about to be linked
+    COLLECT_GRACE_SECONDS = 300
+
+    def __init__(self, directory: str, threshold: int):
+        self.directory = Path(directory).resolve()
+        self.threshold = threshold
+
+    def blob_path(self, sha: str) -> Path:
+        _check_sha(sha)
+        return self.directory / "blobs" / sha[:2] / sha
+
+    def execution_path(self, execution_id: str) -> Path:
+        return self.directory / "executions" / execution_id
+
+    def put(self, data: Union[str, bytes], execution_id: Optional[str] = None) -> ArtifactRef:
+        kind = "text" if isinstance(data, str) else "bytes"
+        raw = data.encode("utf-8") if kind == "text" else bytes(data)
+        sha = hashlib.sha256(raw).hexdigest()
+        blob = self.blob_path(sha)
+        try:
+            # A fresh mtime keeps collect() off it until it is linked
+            os.utime(blob)
+        except FileNotFoundError:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, so a blob is either absent or complete
+            descriptor, temporary = tempfile.mkstemp(dir=blob.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(raw)
+                os.replace(temporary, blob)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        ref = ArtifactRef(sha, len(raw), kind)
+        if execution_id is not None:
+            ref = self._link(ref, execution_id)
+        return ref
+
+    def _link(self, ref: ArtifactRef, execution_id: str) -> ArtifactRef:
+        """ref bound to execution_id, its blob linked into the execution's directory"""
+        if ref.execution_id == execution_id:
+            return ref
+        target = self.execution_path(execution_id) / ref.sha
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(self.blob_path(ref.sha), target)
+            except FileExistsError:
+                pass
+            except FileNotFoundError:
+                raise ArtifactError(f"Artifact {ref.sha} no longer exists")
+        return ArtifactRef(ref.sha, ref.size, ref["kind"], execution_id)
+
+    def spill(self, value: Any, execution_id: Optional[str] = None) -> Any:
+        """value with every str/bytes of at least threshold bytes replaced by an ArtifactRef
+
+        References already in value (from a worker process or the node cache) are linked into
+        the execution too; ArtifactError if one of them has been collected.
+        """
+        if isinstance(value, (str, bytes, bytearray)):
+            if len(value) >= self.threshold:
+                return self.put(value, execution_id)
+            return value
+        if isinstance(value, ArtifactRef):
+            return self._link(value, execution_id) if execution_id is not None else value
+        if isinstance(value, dict):
+            return {key: self.spill(item, execution_id) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.spill(item, execution_id) for item in value]
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        """value with every reference replaced by its content - for handlers that need the data itself"""
+        if isinstance(value, ArtifactRef):
+            return value.read()
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+    def has(self, execution_id: str, sha: str) -> bool:
+        return bool(_SHA256.fullmatch(sha)) and (self.execution_path(execution_id) / sha).exists()
+
+    def execution_ids(self) -> Iterator[str]:
+        executions = self.directory / "executions"
+        if executions.is_dir():
+            yield from (entry.name for entry in os.scandir(executions) if entry.is_dir())
+
+    def delete_executions(self, execution_ids: Iterable[str]) -> int:
+        deleted = 0
+        for execution_id in execution_ids:
+            path = self.execution_path(execution_id)
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+                deleted += 1
+        return deleted
+
+    def collect(self) -> int:
+        """Remove blobs no execution links to; returns the bytes freed"""
+        freed = 0
+        cutoff = time.time() - self.COLLECT_GRACE_SECONDS
+        blobs = self.directory / "blobs"
+        if not blobs.is_dir():
+            return 0
+        for prefix in os.scandir(blobs):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                try:
+                    stat = entry.stat()
+                    if stat.st_nlink == 1 and stat.st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        freed += stat.st_size
+                except FileNotFoundError:
+                    continue
+        return freed
+
+# Global board artifact store instance
+artifacts = ArtifactStore(settings.BOARD_ARTIFACT_DIRECTORY, settings.BOARD_ARTIFACT_THRESHOLD_BYTES)
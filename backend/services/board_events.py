@@ -0,0 +1,116 @@
+"""
+Board Events
+In-process fan-out of board execution events to SSE subscribers, with replay for late subscribers
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# (sequence number, event name, data)
+ExecutionEvent = Tuple[int, str, Dict[str, Any]]
+
+# Finished streams stay around this long so a client that connects right after the end still sees it
+STREAM_LINGER_SECONDS = 60
+
+class _Stream:
+    __slots__ = ("history", "subscribers", "sequence", "closed")
+
+    def __init__(self, history_size: int):
+        self.history: Deque[ExecutionEvent] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.sequence = 0
+        self.closed = False
+
+def _end(queue: asyncio.Queue):
+    """Replace whatever a subscriber has not read yet with the end marker - it replays from the history"""
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+class ExecutionEventBroker:
+    """One stream per execution running in this process; subscribers that fall too far behind are
+    disconnected and can resume with Last-Event-ID from the history"""
+
+    def __init__(self, history_size: int):
+        self.history_size = history_size
+        self._streams: Dict[str, _Stream] = {}
+
+    def open(self, execution_id: str):
+        self._streams[execution_id] = _Stream(self.history_size)
+
+    def has(self, execution_id: str) -> bool:
+        return execution_id in self._streams
+
+    def publish(self, execution_id: str, event: str, data: Dict[str, Any]):
+        stream = self._streams.get(execution_id)
+        if stream is None or stream.closed:
+            return
+        stream.sequence += 1
+        item = (stream.sequence, event, data)
+        stream.history.append(item)
+        for queue in list(stream.subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Too slow: cut it off; it catches up from the history, then reconnects
+                stream.subscribers.discard(queue)
+                _end(queue)
+
+    def close(self, execution_id: str):
+        """End the stream for subscribers; the history is dropped after STREAM_LINGER_SECONDS"""
+        stream = self._streams.get(execution_id)
+        if stream is None or stream.closed:
+            return
+        stream.closed = True
+        for queue in stream.subscribers:
+            _end(queue)
+        stream.subscribers.clear()
+        asyncio.get_running_loop().call_later(STREAM_LINGER_SECONDS, self._drop, execution_id, stream)
+
+    def _drop(self, execution_id: str, stream: _Stream):
+        if self._streams.get(execution_id) is stream:
+            del self._streams[execution_id]
+
+    async def subscribe(self, execution_id: str, last_event_id: int = 0) -> AsyncIterator[Optional[ExecutionEvent]]:
+        """History after last_event_id, then live events; yields None on keepalive timeouts"""
+        stream = self._streams.get(execution_id)
+        if stream is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.history_size)
+        # Register before replaying so nothing published in between is lost
+        if not stream.closed:
+            stream.subscribers.add(queue)
+        try:
+            for item in list(stream.history):
+                if item[0] > last_event_id:
+                    last_event_id = item[0]
+                    yield item
+            if stream.closed:
+                return
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), settings.BOARD_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is None:
+                    # Stream closed, or this subscriber fell behind - whatever is left is in the history
+                    for replay in list(stream.history):
+                        if replay[0] > last_event_id:
+                            last_event_id = replay[0]
+                            yield replay
+                    return
+                if item[0] > last_event_id:
+                    last_event_id = item[0]
+                    yield item
+        finally:
+            stream.subscribers.discard(queue)
+
+# Global execution event broker instance
+execution_events = ExecutionEventBroker(settings.BOARD_EVENTS_HISTORY)
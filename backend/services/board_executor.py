@@ -0,0 +1,676 @@
+"""
+Board Executor
+Runs workflow boards as DAGs - topological order, concurrent branches, conditional connections
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from core.job_queue import job_queue
+from models.database import Board, BoardExecution
+from services.board_artifacts import ARTIFACT_KEY, ArtifactError, artifacts, has_artifact_keys, is_artifact
+from services.board_events import execution_events
+from services.board_graph import BoardGraph, BoardGraphError, GraphConnection, GraphNode
+from services.board_node_cache import digest, is_cacheable, node_cache_key, node_cache_tags, node_results
+from services.board_sandbox import SANDBOX_FUNCTIONS, NodeSandboxError, node_sandbox
+from services.board_service import board_service
+
+logger = logging.getLogger(__name__)
+
+class NodeExecutionError(Exception):
+    """Raised by node handlers; the message ends up in the node's log entry"""
+
+# Node types whose outgoing connections are chosen by source_port "true"/"false"
+CONDITION_NODE_TYPES = ("condition", "if", "filter")
+
+# Condition evaluation
+def _lookup(value: Any, path: Optional[str]) -> Any:
+    """Dotted path into dicts and lists; no path means the value itself"""
+    if not path:
+        return value
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.lstrip("-").isdigit() and -len(value) <= int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
+
+def _compare(operator: str, actual: Any, expected: Any) -> bool:
+    if is_artifact(actual):
+        # Spilled values are searched in place; other operators need the value itself
+        if operator in ("contains", "not_contains", "matches"):
+            found = actual.search(expected) if operator == "matches" else actual.contains(expected)
+            return found if operator != "not_contains" else not found
+        actual = actual.read()
+    try:
+        if operator in ("equals", "eq", "=="):
+            return actual == expected
+        if operator in ("not_equals", "ne", "!="):
+            return actual != expected
+        if operator in ("greater_than", "gt", ">"):
+            return actual is not None and actual > expected
+        if operator in ("greater_or_equal", "gte", ">="):
+            return actual is not None and actual >= expected
+        if operator in ("less_than", "lt", "<"):
+            return actual is not None and actual < expected
+        if operator in ("less_or_equal", "lte", "<="):
+            return actual is not None and actual <= expected
+        if operator == "contains":
+            return actual is not None and expected in actual
+        if operator == "not_contains":
+            return actual is None or expected not in actual
+        if operator == "in":
+            return actual in (expected or ())
+        if operator == "not_in":
+            return actual not in (expected or ())
+        if operator == "exists":
+            return actual is not None
+        if operator == "not_exists":
+            return actual is None
+        if operator == "is_true":
+            return bool(actual)
+        if operator == "is_false":
+            return not actual
+        if operator == "matches":
+            return actual is not None and re.search(str(expected), str(actual)) is not None
+    except TypeError:
+        # Comparing incompatible types (e.g. None < 3 or "a" in 5) is simply not a match
+        return False
+    raise BoardGraphError(f"Unknown condition operator: {operator}")
+
+def evaluate_condition(condition: Optional[Dict[str, Any]], value: Any) -> bool:
+    """condition_config: {"field", "operator", "value"} leaves combined with "all", "any" and "not"
+
+    An empty condition is always true.
+    """
+    if not condition:
+        return True
+    if "all" in condition:
+        return all(evaluate_condition(item, value) for item in condition["all"])
+    if "any" in condition:
+        return any(evaluate_condition(item, value) for item in condition["any"])
+    if "not" in condition:
+        return not evaluate_condition(condition["not"], value)
+    return _compare(condition.get("operator", "equals"), _lookup(value, condition.get("field")), condition.get("value"))
+
+# Node handlers
+NodeHandler = Callable[[GraphNode, Any, "ExecutionRun"], Awaitable[Any]]
+EventCallback = Callable[[str, Dict[str, Any]], None]
+NODE_HANDLERS: Dict[str, NodeHandler] = {}
+
+def node_handler(*node_types: str):
+    """Register an async handler(node, value, run) for one or more node types"""
+    def decorator(func: NodeHandler) -> NodeHandler:
+        for node_type in node_types:
+            NODE_HANDLERS[node_type] = func
+        return func
+    return decorator
+
+@node_handler("start", "trigger", "manual-trigger", "webhook", "input", "end", "output",
+              "condition", "if", "filter", "noop")
+async def _passthrough(node: GraphNode, value: Any, run: "ExecutionRun") -> Any:
+    return value
+
+@node_handler("set", "transform")
+async def _set_values(node: GraphNode, value: Any, run: "ExecutionRun") -> Any:
+    """Merge config["values"] into the input; config["keep"] limits which input fields survive"""
+    base = value if isinstance(value, dict) and not is_artifact(value) else {"value": value}
+    keep = node.config.get("keep")
+    if keep:
+        base = {key: base[key] for key in keep if key in base}
+    return {**base, **node.config.get("values", {})}
+
+@node_handler("merge")
+async def _merge(node: GraphNode, value: Any, run: "ExecutionRun") -> Any:
+    """Combine the dict inputs of all upstream connections into one dict"""
+    if not isinstance(value, dict) or is_artifact(value):
+        return value
+    merged: Dict[str, Any] = {}
+    for item in value.values():
+        if isinstance(item, dict) and not is_artifact(item):
+            merged.update(item)
+    return merged
+
+@node_handler("wait", "delay")
+async def _wait(node: GraphNode, value: Any, run: "ExecutionRun") -> Any:
+    await asyncio.sleep(float(node.config.get("seconds", 1)))
+    return value
+
+@node_handler("ai", "agent", "llm")
+async def _agent(node: GraphNode, value: Any, run: "ExecutionRun") -> Any:
+    """Send config["prompt"] (with {input} replaced by the node input) to config["agent_id"]"""
+    from services.agent_service import agent_service
+
+    agent_id = node.config.get("agent_id")
+    if agent_id is None:
+        raise NodeExecutionError("No agent_id configured")
+    prompt = node.config.get("prompt", "{input}")
+    # The model needs the text itself, spilled or not
+    value = await asyncio.to_thread(artifacts.resolve, value)
+    message = prompt.replace("{input}", value if isinstance(value, str) else str(value))
+    async with AsyncSessionLocal() as session:
+        result = await agent_service.test_agent(session, int(agent_id), message, user_id=run.user_id)
+    if result.get("status") != "success":
+        raise NodeExecutionError(result.get("message", "Agent call failed"))
+    test_results = result["test_results"]
+    return {
+        "response": test_results["agent_response"],
+        "tokens_used": test_results.get("tokens_used", 0),
+        "cost": test_results.get("cost_estimate", 0.0),
+    }
+
+@node_handler(*SANDBOX_FUNCTIONS)
+async def _sandboxed(node: GraphNode, value: Any, run: "ExecutionRun") -> Any:
+    """CPU-bound node types run in the sandbox process pool so they never block the event loop"""
+    try:
+        return await node_sandbox.run(node.node_type, node.config, value, spill=run.spilling)
+    except NodeSandboxError as e:
+        raise NodeExecutionError(str(e))
+
+class ExecutionRun:
+    """State of one execution: each node is started as soon as its last upstream connection resolves
+
+    Nodes wait on their own inputs only, so independent branches run side by side under the
+    concurrency cap instead of level by level.
+    """
+
+    def __init__(self, graph: BoardGraph, input_data: Dict[str, Any], user_id: Optional[int],
+                 concurrency: int, debug: bool = False, on_event: Optional[EventCallback] = None,
+                 use_cache: bool = True, execution_id: Optional[str] = None):
+        self.graph = graph
+        self.execution_id = execution_id
+        # Large outputs go to the execution's artifacts and travel on as references
+        self.spilling = settings.BOARD_ARTIFACTS_ENABLED and execution_id is not None
+        self.input_data = input_data
+        self.user_id = user_id
+        self.debug = debug
+        self.on_event = on_event
+        # With use_cache off every node runs, and the fresh results replace the cached ones
+        self.caching = settings.BOARD_NODE_CACHE_ENABLED
+        self.use_cache = use_cache
+        self.digests: Dict[str, str] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "saved_ms": 0.0}
+        self._input_digest: Optional[str] = None
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending = {node_id: len(edges) for node_id, edges in graph.incoming.items()}
+        self.inputs: Dict[str, List[Tuple[GraphConnection, Any]]] = {node_id: [] for node_id in graph.nodes}
+        self.outputs: Dict[str, Any] = {}
+        self.status: Dict[str, str] = {}
+        self.log: Dict[str, Dict[str, Any]] = {}
+        self._tasks: set = set()
+        self._done = asyncio.Event()
+        self._remaining = len(graph.nodes)
+
+    async def run(self):
+        if not self._remaining:
+            return
+        for node_id in self.graph.sources:
+            self._start(node_id)
+        await self._done.wait()
+
+    async def cancel(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        if self.on_event is not None:
+            try:
+                self.on_event(event, data)
+            except Exception as e:
+                logger.warning("Board event handler failed: %s", e)
+
+    def _start(self, node_id: str):
+        task = asyncio.create_task(self._run_node(node_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _input_value(self, node_id: str) -> Any:
+        """Sources get the execution input; a single unnamed connection passes its value as is,
+        otherwise inputs are keyed by target_port (or the upstream node's label)"""
+        if not self.graph.incoming[node_id]:
+            return self.input_data
+        received = self.inputs[node_id]
+        if len(received) == 1 and not received[0][0].target_port:
+            return received[0][1]
+        return {
+            edge.target_port or self.graph.nodes[edge.source_node_id].label: value
+            for edge, value in received
+        }
+
+    def _input_digests(self, node_id: str) -> List[Tuple[str, str]]:
+        if not self.graph.incoming[node_id]:
+            if self._input_digest is None:
+                self._input_digest = digest(self.input_data)
+            return [("", self._input_digest)]
+        return [
+            (edge.target_port or self.graph.nodes[edge.source_node_id].label, self.digests[edge.source_node_id])
+            for edge, _ in self.inputs[node_id]
+        ]
+
+    async def _call(self, node_id: str, handler: NodeHandler, value: Any, entry: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+        """Run the handler, or take the result of an earlier run with the same key; returns (output, digest)"""
+        node = self.graph.nodes[node_id]
+        if not self.caching or not is_cacheable(node):
+            return await self._produce(handler, node, value), None
+
+        key = node_cache_key(node, self._input_digests(node_id))
+        tags = node_cache_tags(self.graph.board_id, node)
+        computed = False
+
+        async def compute() -> Dict[str, Any]:
+            nonlocal computed
+            computed = True
+            started = time.perf_counter()
+            output = await self._produce(handler, node, value)
+            return {"output": output, "digest": digest(output), "duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+        if self.use_cache:
+            result = await node_results.get_or_compute("board_node", key, compute, tags=tags)
+            if not computed and self.spilling:
+                try:
+                    result = {**result, "output": await asyncio.to_thread(artifacts.spill, result["output"], self.execution_id)}
+                except ArtifactError:
+                    # The cached output refers to artifacts that have been collected since
+                    result = await compute()
+                    await node_results.set(key, result, tags=tags)
+        else:
+            result = await compute()
+            await node_results.set(key, result, tags=tags)
+
+        if computed:
+            entry["cache"] = "miss"
+            self.cache_stats["misses"] += 1
+        else:
+            entry["cache"] = "hit"
+            entry["saved_ms"] = result["duration_ms"]
+            self.cache_stats["hits"] += 1
+            self.cache_stats["saved_ms"] += result["duration_ms"]
+        return result["output"], result["digest"]
+
+    async def _produce(self, handler: NodeHandler, node: GraphNode, value: Any) -> Any:
+        output = await handler(node, value, self)
+        if self.spilling:
+            output = await asyncio.to_thread(artifacts.spill, output, self.execution_id)
+        return output
+
+    async def _run_node(self, node_id: str):
+        node = self.graph.nodes[node_id]
+        value = self._input_value(node_id)
+        entry = {"node_id": node_id, "label": node.label, "node_type": node.node_type}
+        self.log[node_id] = entry
+        try:
+            async with self.semaphore:
+                entry["started_at"] = datetime.utcnow().isoformat()
+                started = time.perf_counter()
+                self._emit("node_started", dict(entry))
+                output_digest = None
+                if not node.is_active:
+                    output, entry["status"] = value, "bypassed"
+                else:
+                    handler = NODE_HANDLERS.get(node.node_type)
+                    if handler is None:
+                        entry["warning"] = f"No handler for node type {node.node_type!r} - input passed through"
+                        handler = _passthrough
+                    output, output_digest = await self._call(node_id, handler, value, entry)
+                    if node.node_type in CONDITION_NODE_TYPES:
+                        entry["branch"] = "true" if evaluate_condition(node.config.get("condition"), output) else "false"
+                    entry["status"] = "completed"
+                entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        except asyncio.CancelledError:
+            entry["status"] = "cancelled"
+            self._emit("node_finished", dict(entry))
+            raise
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e) or e.__class__.__name__
+            entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            logger.warning("Board node %s (%s) failed: %s", node.label, node_id, entry["error"])
+            self._emit("node_finished", dict(entry))
+            self._finish(node_id, "failed", None)
+            return
+        if self.caching:
+            self.digests[node_id] = output_digest or digest(output)
+        self._emit("node_finished", dict(entry))
+        self._emit("node_output", {"node_id": node_id, "label": node.label, "output": output})
+        if self.debug:
+            entry["input"] = value
+            entry["output"] = output
+        self._finish(node_id, "completed", output)
+
+    def _finish(self, node_id: str, status: str, output: Any):
+        """Record a node's outcome and start (or skip) the downstream nodes it was the last input for"""
+        # Skips cascade through a worklist rather than recursion - chains can be thousands of nodes long
+        outcomes = [(node_id, status, output)]
+        while outcomes:
+            node_id, status, output = outcomes.pop()
+            self.status[node_id] = status
+            branch = self.log[node_id].get("branch")
+            if status == "completed":
+                self.outputs[node_id] = output
+
+            for edge in self.graph.outgoing[node_id]:
+                target = edge.target_node_id
+                if status == "completed" and self._taken(edge, branch, output):
+                    self.inputs[target].append((edge, output))
+                self.pending[target] -= 1
+                if self.pending[target] == 0:
+                    if self.inputs[target]:
+                        self._start(target)
+                    else:
+                        # Every upstream connection was skipped, failed or had a false condition
+                        target_node = self.graph.nodes[target]
+                        self.log[target] = {
+                            "node_id": target,
+                            "label": target_node.label,
+                            "node_type": target_node.node_type,
+                            "status": "skipped"
+                        }
+                        self._emit("node_finished", dict(self.log[target]))
+                        outcomes.append((target, "skipped", None))
+
+            self._remaining -= 1
+        if self._remaining == 0:
+            self._done.set()
+
+    def _taken(self, edge: GraphConnection, branch: Optional[str], output: Any) -> bool:
+        if branch is not None and edge.source_port in ("true", "false") and edge.source_port != branch:
+            return False
+        try:
+            return evaluate_condition(edge.condition_config, output)
+        except BoardGraphError as e:
+            logger.warning("Connection %s has an invalid condition: %s", edge.id, e)
+            return False
+
+class ExecutionRecorder:
+    """Publishes a running execution's events and writes its log to the execution row in batches,
+    every BOARD_LOG_FLUSH_SECONDS instead of once per node"""
+
+    def __init__(self, execution_id: str):
+        self.execution_id = execution_id
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.completed = 0
+        self.failed = 0
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def on_event(self, event: str, data: Dict[str, Any]):
+        execution_events.publish(self.execution_id, event, data)
+        if event == "node_finished":
+            self.entries[data["node_id"]] = data
+            if data["status"] in ("completed", "bypassed"):
+                self.completed += 1
+            elif data["status"] == "failed":
+                self.failed += 1
+            self._dirty = True
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.BOARD_LOG_FLUSH_SECONDS)
+            if not self._dirty:
+                continue
+            self._dirty = False
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(
+                        update(BoardExecution)
+                        .where(BoardExecution.id == self.execution_id)
+                        .values(
+                            execution_log=list(self.entries.values()),
+                            completed_nodes=self.completed,
+                            failed_nodes=self.failed
+                        )
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.warning("Progress write for execution %s failed: %s", self.execution_id, e)
+
+class BoardExecutor:
+    """Compiles a board into a DAG and runs it"""
+
+    async def load_graph(self, db: AsyncSession, board_id: str, version: int) -> BoardGraph:
+        """The compiled graph of this board version; BoardGraphError if it cannot run"""
+        graph = await board_service.get_graph(db, board_id, version)
+        return graph.check()
+
+    async def queue_execution(self, db: AsyncSession, board_id: str, version: int, user_id: int,
+                              input_data: Optional[Dict[str, Any]], execution_type: str = "manual",
+                              timeout: Optional[float] = None, execution_mode: str = "normal",
+                              use_cache: bool = True) -> BoardExecution:
+        """Add an execution and its job to the caller's session; BoardGraphError if the board cannot run
+        or input_data is invalid
+
+        Both are committed with whatever else the caller writes - call job_queue.wake() after the commit.
+        """
+        if has_artifact_keys(input_data):
+            raise BoardGraphError(f'Input data cannot contain "{ARTIFACT_KEY}" keys - they are reserved for artifacts')
+        graph = await self.load_graph(db, board_id, version)
+        execution = BoardExecution(
+            id=str(uuid.uuid4()),
+            board_id=board_id,
+            user_id=user_id,
+            status="queued",
+            execution_type=execution_type,
+            trigger_data=input_data or {},
+            total_nodes=len(graph.nodes),
+            started_at=datetime.utcnow()
+        )
+        db.add(execution)
+        job_queue.enqueue(
+            db,
+            "board_execution",
+            {
+                "execution_id": execution.id,
+                "timeout": timeout,
+                "execution_mode": execution_mode,
+                "use_cache": use_cache
+            },
+            max_attempts=settings.BOARD_EXECUTION_ATTEMPTS
+        )
+        return execution
+
+    async def execute(self, graph: BoardGraph, input_data: Dict[str, Any], user_id: Optional[int] = None,
+                      timeout: Optional[float] = None, execution_mode: str = "normal",
+                      on_event: Optional[EventCallback] = None, use_cache: bool = True,
+                      execution_id: Optional[str] = None) -> Dict[str, Any]:
+        """Run the graph; never raises for node failures or timeouts - they are reported in the result
+
+        on_event(name, data) is called for node_started, node_finished and node_output. With an
+        execution_id, large outputs are stored as that execution's artifacts.
+        """
+        timeout = min(timeout or settings.BOARD_EXECUTION_MAX_TIMEOUT, settings.BOARD_EXECUTION_MAX_TIMEOUT)
+        run = ExecutionRun(graph, input_data, user_id, settings.BOARD_EXECUTION_CONCURRENCY,
+                           debug=execution_mode == "debug", on_event=on_event, use_cache=use_cache,
+                           execution_id=execution_id)
+        started = time.perf_counter()
+        status, error = "completed", None
+        try:
+            await asyncio.wait_for(run.run(), timeout)
+        except asyncio.TimeoutError:
+            await run.cancel()
+            status, error = "timeout", f"Execution exceeded the {timeout}s timeout"
+        except asyncio.CancelledError:
+            await run.cancel()
+            raise
+
+        failed = [node_id for node_id, node_status in run.status.items() if node_status == "failed"]
+        if status == "completed" and failed:
+            status = "failed"
+            error = f"{len(failed)} node(s) failed: " + ", ".join(graph.nodes[node_id].label for node_id in failed)
+
+        return {
+            "status": status,
+            "error": error,
+            "execution_time_ms": int((time.perf_counter() - started) * 1000),
+            "total_nodes": len(graph.nodes),
+            "completed_nodes": sum(1 for node_status in run.status.values() if node_status == "completed"),
+            "failed_nodes": len(failed),
+            "outputs": {
+                graph.nodes[node_id].label: run.outputs[node_id]
+                for node_id in graph.sinks if node_id in run.outputs
+            },
+            "cache": {**run.cache_stats, "saved_ms": round(run.cache_stats["saved_ms"], 2)},
+            "log": [run.log[node_id] for node_id in graph.order if node_id in run.log]
+        }
+
+    async def run_job(self, payload: Dict[str, Any]):
+        """Job queue handler: run a queued execution without holding a session while nodes run"""
+        execution_id = payload["execution_id"]
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(BoardExecution, Board.version)
+                .join(Board, Board.id == BoardExecution.board_id)
+                .where(BoardExecution.id == execution_id)
+            )
+            row = result.first()
+            if row is None or row.BoardExecution.status not in ("queued", "running"):
+                logger.info("Execution %s is no longer pending - skipped", execution_id)
+                return
+            execution = row.BoardExecution
+            board_id, user_id = execution.board_id, execution.user_id
+            input_data = execution.trigger_data or {}
+            try:
+                graph = await self.load_graph(session, board_id, row.version)
+            except BoardGraphError as e:
+                graph, error = None, str(e)
+            else:
+                execution.status = "running"
+                execution.started_at = datetime.utcnow()
+                execution.total_nodes = len(graph.nodes)
+            await session.commit()
+
+        if graph is None:
+            await self.fail_job(payload, error)
+            return
+
+        execution_events.open(execution_id)
+        execution_events.publish(execution_id, "execution_started", {
+            "execution_id": execution_id, "board_id": board_id, "total_nodes": len(graph.nodes)
+        })
+        recorder = ExecutionRecorder(execution_id)
+        recorder.start()
+        try:
+            result = await self.execute(
+                graph, input_data, user_id=user_id, timeout=payload.get("timeout"),
+                execution_mode=payload.get("execution_mode", "normal"), on_event=recorder.on_event,
+                use_cache=payload.get("use_cache", True), execution_id=execution_id
+            )
+        except BaseException:
+            # Shutdown or a failed attempt - the job queue decides what happens next
+            execution_events.close(execution_id)
+            raise
+        finally:
+            await recorder.stop()
+
+        completed_at = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(BoardExecution)
+                .where(BoardExecution.id == execution_id)
+                .values(
+                    status=result["status"],
+                    completed_nodes=result["completed_nodes"],
+                    failed_nodes=result["failed_nodes"],
+                    execution_time_ms=result["execution_time_ms"],
+                    result_data={"outputs": result["outputs"], "cache": result["cache"]},
+                    error_message=result["error"],
+                    execution_log=result["log"],
+                    completed_at=completed_at
+                )
+            )
+            # Running a board is not an edit - keep updated_at as it is
+            await session.execute(
+                update(Board)
+                .where(Board.id == board_id)
+                .values(
+                    execution_count=Board.execution_count + 1,
+                    last_execution=completed_at,
+                    updated_at=Board.updated_at
+                )
+            )
+            await session.commit()
+
+        execution_events.publish(execution_id, "execution_finished", {
+            "execution_id": execution_id,
+            "status": result["status"],
+            "error": result["error"],
+            "execution_time_ms": result["execution_time_ms"],
+            "completed_nodes": result["completed_nodes"],
+            "failed_nodes": result["failed_nodes"],
+            "outputs": result["outputs"],
+            "cache": result["cache"]
+        })
+        execution_events.close(execution_id)
+        logger.info("Board %s execution %s %s in %s ms", board_id, execution_id, result["status"], result["execution_time_ms"])
+
+    async def prune_executions(self):
+        """Delete finished executions past their retention, then the artifacts nothing refers to any more"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.BOARD_EXECUTION_RETENTION_DAYS)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(BoardExecution)
+                .where(BoardExecution.status.notin_(("queued", "running")), BoardExecution.completed_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            pruned = result.rowcount
+
+            # Pruned executions, and those deleted with their board, leave their directories behind
+            on_disk = list(artifacts.execution_ids())
+            live = set()
+            for start in range(0, len(on_disk), 500):
+                rows = await session.execute(
+                    select(BoardExecution.id).where(BoardExecution.id.in_(on_disk[start:start + 500]))
+                )
+                live.update(rows.scalars())
+
+        orphaned = await asyncio.to_thread(artifacts.delete_executions, [id_ for id_ in on_disk if id_ not in live])
+        freed = await asyncio.to_thread(artifacts.collect)
+        if pruned or orphaned or freed:
+            logger.info("Pruned %s executions, artifacts of %s, %s bytes freed", pruned, orphaned, freed)
+
+    async def fail_job(self, payload: Dict[str, Any], error: str):
+        """Mark an execution failed when it cannot run (or its job ran out of attempts)"""
+        execution_id = payload["execution_id"]
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(BoardExecution)
+                .where(BoardExecution.id == execution_id, BoardExecution.status.in_(("queued", "running")))
+                .values(status="failed", error_message=error, completed_at=datetime.utcnow())
+            )
+            await session.commit()
+        if execution_events.has(execution_id):
+            execution_events.publish(execution_id, "execution_finished", {
+                "execution_id": execution_id, "status": "failed", "error": error
+            })
+            execution_events.close(execution_id)
+
+# Global board executor instance
+board_executor = BoardExecutor()
+job_queue.register("board_execution", board_executor.run_job, on_failed=board_executor.fail_job)
+job_queue.add_maintenance(board_executor.prune_executions)
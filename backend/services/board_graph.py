@@ -0,0 +1,217 @@
+"""
+Board Graph
+Compiled, immutable board graphs cached per (board_id, version) for the detail view and the executor
+"""
+
+import itertools
+import logging
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from models.database import Board, BoardConnection, BoardNode
+
+logger = logging.getLogger(__name__)
+
+class BoardGraphError(ValueError):
+    """The board's nodes and connections do not form a runnable DAG"""
+
+class _Frozen:
+    """Slotted record whose attributes are set once, in __init__"""
+    __slots__ = ()
+
+    def __init__(self, *values: Any):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class GraphNode(_Frozen):
+    """One board node; config and the schemas are shared by every run - treat them as read-only"""
+    __slots__ = (
+        "id", "node_type", "label", "description", "position_x", "position_y", "width", "height",
+        "color", "icon", "config", "input_schema", "output_schema", "is_active", "is_start_node",
+        "is_end_node", "execution_order"
+    )
+
+    def __init__(self, *values: Any):
+        super().__init__(*values)
+        if self.config is None:
+            object.__setattr__(self, "config", {})
+
+class GraphConnection(_Frozen):
+    __slots__ = (
+        "id", "source_node_id", "target_node_id", "source_port", "target_port", "connection_type",
+        "color", "style", "condition", "condition_config", "is_active", "execution_order"
+    )
+
+# Columns selected to build the records, in slot order
+NODE_COLUMNS = tuple(getattr(BoardNode, name) for name in GraphNode.__slots__)
+CONNECTION_COLUMNS = tuple(getattr(BoardConnection, name) for name in GraphConnection.__slots__)
+
+def _execution_order_key(item) -> Tuple[bool, int]:
+    return (item.execution_order is None, item.execution_order or 0)
+
+class BoardGraph(_Frozen):
+    """Every node and connection of one board version, with adjacency over the active connections
+
+    Compiling never raises: a board that cannot run (a cycle, a dangling connection) still opens in
+    the editor, and error says why it cannot be executed.
+    """
+    __slots__ = ("board_id", "version", "nodes", "connections", "incoming", "outgoing", "order", "error")
+
+    def __init__(self, board_id: Optional[str], version: int, nodes: Iterable[GraphNode],
+                 connections: Iterable[GraphConnection]):
+        node_map = {node.id: node for node in nodes}
+        connections = tuple(connections)
+        incoming: Dict[str, list] = {node_id: [] for node_id in node_map}
+        outgoing: Dict[str, list] = {node_id: [] for node_id in node_map}
+        error = None
+        for connection in connections:
+            if not connection.is_active:
+                continue
+            source, target = connection.source_node_id, connection.target_node_id
+            if source not in node_map or target not in node_map:
+                error = error or f"Connection {connection.id} references a node that is not on the board"
+                continue
+            outgoing[source].append(connection)
+            incoming[target].append(connection)
+        for edges in outgoing.values():
+            edges.sort(key=_execution_order_key)
+
+        super().__init__(
+            board_id,
+            version,
+            MappingProxyType(node_map),
+            connections,
+            MappingProxyType({node_id: tuple(edges) for node_id, edges in incoming.items()}),
+            MappingProxyType({node_id: tuple(edges) for node_id, edges in outgoing.items()}),
+            (),
+            error
+        )
+        if error is None:
+            order, error = self._topological_order()
+            object.__setattr__(self, "order", order)
+            object.__setattr__(self, "error", error)
+
+    def _topological_order(self) -> Tuple[Tuple[str, ...], Optional[str]]:
+        """Kahn's algorithm; whatever is left over sits on a cycle"""
+        in_degree = {node_id: len(edges) for node_id, edges in self.incoming.items()}
+        ready = deque(sorted(
+            (node_id for node_id, degree in in_degree.items() if degree == 0),
+            key=self._sort_key
+        ))
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for edge in self.outgoing[node_id]:
+                target = edge.target_node_id
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    ready.append(target)
+        if len(order) != len(self.nodes):
+            cycle = [self.nodes[node_id].label for node_id, degree in in_degree.items() if degree > 0]
+            return (), f"Board contains a cycle - these nodes can never run: {', '.join(sorted(cycle))}"
+        return tuple(order), None
+
+    def _sort_key(self, node_id: str) -> Tuple[bool, bool, int]:
+        node = self.nodes[node_id]
+        return (not node.is_start_node, *_execution_order_key(node))
+
+    def check(self) -> "BoardGraph":
+        """The graph itself, or BoardGraphError if it cannot be executed"""
+        if self.error is not None:
+            raise BoardGraphError(self.error)
+        return self
+
+    @property
+    def sources(self) -> Sequence[str]:
+        return [node_id for node_id in self.order if not self.incoming[node_id]]
+
+    @property
+    def sinks(self) -> Sequence[str]:
+        ends = [node_id for node_id in self.order if self.nodes[node_id].is_end_node]
+        return ends or [node_id for node_id in self.order if not self.outgoing[node_id]]
+
+class BoardGraphCache:
+    """Compiled graphs of recently used boards, one version per board, least recently used out first
+
+    Entries are keyed by the version read from the board row, so a graph is never served for a
+    version it was not compiled from - an edit in another process simply misses here.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._graphs: "OrderedDict[str, BoardGraph]" = OrderedDict()
+
+    def get(self, board_id: str, version: int) -> Optional[BoardGraph]:
+        graph = self._graphs.get(board_id)
+        if graph is None or graph.version != version:
+            self.misses += 1
+            return None
+        self._graphs.move_to_end(board_id)
+        self.hits += 1
+        return graph
+
+    def put(self, graph: BoardGraph):
+        current = self._graphs.get(graph.board_id)
+        if current is not None and current.version > graph.version:
+            return
+        self._graphs[graph.board_id] = graph
+        self._graphs.move_to_end(graph.board_id)
+        while len(self._graphs) > self.max_entries:
+            self._graphs.popitem(last=False)
+
+    def discard(self, board_id: str):
+        self._graphs.pop(board_id, None)
+
+    def stats(self) -> Mapping[str, int]:
+        return {"entries": len(self._graphs), "hits": self.hits, "misses": self.misses}
+
+@event.listens_for(Session, "before_flush")
+def _bump_board_versions(session, flush_context, instances):
+    """Move a board to a new version whenever the ORM writes one of its nodes, connections or board_data
+
+    Bulk UPDATE/DELETE statements on those tables bypass this and must bump Board.version themselves.
+    """
+    board_ids = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (BoardNode, BoardConnection)):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            board = obj.__dict__.get("board")
+            board_id = obj.board_id or (board.id if board is not None else None)
+            if board_id is not None:
+                board_ids.add(board_id)
+        elif isinstance(obj, Board) and obj in session.dirty:
+            if inspect(obj).attrs.board_data.history.has_changes():
+                board_ids.add(obj.id)
+
+    for board_id in board_ids:
+        board = session.identity_map.get(session.identity_key(Board, board_id))
+        if board is None:
+            session.execute(
+                update(Board)
+                .where(Board.id == board_id)
+                .values(version=Board.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        elif board not in session.new and board not in session.deleted:
+            board.version = Board.version + 1
+
+# Global compiled board graph cache instance
+board_graphs = BoardGraphCache(settings.BOARD_GRAPH_CACHE_MAX_ENTRIES)
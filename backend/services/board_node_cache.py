@@ -0,0 +1,50 @@
+"""
+Board Node Cache
+Content-addressed node results - a re-run only recomputes nodes whose type, config or inputs changed
+"""
+
+import hashlib
+import json
+from typing import Any, List, Tuple
+
+from config.settings import settings
+from core.cache import Cache, create_backend
+from services.board_graph import GraphNode
+
+# Nodes whose point is the side effect or the passing of time, not the result
+NON_CACHEABLE_NODE_TYPES = ("wait", "delay", "webhook", "email", "http", "http-request")
+
+# Node types calling an agent - their entries are dropped when the agent changes
+AGENT_NODE_TYPES = ("ai", "agent", "llm")
+
+def digest(value: Any) -> str:
+    """SHA-256 of the canonical JSON form; dict key order does not matter"""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def node_cache_key(node: GraphNode, input_digests: List[Tuple[str, str]]) -> str:
+    """Key from the node type, its config and the (input name, digest) of every input it received
+
+    Upstream outputs are hashed once when they are produced, so a node's key costs the same
+    whatever the size of its inputs.
+    """
+    return "board-node:" + digest({
+        "type": node.node_type,
+        "config": node.config,
+        "inputs": sorted(input_digests)
+    })
+
+def is_cacheable(node: GraphNode) -> bool:
+    return node.node_type not in NON_CACHEABLE_NODE_TYPES and node.config.get("cache", True) is not False
+
+def node_cache_tags(board_id: str, node: GraphNode) -> Tuple[str, ...]:
+    tags = [f"board:{board_id}"]
+    if node.node_type in AGENT_NODE_TYPES and node.config.get("agent_id") is not None:
+        tags.append(f"agent:{node.config['agent_id']}")
+    return tuple(tags)
+
+# Global node result cache instance - separate from the service cache so its size and TTL are its own
+node_results = Cache(
+    create_backend(settings.BOARD_NODE_CACHE_MAX_ENTRIES, prefix="agent-player:board-nodes:"),
+    settings.BOARD_NODE_CACHE_TTL
+)
@@ -0,0 +1,304 @@
+"""
+Board Sandbox
+CPU-bound node types (code, parse) run in a bounded process pool with per-node CPU, memory and time limits
+
+The limits contain runaway nodes, not hostile ones: workers share the server's user, environment
+and files, so code nodes stay off unless BOARD_CODE_NODES_ENABLED is set.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+import multiprocessing
+import pickle
+import re
+import signal
+import statistics
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from config.settings import settings
+from services.board_artifacts import artifacts
+
+try:
+    import resource
+except ImportError:  # Windows - only the wall-clock limit applies
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+class NodeSandboxError(Exception):
+    """A sandboxed node failed, hit one of its limits, or its worker process died"""
+
+class _LimitExceeded(BaseException):
+    """Raised inside the worker by the limit timers - a BaseException so node code cannot swallow it"""
+
+# Node types that run user-supplied code
+CODE_NODE_TYPES = ("code", "python")
+
+class NodeLimits(NamedTuple):
+    cpu_seconds: float
+    memory_mb: int
+    timeout: float
+
+def node_limits(config: Dict[str, Any]) -> NodeLimits:
+    """config["limits"] may lower or raise the defaults, never beyond the configured maximums"""
+    limits = config.get("limits") or {}
+
+    def pick(name: str, default: float, maximum: float) -> float:
+        try:
+            value = float(limits.get(name, default))
+        except (TypeError, ValueError):
+            value = default
+        return min(max(value, 0.1), maximum)
+
+    return NodeLimits(
+        pick("cpu_seconds", settings.BOARD_NODE_CPU_SECONDS, settings.BOARD_NODE_MAX_CPU_SECONDS),
+        int(pick("memory_mb", settings.BOARD_NODE_MEMORY_MB, settings.BOARD_NODE_MAX_MEMORY_MB)),
+        pick("timeout", settings.BOARD_NODE_TIMEOUT, settings.BOARD_NODE_MAX_TIMEOUT)
+    )
+
+# Node functions - plain sync functions(config, value) -> output, looked up by node type in the
+# worker, so only the type name crosses the process boundary
+SandboxFunction = Callable[[Dict[str, Any], Any], Any]
+SANDBOX_FUNCTIONS: Dict[str, SandboxFunction] = {}
+
+def sandbox_function(*node_types: str):
+    """Register a sync function(config, value) run in the sandbox for one or more node types
+
+    It must be defined in this module (or one it imports) so the worker processes know it too.
+    """
+    def decorator(func: SandboxFunction) -> SandboxFunction:
+        for node_type in node_types:
+            SANDBOX_FUNCTIONS[node_type] = func
+        return func
+    return decorator
+
+# Builtins available to code nodes - no imports or files. Attribute access still reaches any
+# class in the process, so this only keeps honest mistakes from reaching the filesystem.
+SAFE_BUILTINS = {
+    name: __builtins__[name] if isinstance(__builtins__, dict) else getattr(__builtins__, name)
+    for name in (
+        "abs", "all", "any", "bool", "bytes", "chr", "dict", "divmod", "enumerate", "filter", "float",
+        "format", "frozenset", "hash", "int", "isinstance", "iter", "len", "list", "map", "max", "min",
+        "next", "ord", "pow", "range", "repr", "reversed", "round", "set", "slice", "sorted", "str",
+        "sum", "tuple", "zip", "Exception", "ValueError", "TypeError", "KeyError", "IndexError"
+    )
+}
+CODE_MODULES = {"json": json, "math": math, "re": re, "statistics": statistics}
+
+@lru_cache(maxsize=128)
+def _compile(source: str):
+    return compile(source, "<code node>", "exec")
+
+@sandbox_function(*CODE_NODE_TYPES)
+def _run_code(config: Dict[str, Any], value: Any) -> Any:
+    """Run config["code"] with the node input bound to `input`; the node output is whatever it assigns to `output`"""
+    source = config.get("code")
+    if not isinstance(source, str) or not source.strip():
+        raise ValueError("No code configured")
+    namespace = {"__builtins__": SAFE_BUILTINS, **CODE_MODULES, "input": value, "output": None}
+    exec(_compile(source), namespace)
+    return namespace["output"]
+
+@sandbox_function("parse", "json_parse", "csv_parse")
+def _parse(config: Dict[str, Any], value: Any) -> Any:
+    """Parse text input (or value[config["field"]]) as json, csv or lines, per config["format"]"""
+    field = config.get("field")
+    text = value.get(field) if field and isinstance(value, dict) else value
+    if isinstance(text, bytes):
+        text = text.decode(config.get("encoding", "utf-8"))
+    if not isinstance(text, str):
+        raise ValueError(f"Expected text to parse, got {type(text).__name__}")
+
+    text_format = config.get("format", "json")
+    if text_format == "json":
+        return json.loads(text)
+    if text_format == "csv":
+        rows = list(csv.reader(io.StringIO(text), delimiter=config.get("delimiter", ",")))
+        if not config.get("header", True) or not rows:
+            return rows
+        header, *rows = rows
+        return [dict(zip(header, row)) for row in rows]
+    if text_format == "lines":
+        return [line for line in text.splitlines() if line.strip() or config.get("keep_empty")]
+    raise ValueError(f"Unknown format: {text_format!r}")
+
+# Worker process side
+def _raise_limit(signum, frame):
+    raise _LimitExceeded("cpu" if signum == signal.SIGPROF else "time")
+
+def _init_worker():
+    # Ctrl+C goes to the whole process group; shutdown is the parent's call
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, _raise_limit)
+        signal.signal(signal.SIGALRM, _raise_limit)
+
+def _limit_memory(megabytes: int) -> Optional[int]:
+    """Cap further address space growth of this worker; returns the soft limit to restore"""
+    if resource is None:
+        return None
+    try:
+        with open("/proc/self/statm") as statm:
+            in_use = int(statm.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = in_use + megabytes * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return soft
+
+def _run_in_worker(payload: bytes) -> bytes:
+    """Unpickle (node_type, config, value, limits, spill), run the node under its limits, pickle ("ok"|"error", result)"""
+    node_type, config, value, limits, spill = pickle.loads(payload)
+    timers = hasattr(signal, "setitimer")
+    restore_memory = None
+    try:
+        restore_memory = _limit_memory(limits.memory_mb)
+        if timers:
+            signal.setitimer(signal.ITIMER_PROF, limits.cpu_seconds)
+            signal.setitimer(signal.ITIMER_REAL, limits.timeout)
+        try:
+            # Spilled inputs are read here from their files; large outputs are written to the
+            # store here, so only references cross the pipe either way
+            output = SANDBOX_FUNCTIONS[node_type](config, artifacts.resolve(value))
+            if spill:
+                output = artifacts.spill(output)
+        finally:
+            if timers:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        result = ("ok", output)
+    except _LimitExceeded as e:
+        if str(e) == "cpu":
+            result = ("error", f"Node exceeded its {limits.cpu_seconds:g}s CPU limit")
+        else:
+            result = ("error", f"Node exceeded its {limits.timeout:g}s time limit")
+    except MemoryError:
+        result = ("error", f"Node exceeded its {limits.memory_mb} MB memory limit")
+    except Exception as e:
+        result = ("error", f"{type(e).__name__}: {e}")
+    finally:
+        if restore_memory is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (restore_memory, resource.getrlimit(resource.RLIMIT_AS)[1]))
+    try:
+        return pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        return pickle.dumps(("error", f"Node output cannot be returned: {e}"), protocol=pickle.HIGHEST_PROTOCOL)
+
+# Event loop side
+class NodeSandbox:
+    """Bounded process pool for sandboxed node types
+
+    The node input goes over as one pickle (protocol 5) together with the node type, its config
+    and limits - never the graph or the run. At most BOARD_SANDBOX_MAX_IN_FLIGHT nodes are handed
+    to the pool at once; the rest wait on the event loop, so queued inputs stay in one place.
+    A worker stuck past its time limit (in C code the timers cannot interrupt) gets the whole
+    pool replaced; the other nodes that were on that pool run once more on the new one.
+    """
+
+    # Time the in-worker timers get to fire before the pool is considered stuck
+    KILL_GRACE_SECONDS = 5
+
+    def __init__(self, workers: int, max_in_flight: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._max_in_flight = max_in_flight
+        # Pools killed because a node overran its deadline - not the fault of their other nodes
+        self._timed_out: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self.stats = {"runs": 0, "failures": 0, "recycled": 0, "retried": 0, "bytes_in": 0, "bytes_out": 0}
+
+    @staticmethod
+    def handles(node_type: str) -> bool:
+        return node_type in SANDBOX_FUNCTIONS
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process with a running event loop and its threads is unsafe - start
+            # workers from a clean forkserver (spawn where it is not available)
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            context = multiprocessing.get_context(method)
+            if method == "forkserver":
+                context.set_forkserver_preload([__name__])
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                max_tasks_per_child=settings.BOARD_SANDBOX_TASKS_PER_CHILD
+            )
+        return self._pool
+
+    def _recycle(self):
+        """Kill the workers and start a fresh pool on next use"""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        self.stats["recycled"] += 1
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, node_type: str, config: Dict[str, Any], value: Any, spill: bool = False) -> Any:
+        """The node's output; with spill, large values in it come back as unlinked artifact references"""
+        if node_type in CODE_NODE_TYPES and not settings.BOARD_CODE_NODES_ENABLED:
+            raise NodeSandboxError("Code nodes are disabled on this server (BOARD_CODE_NODES_ENABLED)")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+        limits = node_limits(config)
+        payload = pickle.dumps((node_type, config, value, limits, spill), protocol=pickle.HIGHEST_PROTOCOL)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                pool = self._get_pool()
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(pool, _run_in_worker, payload),
+                        limits.timeout + self.KILL_GRACE_SECONDS
+                    )
+                    break
+                except asyncio.TimeoutError:
+                    logger.warning("Sandboxed %s node did not stop at its time limit - replacing the worker pool", node_type)
+                    if self._pool is pool:
+                        self._timed_out.add(pool)
+                        self._recycle()
+                    self.stats["failures"] += 1
+                    raise NodeSandboxError(f"Node exceeded its {limits.timeout:g}s time limit")
+                except (BrokenProcessPool, asyncio.CancelledError) as e:
+                    # Killing a pool breaks its running nodes and cancels its queued ones
+                    collateral = pool in self._timed_out and not asyncio.current_task().cancelling()
+                    if collateral and attempt == 0:
+                        self.stats["retried"] += 1
+                        continue
+                    if isinstance(e, asyncio.CancelledError) and not collateral:
+                        raise
+                    if self._pool is pool:
+                        self._recycle()
+                    self.stats["failures"] += 1
+                    raise NodeSandboxError("Sandbox worker process died (memory limit or crash)")
+
+        self.stats["runs"] += 1
+        self.stats["bytes_in"] += len(payload)
+        self.stats["bytes_out"] += len(result)
+        status, output = pickle.loads(result)
+        if status != "ok":
+            self.stats["failures"] += 1
+            raise NodeSandboxError(output)
+        return output
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Global node sandbox instance
+node_sandbox = NodeSandbox(settings.BOARD_SANDBOX_WORKERS, settings.BOARD_SANDBOX_MAX_IN_FLIGHT)
@@ -0,0 +1,470 @@
+"""
+Board Service
+Board listing and graph storage for the workflow builder
+"""
+
+import base64
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, and_, delete, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+
+from config.database import read_only
+from config.settings import settings
+from core.json_patch import Operation, apply_patch, make_patch
+from core.tracing import traced
+from models.database import Board, BoardConnection, BoardNode, BoardRevision, BoardTemplate
+from services.board_graph import CONNECTION_COLUMNS, NODE_COLUMNS, BoardGraph, GraphConnection, GraphNode, board_graphs
+
+logger = logging.getLogger(__name__)
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that was not produced by list_boards"""
+
+class RevisionConflict(Exception):
+    """The board changed after the version the client edited"""
+
+    def __init__(self, current_version: Optional[int]):
+        super().__init__(f"Board has changed - current version is {current_version}")
+        self.current_version = current_version
+
+def encode_cursor(updated_at: datetime, board_id: str) -> str:
+    raw = json.dumps([updated_at.isoformat(), board_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+# Old id -> new id for the board being copied. Temporary, so each connection has its own
+_copy_ids = Table(
+    "board_copy_ids",
+    MetaData(),
+    Column("old_id", String(36), primary_key=True),
+    Column("new_id", String(36), nullable=False),
+    prefixes=["TEMPORARY"]
+)
+
+# Columns copied as they are - ids, the board and timestamps are set per copy
+_OWN_COLUMNS = ("id", "board_id", "created_at", "updated_at")
+NODE_COPY_COLUMNS = tuple(column.name for column in BoardNode.__table__.columns if column.name not in _OWN_COLUMNS)
+CONNECTION_COPY_COLUMNS = tuple(
+    column.name for column in BoardConnection.__table__.columns
+    if column.name not in _OWN_COLUMNS + ("source_node_id", "target_node_id")
+)
+
+def _column_defaults(model, names) -> Dict[str, Any]:
+    """Scalar column defaults - executemany rows must all carry the same keys"""
+    columns = model.__table__.columns
+    return {
+        name: columns[name].default.arg if columns[name].default is not None and columns[name].default.is_scalar else None
+        for name in names
+    }
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, board_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), str(board_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+class BoardService:
+    """Board queries shared by the boards API, the executor and background jobs"""
+
+    @traced()
+    @read_only
+    async def list_boards(self, db: AsyncSession, user_id: int, is_admin: bool = False,
+                          board_type: Optional[str] = None, status: Optional[str] = None,
+                          search: Optional[str] = None, is_public: Optional[bool] = None,
+                          limit: int = 20, cursor: Optional[str] = None, skip: int = 0) -> Dict[str, Any]:
+        """One page of boards, newest change first, with node and execution counts
+
+        Pages are keyed on (updated_at, id): pass the returned next_cursor to continue. Node
+        counts come from a correlated subquery in the same statement and execution counts from
+        the counters the executor maintains, so a page is one query (two with the total, which
+        is only computed for the first page).
+        """
+        filters = []
+        if not is_admin:
+            # Users see their own boards and public boards
+            filters.append(or_(Board.user_id == user_id, Board.visibility == "public"))
+        if board_type:
+            filters.append(Board.board_type == board_type)
+        if status:
+            filters.append(Board.status == status)
+        if search:
+            search_filter = f"%{search}%"
+            filters.append(or_(Board.name.ilike(search_filter), Board.description.ilike(search_filter)))
+        if is_public is not None:
+            filters.append(Board.visibility == "public" if is_public else Board.visibility != "public")
+
+        total = None
+        if cursor is None:
+            total_result = await db.execute(select(func.count(Board.id)).where(*filters))
+            total = total_result.scalar()
+
+        node_count = (
+            select(func.count(BoardNode.id))
+            .where(BoardNode.board_id == Board.id)
+            .correlate(Board)
+            .scalar_subquery()
+            .label("node_count")
+        )
+        query = select(
+            Board.id, Board.name, Board.description, Board.board_type, Board.status,
+            Board.visibility, Board.user_id, Board.execution_count, Board.last_execution,
+            Board.created_at, Board.updated_at, node_count
+        ).where(*filters)
+
+        if cursor is not None:
+            updated_at, board_id = decode_cursor(cursor)
+            query = query.where(or_(
+                Board.updated_at < updated_at,
+                and_(Board.updated_at == updated_at, Board.id < board_id)
+            ))
+        elif skip:
+            query = query.offset(skip)
+
+        # One extra row tells whether there is another page without counting
+        result = await db.execute(query.order_by(Board.updated_at.desc(), Board.id.desc()).limit(limit + 1))
+        rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            "boards": [
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "description": row.description,
+                    "board_type": row.board_type,
+                    "status": row.status,
+                    "is_public": row.visibility == "public",
+                    "user_id": row.user_id,
+                    "node_count": row.node_count,
+                    "execution_count": row.execution_count,
+                    "last_execution_at": row.last_execution,
+                    "created_at": row.created_at,
+                    "updated_at": row.updated_at
+                }
+                for row in rows
+            ],
+            "total": total,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(rows[-1].updated_at, rows[-1].id) if has_more else None
+        }
+
+    @traced()
+    async def get_graph(self, db: AsyncSession, board_id: str, version: int) -> BoardGraph:
+        """The compiled graph of a board version - from the graph cache, else two queries and a compile
+
+        version must come from the board row the caller just read. Not read_only: a lagging
+        replica would cache an older graph under the newer version.
+        """
+        graph = board_graphs.get(board_id, version)
+        if graph is not None:
+            return graph
+
+        nodes_result = await db.execute(select(*NODE_COLUMNS).where(BoardNode.board_id == board_id))
+        connections_result = await db.execute(
+            select(*CONNECTION_COLUMNS).where(BoardConnection.board_id == board_id)
+        )
+        graph = BoardGraph(
+            board_id,
+            version,
+            (GraphNode(*row) for row in nodes_result),
+            (GraphConnection(*row) for row in connections_result)
+        )
+        board_graphs.put(graph)
+        return graph
+
+    async def _map_ids(self, db: AsyncSession, id_column, board_column, board_id: str) -> int:
+        """Give every row of the board a new id in the mapping table, a chunk of ids at a time"""
+        chunk_size = settings.BOARD_COPY_CHUNK_SIZE
+        last_id, mapped = "", 0
+        while True:
+            result = await db.execute(
+                select(id_column).where(board_column == board_id, id_column > last_id).order_by(id_column).limit(chunk_size)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                return mapped
+            await db.execute(insert(_copy_ids), [{"old_id": old_id, "new_id": str(uuid.uuid4())} for old_id in ids])
+            mapped += len(ids)
+            last_id = ids[-1]
+
+    @traced()
+    async def copy_board(self, db: AsyncSession, source: Board, user_id: int, name: str) -> Tuple[Board, int, int]:
+        """Copy a board with its nodes and connections inside the database; returns (board, nodes, connections)
+
+        Rows never pass through Python: ids are remapped through a temporary table filled a chunk
+        at a time, then INSERT ... SELECT copies nodes and connections, so memory stays flat
+        however big the board is. Everything happens in the caller's transaction - commit to keep it.
+        """
+        now = datetime.utcnow()
+        board = Board(
+            id=str(uuid.uuid4()),
+            name=name,
+            description=f"Copy of {source.description or source.name}",
+            board_type=source.board_type,
+            board_data=source.board_data,
+            settings=source.settings,
+            zoom_level=source.zoom_level,
+            pan_x=source.pan_x,
+            pan_y=source.pan_y,
+            connection_type=source.connection_type,
+            theme=source.theme,
+            is_executable=source.is_executable,
+            status="draft",
+            visibility="private",  # Copies are private by default
+            user_id=user_id,
+            created_at=now,
+            updated_at=now
+        )
+        db.add(board)
+        await db.flush()
+
+        await db.execute(CreateTable(_copy_ids, if_not_exists=True))
+        await db.execute(delete(_copy_ids))
+        await self._map_ids(db, BoardNode.id, BoardNode.board_id, source.id)
+        await self._map_ids(db, BoardConnection.id, BoardConnection.board_id, source.id)
+
+        timestamps = (literal(now, DateTime()), literal(now, DateTime()))
+        nodes_result = await db.execute(
+            insert(BoardNode).from_select(
+                ("id", "board_id", *NODE_COPY_COLUMNS, "created_at", "updated_at"),
+                select(
+                    _copy_ids.c.new_id,
+                    literal(board.id, String()),
+                    *(BoardNode.__table__.c[name] for name in NODE_COPY_COLUMNS),
+                    *timestamps
+                )
+                .join_from(BoardNode, _copy_ids, _copy_ids.c.old_id == BoardNode.id)
+                .where(BoardNode.board_id == source.id)
+            )
+        )
+
+        # Connections whose nodes are gone have no mapping for them and drop out of the joins
+        own_ids, source_ids, target_ids = _copy_ids.alias(), _copy_ids.alias(), _copy_ids.alias()
+        connections_result = await db.execute(
+            insert(BoardConnection).from_select(
+                ("id", "board_id", "source_node_id", "target_node_id", *CONNECTION_COPY_COLUMNS, "created_at", "updated_at"),
+                select(
+                    own_ids.c.new_id,
+                    literal(board.id, String()),
+                    source_ids.c.new_id,
+                    target_ids.c.new_id,
+                    *(BoardConnection.__table__.c[name] for name in CONNECTION_COPY_COLUMNS),
+                    *timestamps
+                )
+                .join_from(BoardConnection, own_ids, own_ids.c.old_id == BoardConnection.id)
+                .join(source_ids, source_ids.c.old_id == BoardConnection.source_node_id)
+                .join(target_ids, target_ids.c.old_id == BoardConnection.target_node_id)
+                .where(BoardConnection.board_id == source.id)
+            )
+        )
+        await db.execute(delete(_copy_ids))
+        return board, nodes_result.rowcount, connections_result.rowcount
+
+    @traced()
+    async def create_from_template(self, db: AsyncSession, template: BoardTemplate, user_id: int, name: str,
+                                   description: Optional[str] = None) -> Tuple[Board, int, int]:
+        """Instantiate a template; returns (board, nodes, connections)
+
+        template_data: {"board_type", "board_data", "settings", "nodes": [...], "connections": [...]}
+        where nodes carry the BoardNode fields plus a template-local id, and connections refer to
+        those ids in source_node_id/target_node_id. Rows are written with executemany in chunks.
+        Everything happens in the caller's transaction - commit to keep it.
+        """
+        data = template.template_data or {}
+        now = datetime.utcnow()
+        board = Board(
+            id=str(uuid.uuid4()),
+            name=name,
+            description=description if description is not None else template.description,
+            board_type=data.get("board_type") or "workflow",
+            board_data=data.get("board_data") or {},
+            settings=data.get("settings"),
+            status="draft",
+            visibility="private",
+            user_id=user_id,
+            created_at=now,
+            updated_at=now
+        )
+        db.add(board)
+        await db.flush()
+
+        chunk_size = settings.BOARD_COPY_CHUNK_SIZE
+        node_defaults = _column_defaults(BoardNode, NODE_COPY_COLUMNS)
+        node_ids: Dict[str, str] = {}
+        nodes_created = 0
+        for chunk in _chunks(data.get("nodes") or [], chunk_size):
+            rows = []
+            for node in chunk:
+                row = {**node_defaults, **{key: node[key] for key in NODE_COPY_COLUMNS if node.get(key) is not None}}
+                row.update(
+                    id=str(uuid.uuid4()), board_id=board.id, created_at=now, updated_at=now,
+                    node_type=row["node_type"] or "noop",
+                    label=row["label"] or row["node_type"] or "Node",
+                    position_x=row["position_x"] or 0.0, position_y=row["position_y"] or 0.0
+                )
+                if node.get("id") is not None:
+                    node_ids[str(node["id"])] = row["id"]
+                rows.append(row)
+            await db.execute(insert(BoardNode), rows)
+            nodes_created += len(rows)
+
+        connection_defaults = _column_defaults(BoardConnection, CONNECTION_COPY_COLUMNS)
+        connections_created = 0
+        for chunk in _chunks(data.get("connections") or [], chunk_size):
+            rows = []
+            for connection in chunk:
+                source = node_ids.get(str(connection.get("source_node_id")))
+                target = node_ids.get(str(connection.get("target_node_id")))
+                if source is None or target is None:
+                    continue
+                row = {
+                    **connection_defaults,
+                    **{key: connection[key] for key in CONNECTION_COPY_COLUMNS if connection.get(key) is not None}
+                }
+                row.update(
+                    id=str(uuid.uuid4()), board_id=board.id, source_node_id=source, target_node_id=target,
+                    created_at=now, updated_at=now
+                )
+                rows.append(row)
+            if rows:
+                await db.execute(insert(BoardConnection), rows)
+                connections_created += len(rows)
+
+        template.usage_count = BoardTemplate.usage_count + 1
+        return board, nodes_created, connections_created
+
+    @traced()
+    async def save_board_data(self, db: AsyncSession, board: Board, user_id: Optional[int],
+                              board_data: Optional[Dict[str, Any]] = None,
+                              operations: Optional[List[Operation]] = None,
+                              base_version: Optional[int] = None) -> int:
+        """Write new board_data and record it as a revision; returns the board version afterwards
+
+        Pass either the whole board_data (the delta is computed here) or JSON-patch operations
+        against the current board_data (stored as they are). The UPDATE only matches the version
+        that was read, so two saves can never both build on the same revision - the later one
+        gets RevisionConflict. Raises JsonPatchError for operations that do not apply.
+        Everything happens in the caller's transaction - commit to keep it.
+        """
+        if base_version is not None and base_version != board.version:
+            raise RevisionConflict(board.version)
+        previous = board.board_data or {}
+        if operations is not None:
+            board_data = apply_patch(previous, operations)
+            delta = [operation for operation in operations if operation.get("op") != "test"]
+        else:
+            delta = make_patch(previous, board_data)
+        if not delta:
+            return board.version
+
+        version = board.version + 1
+        # Core UPDATE: bumps the version itself instead of going through the before_flush hook
+        result = await db.execute(
+            update(Board)
+            .where(Board.id == board.id, Board.version == board.version)
+            .values(board_data=board_data, version=version, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            current = await db.execute(select(Board.version).where(Board.id == board.id))
+            raise RevisionConflict(current.scalar())
+
+        await self._record_revision(db, board.id, version, previous, board_data, delta, user_id)
+        return version
+
+    async def _record_revision(self, db: AsyncSession, board_id: str, revision: int, previous: Dict[str, Any],
+                               board_data: Dict[str, Any], delta: List[Operation], user_id: Optional[int]):
+        """Store the delta, or a full snapshot when the chain since the last one is long enough
+
+        A snapshot is due after BOARD_REVISION_SNAPSHOT_INTERVAL deltas, or when the delta is
+        at least half the size of the last snapshot - reconstructing any revision then applies
+        a bounded number of small deltas. A board's first save also snapshots the state it started from.
+        """
+        interval = settings.BOARD_REVISION_SNAPSHOT_INTERVAL
+        result = await db.execute(
+            select(BoardRevision.kind, BoardRevision.size)
+            .where(BoardRevision.board_id == board_id)
+            .order_by(BoardRevision.revision.desc())
+            .limit(interval)
+        )
+        recent = result.all()
+        if not recent:
+            recent = [await self._insert_revision(db, board_id, revision - 1, "snapshot", previous, None)]
+        snapshot_size = next((row.size for row in recent if row.kind == "snapshot"), None)
+
+        if snapshot_size is not None and len(_compact_json(delta)) * 2 < snapshot_size:
+            await self._insert_revision(db, board_id, revision, "delta", delta, user_id)
+        else:
+            await self._insert_revision(db, board_id, revision, "snapshot", board_data, user_id)
+
+    async def _insert_revision(self, db: AsyncSession, board_id: str, revision: int, kind: str, data: Any,
+                               user_id: Optional[int]) -> BoardRevision:
+        row = BoardRevision(
+            board_id=board_id, revision=revision, kind=kind, data=data, size=len(_compact_json(data)),
+            user_id=user_id, created_at=datetime.utcnow()
+        )
+        db.add(row)
+        return row
+
+    @traced()
+    @read_only
+    async def list_revisions(self, db: AsyncSession, board_id: str, limit: int = 50,
+                             before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Revision metadata, newest first; pass the last revision as before for the next page"""
+        query = select(
+            BoardRevision.revision, BoardRevision.kind, BoardRevision.size,
+            BoardRevision.user_id, BoardRevision.created_at
+        ).where(BoardRevision.board_id == board_id)
+        if before is not None:
+            query = query.where(BoardRevision.revision < before)
+        result = await db.execute(query.order_by(BoardRevision.revision.desc()).limit(limit))
+        return [dict(row._mapping) for row in result]
+
+    @traced()
+    @read_only
+    async def get_revision(self, db: AsyncSession, board_id: str, revision: int) -> Optional[Dict[str, Any]]:
+        """board_data as of a revision: the nearest snapshot at or before it plus the deltas after it, in one query"""
+        snapshot = (
+            select(func.max(BoardRevision.revision))
+            .where(
+                BoardRevision.board_id == board_id,
+                BoardRevision.kind == "snapshot",
+                BoardRevision.revision <= revision
+            )
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            select(BoardRevision.revision, BoardRevision.data)
+            .where(
+                BoardRevision.board_id == board_id,
+                BoardRevision.revision >= snapshot,
+                BoardRevision.revision <= revision
+            )
+            .order_by(BoardRevision.revision)
+        )
+        rows = result.all()
+        if not rows or rows[-1].revision != revision:
+            return None
+        # Freshly decoded rows - the deltas can be applied in place
+        document = rows[0].data
+        for row in rows[1:]:
+            document = apply_patch(document, row.data, in_place=True)
+        return document
+
+# Global board service instance
+board_service = BoardService()
@@ -0,0 +1,366 @@
+"""
+Board Triggers
+Runs boards on cron schedules and on events - one elected worker keeps the due schedules in a heap
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import socket
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from core import metrics
+from core.cron import CronError, CronExpression, parse_cron
+from core.job_queue import job_queue
+from core.leases import LeaseLock
+from models.database import Board, BoardTrigger, Lease
+from services.board_artifacts import ARTIFACT_KEY, has_artifact_keys
+from services.board_executor import BoardGraphError, board_executor, evaluate_condition
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_TYPES = ("cron", "event")
+TRIGGER_EVENTS = ("chat_message", "form_submission", "notification")
+CATCH_UP_POLICIES = ("skip", "once", "all")
+
+SCHEDULER_LEASE = "board_scheduler"
+# Missed occurrences counted one by one before jumping to the last day - bounds the work after long downtime
+PLAN_SCAN_LIMIT = 10000
+
+def plan_runs(cron: CronExpression, due: datetime, now: datetime, catch_up: str) -> Tuple[List[datetime], int, datetime]:
+    """(scheduled times to run now, occurrences skipped, next run after now) for a trigger due at due
+
+    Occurrences later than the misfire grace are missed: "skip" drops them, "once" runs the latest
+    one, "all" runs up to BOARD_TRIGGER_MAX_CATCH_UP of the most recent.
+    """
+    grace = timedelta(seconds=settings.BOARD_TRIGGER_MISFIRE_GRACE_SECONDS)
+    recent = deque(maxlen=max(settings.BOARD_TRIGGER_MAX_CATCH_UP, 1))
+    occurrences = 0
+    moment = due
+    while moment <= now:
+        recent.append(moment)
+        occurrences += 1
+        if occurrences == PLAN_SCAN_LIMIT:
+            moment = max(cron.next_after(now - timedelta(days=1)), cron.next_after(moment))
+        else:
+            moment = cron.next_after(moment)
+
+    late = [scheduled for scheduled in recent if now - scheduled > grace]
+    on_time = [scheduled for scheduled in recent if now - scheduled <= grace]
+    if not late or catch_up == "skip":
+        runs = on_time
+    elif catch_up == "all":
+        runs = list(recent)
+    else:
+        runs = [recent[-1]]
+    return runs, occurrences - len(runs), moment
+
+def _trigger_input(trigger: BoardTrigger, fired_at: datetime, **details) -> Dict[str, Any]:
+    """The trigger's input_data plus what fired it under "trigger" """
+    return {
+        **(trigger.input_data or {}),
+        "trigger": {"id": trigger.id, "type": trigger.trigger_type, "fired_at": fired_at.isoformat(), **details}
+    }
+
+def validate_trigger(trigger_type: str, cron_expression: Optional[str], event: Optional[str],
+                     filter: Optional[Dict[str, Any]], catch_up: str, now: Optional[datetime] = None,
+                     input_data: Optional[Dict[str, Any]] = None) -> Optional[datetime]:
+    """The first run of a cron trigger (None for events); ValueError if the definition is invalid"""
+    if has_artifact_keys(input_data):
+        raise ValueError(f'Input data cannot contain "{ARTIFACT_KEY}" keys - they are reserved for artifacts')
+    if trigger_type not in TRIGGER_TYPES:
+        raise ValueError(f"Invalid trigger type - expected one of {', '.join(TRIGGER_TYPES)}")
+    if catch_up not in CATCH_UP_POLICIES:
+        raise ValueError(f"Invalid catch_up - expected one of {', '.join(CATCH_UP_POLICIES)}")
+    if trigger_type == "cron":
+        return parse_cron(cron_expression).next_after(now or datetime.utcnow())
+    if event not in TRIGGER_EVENTS:
+        raise ValueError(f"Invalid event - expected one of {', '.join(TRIGGER_EVENTS)}")
+    # Unknown operators only surface when evaluated
+    evaluate_condition(filter, {})
+    return None
+
+class TriggerScheduler:
+    """Fires cron triggers and dispatches events to event triggers
+
+    Only the worker holding the scheduler lease fires cron triggers. It loads the triggers due
+    within BOARD_SCHEDULER_WINDOW_SECONDS into a heap each time it renews the lease and sleeps
+    until the earliest one; each run is claimed by moving next_run_at on with a conditional
+    UPDATE, so a trigger is never fired twice even if two workers briefly both think they lead.
+    """
+
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = LeaseLock(SCHEDULER_LEASE, self.holder, settings.BOARD_SCHEDULER_LEASE_SECONDS)
+        self.last_lag_seconds: Optional[float] = None
+        self.max_lag_seconds = 0.0
+        self._heap: List[Tuple[datetime, str]] = []
+        self._window_end = datetime.min
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="board-trigger-scheduler")
+
+    async def stop(self):
+        """Stop scheduling and hand the lease to another worker right away"""
+        tasks = [task for task in (self._task, *self._dispatches) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._heap = []
+        try:
+            await self.lease.release()
+        except Exception as e:
+            logger.warning("Scheduler lease release failed: %s", e)
+        metrics.board_scheduler_leader.set(0)
+
+    def wake(self):
+        """Reload the schedule now - call after creating or changing a cron trigger"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        renew_every = settings.BOARD_SCHEDULER_LEASE_SECONDS / 3
+        while True:
+            try:
+                leader = await self.lease.acquire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Scheduler lease renewal failed: %s", e)
+                leader = False
+            metrics.board_scheduler_leader.set(1 if leader else 0)
+            renew_at = loop.time() + renew_every
+
+            if not leader:
+                self._heap = []
+                metrics.board_scheduler_pending.set(0)
+                await self._sleep(renew_every)
+                continue
+            try:
+                await self._load()
+                while True:
+                    await self._fire_due()
+                    delay = renew_at - loop.time()
+                    if self._heap:
+                        delay = min(delay, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+                    if delay > 0 and await self._sleep(delay):
+                        break
+                    if loop.time() >= renew_at:
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Scheduler pass failed: %s", e)
+                await self._sleep(renew_every)
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Wait up to seconds; True if woken by wake()"""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _load(self):
+        """Heap of the active cron triggers due before the end of the window - one indexed range scan"""
+        self._window_end = datetime.utcnow() + timedelta(seconds=settings.BOARD_SCHEDULER_WINDOW_SECONDS)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(BoardTrigger.next_run_at, BoardTrigger.id)
+                .where(
+                    BoardTrigger.trigger_type == "cron",
+                    BoardTrigger.is_active.is_(True),
+                    BoardTrigger.next_run_at <= self._window_end
+                )
+            )
+            self._heap = [(row.next_run_at, row.id) for row in result]
+        heapq.heapify(self._heap)
+        metrics.board_scheduler_pending.set(len(self._heap))
+
+    async def _fire_due(self):
+        while self._heap and self._heap[0][0] <= datetime.utcnow() and self.lease.held:
+            due, trigger_id = heapq.heappop(self._heap)
+            try:
+                next_run = await self._fire(trigger_id, due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Trigger %s could not be fired: %s", trigger_id, e)
+                continue
+            if next_run is not None and next_run <= self._window_end:
+                heapq.heappush(self._heap, (next_run, trigger_id))
+        metrics.board_scheduler_pending.set(len(self._heap))
+
+    async def _fire(self, trigger_id: str, due: datetime) -> Optional[datetime]:
+        """Queue the runs of one due trigger and move it to its next occurrence; returns that occurrence"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(BoardTrigger, Board.status, Board.version)
+                .join(Board, Board.id == BoardTrigger.board_id)
+                .where(BoardTrigger.id == trigger_id)
+            )
+            row = result.first()
+            if row is None or not row.BoardTrigger.is_active or row.BoardTrigger.next_run_at != due:
+                # Deleted, paused or rescheduled since the heap was loaded
+                return None
+            trigger = row.BoardTrigger
+            now = datetime.utcnow()
+            try:
+                runs, missed, next_run = plan_runs(parse_cron(trigger.cron_expression), due, now, trigger.catch_up)
+            except CronError as e:
+                runs, missed, next_run = [], 0, None
+                error = str(e)
+            else:
+                error = None if row.status == "active" else "Board is not active"
+
+            queued = 0
+            if runs and error is None:
+                try:
+                    for scheduled in runs:
+                        await board_executor.queue_execution(
+                            session, trigger.board_id, row.version, trigger.user_id,
+                            _trigger_input(trigger, now, scheduled_at=scheduled.isoformat()),
+                            execution_type="scheduled"
+                        )
+                        queued += 1
+                except BoardGraphError as e:
+                    error = str(e)
+
+            values: Dict[str, Any] = {
+                "next_run_at": next_run, "last_error": error, "updated_at": BoardTrigger.updated_at
+            }
+            if queued:
+                values.update(last_run_at=now, run_count=BoardTrigger.run_count + queued)
+            # Claim this occurrence - whoever moved next_run_at first owns it
+            claimed = await session.execute(
+                update(BoardTrigger)
+                .where(BoardTrigger.id == trigger_id, BoardTrigger.next_run_at == due)
+                .values(**values)
+            )
+            if claimed.rowcount != 1:
+                await session.rollback()
+                return None
+            await session.commit()
+
+        if queued:
+            job_queue.wake()
+        lag = (now - due).total_seconds()
+        self.last_lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        metrics.board_trigger_lag.observe(lag, trigger_type="cron")
+        if queued:
+            metrics.board_trigger_runs.inc(queued, trigger_type="cron", outcome="queued")
+        if missed:
+            metrics.board_trigger_runs.inc(missed, trigger_type="cron", outcome="missed")
+        if error is not None:
+            if runs and not queued:
+                metrics.board_trigger_runs.inc(len(runs), trigger_type="cron", outcome="failed")
+            logger.warning("Trigger %s of board %s failed: %s", trigger_id, trigger.board_id, error)
+        return next_run
+
+    def emit(self, event: str, user_id: Optional[int], payload: Dict[str, Any]):
+        """Run the user's triggers for this event in the background - the caller never waits on them"""
+        if not settings.BOARD_TRIGGERS_ENABLED or user_id is None:
+            return
+        task = asyncio.create_task(self._dispatch(event, user_id, payload, datetime.utcnow()))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, event: str, user_id: int, payload: Dict[str, Any], occurred_at: datetime):
+        try:
+            queued = await self.dispatch(event, user_id, payload, occurred_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Dispatching %s for user %s failed: %s", event, user_id, e)
+            return
+        if queued:
+            job_queue.wake()
+
+    async def dispatch(self, event: str, user_id: int, payload: Dict[str, Any],
+                       occurred_at: Optional[datetime] = None) -> int:
+        """Queue a run of every active event trigger of the user whose filter matches; returns the runs queued"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(BoardTrigger, Board.version)
+                .join(Board, Board.id == BoardTrigger.board_id)
+                .where(
+                    BoardTrigger.trigger_type == "event",
+                    BoardTrigger.event == event,
+                    BoardTrigger.user_id == user_id,
+                    BoardTrigger.is_active.is_(True),
+                    Board.status == "active"
+                )
+            )
+            rows = result.all()
+            if not rows:
+                return 0
+
+            now = datetime.utcnow()
+            queued = 0
+            for trigger, version in rows:
+                try:
+                    if not evaluate_condition(trigger.filter, payload):
+                        continue
+                    await board_executor.queue_execution(
+                        session, trigger.board_id, version, trigger.user_id,
+                        {**_trigger_input(trigger, now, event=event), "data": payload},
+                        execution_type="event"
+                    )
+                except BoardGraphError as e:
+                    values = {"last_error": str(e)}
+                    metrics.board_trigger_runs.inc(trigger_type="event", outcome="failed")
+                else:
+                    values = {"last_error": None, "last_run_at": now, "run_count": BoardTrigger.run_count + 1}
+                    queued += 1
+                await session.execute(
+                    update(BoardTrigger)
+                    .where(BoardTrigger.id == trigger.id)
+                    .values(updated_at=BoardTrigger.updated_at, **values)
+                )
+            await session.commit()
+
+        if queued:
+            metrics.board_trigger_runs.inc(queued, trigger_type="event", outcome="queued")
+            metrics.board_trigger_lag.observe((now - (occurred_at or now)).total_seconds(), trigger_type="event")
+        return queued
+
+    async def status(self) -> Dict[str, Any]:
+        """This worker's view of the scheduler, and who holds the lease"""
+        async with AsyncSessionLocal() as session:
+            lease = await session.get(Lease, SCHEDULER_LEASE)
+        return {
+            "enabled": settings.BOARD_TRIGGERS_ENABLED,
+            "running": self.running,
+            "worker": self.holder,
+            "leader": lease.holder if lease is not None and lease.expires_at > datetime.utcnow() else None,
+            "is_leader": self.lease.held,
+            "pending": len(self._heap),
+            "next_due_at": self._heap[0][0].isoformat() if self._heap else None,
+            "last_lag_seconds": self.last_lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "event_dispatches_in_flight": len(self._dispatches)
+        }
+
+# Global board trigger scheduler instance
+trigger_scheduler = TriggerScheduler()
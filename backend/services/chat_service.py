@@ -12,11 +12,15 @@ from fastapi import HTTPException
 from datetime import datetime
 import logging
 import uuid  # NEW: For generating unique conversation links
+from config.database import read_only
+from core.tracing import traced
+from services.board_triggers import trigger_scheduler
 
 class ChatService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
+    @traced()
     async def get_user_conversations(
         self, db: AsyncSession, user_id: int, limit: int = 20, offset: int = 0
     ) -> List[Dict[str, Any]]:
@@ -36,6 +40,7 @@ class ChatService:
             logging.error(f"Error getting user conversations: {e}")
             return []
     
+    @traced()
     async def get_user_conversations_count(self, db: AsyncSession, user_id: int) -> int:
         """Get total count of user conversations"""
         try:
@@ -48,6 +53,7 @@ class ChatService:
             logging.error(f"Error getting conversation count: {e}")
             return 0
     
+    @traced()
     async def create_conversation(
         self, db: AsyncSession, title: str, user_id: int, agent_id: Optional[int] = None
     ) -> Dict[str, Any]:
@@ -85,6 +91,7 @@ class ChatService:
             self.logger.error(f"Error creating conversation: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to create conversation: {str(e)}")
 
+    @traced()
     async def get_conversation_by_uuid(
         self, db: AsyncSession, conversation_uuid: str, user_id: int
     ) -> Optional[Dict[str, Any]]:
@@ -121,6 +128,7 @@ class ChatService:
             self.logger.error(f"Error getting conversation by UUID: {e}")
             return None
 
+    @traced()
     async def get_conversation_by_id(
         self, db: AsyncSession, conversation_id: int, user_id: int = None
     ) -> Optional[Dict[str, Any]]:
@@ -152,6 +160,7 @@ class ChatService:
             self.logger.error(f"Error getting conversation by ID: {e}")
             return None
 
+    @traced()
     async def update_conversation_by_uuid(
         self, db: AsyncSession, conversation_uuid: str, update_data: Dict[str, Any], user_id: int
     ) -> bool:
@@ -179,6 +188,7 @@ class ChatService:
             self.logger.error(f"Error updating conversation by UUID: {e}")
             return False
 
+    @traced()
     async def update_conversation(
         self, db: AsyncSession, conversation_id: int, update_data: Dict[str, Any]
     ) -> bool:
@@ -204,6 +214,7 @@ class ChatService:
             self.logger.error(f"Error updating conversation: {e}")
             return False
     
+    @traced()
     async def delete_conversation(self, db: AsyncSession, conversation_id: str) -> bool:
         """Delete conversation (soft delete by setting title to null)"""
         try:
@@ -220,6 +231,7 @@ class ChatService:
             logging.error(f"Error deleting conversation: {e}")
             return False
     
+    @traced()
     async def get_conversation_messages(
         self, db: AsyncSession, conversation_id: str, limit: int = 50, offset: int = 0
     ) -> List[Dict[str, Any]]:
@@ -241,6 +253,7 @@ class ChatService:
             logging.error(f"Error getting conversation messages: {e}")
             return []
     
+    @traced()
     async def get_conversation_messages_count(
         self, db: AsyncSession, conversation_id: str
     ) -> int:
@@ -257,10 +270,12 @@ class ChatService:
             logging.error(f"Error getting message count: {e}")
             return 0
     
+    @traced()
     async def add_message_to_conversation(
         self, db: AsyncSession, conversation_id: str, content: str,
         sender_type: str = "user", agent_id: Optional[int] = None,
-        tokens_used: int = 0, processing_time: int = 0, model_used: str = "unknown"
+        tokens_used: int = 0, processing_time: int = 0, model_used: str = "unknown",
+        cost: float = 0.0
     ) -> Dict[str, Any]:
         """Add message to conversation - updated for new schema"""
         try:
@@ -303,7 +318,7 @@ class ChatService:
                 status='sent',
                 visibility='normal',
                 tokens_used=tokens_used,
-                cost=0.0,
+                cost=cost,
                 is_edited=False,
                 is_educational=False,
                 thread_count=0
@@ -317,6 +332,14 @@ class ChatService:
             conversation.updated_at = datetime.utcnow()
             await db.commit()
             
+            if sender_type == "user":
+                trigger_scheduler.emit("chat_message", conversation.user_id, {
+                    "conversation_id": conversation.uuid,
+                    "agent_id": conversation.agent_id,
+                    "message_id": message.id,
+                    "content": content
+                })
+            
             self.logger.info(f"Message {message.id} added successfully to conversation {conv_id}")
             
             return {
@@ -344,10 +367,11 @@ class ChatService:
             self.logger.error(f"  Traceback: {traceback.format_exc()}")
             raise Exception(error_msg)
     
+    @traced()
     async def generate_ai_response(
         self, db: AsyncSession, conversation_id: str, message: str,
         agent_id: Optional[int] = None, conversation_history: Optional[List] = None,
-        include_context: bool = True
+        include_context: bool = True, user_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """Generate AI response using real agent system"""
         try:
@@ -399,7 +423,7 @@ class ChatService:
             logging.info(f"🤖 Generating AI response using Agent {agent_id} for message: {message[:100]}...")
             
             # ✅ USE REAL AGENT INSTEAD OF MOCK
-            result = await agent_service.test_agent(db, agent_id, message)
+            result = await agent_service.test_agent(db, agent_id, message, user_id=user_id)
             
             if result.get("status") == "error":
                 error_msg = result.get("message", "Agent test failed")
@@ -420,6 +444,7 @@ class ChatService:
             # Extract performance metrics
             performance = result.get("performance", {})
             tokens_used = test_results.get("tokens_used", 0)
+            cost = test_results.get("cost_estimate", 0.0)
             processing_time = performance.get("response_time_ms", 0) / 1000.0  # Convert to seconds
             
             # FIXED: Get model info from agent_info section
@@ -437,7 +462,8 @@ class ChatService:
                 agent_id=agent_id,
                 tokens_used=tokens_used,
                 processing_time=int(processing_time * 1000),  # Store as milliseconds
-                model_used=model_used
+                model_used=model_used,
+                cost=cost
             )
             
             return {
@@ -445,6 +471,7 @@ class ChatService:
                 "agent_id": agent_id,
                 "processing_time": processing_time,
                 "tokens_used": tokens_used,
+                "cost": cost,
                 "model_used": model_used,
                 "status": "success"
             }
@@ -464,6 +491,8 @@ class ChatService:
                 "error": str(e)
             }
     
+    @traced()
+    @read_only
     async def get_user_chat_analytics(
         self, db: AsyncSession, user_id: int
     ) -> Dict[str, Any]:
@@ -507,6 +536,8 @@ class ChatService:
                 "recent_activity": []
             }
     
+    @traced()
+    @read_only
     async def get_global_chat_analytics(self, db: AsyncSession) -> Dict[str, Any]:
         """Get global chat analytics"""
         try:
@@ -542,6 +573,7 @@ class ChatService:
                 "recent_activity": []
             }
     
+    @traced()
     async def search_user_messages(
         self, db: AsyncSession, user_id: int, query: str,
         conversation_id: Optional[str] = None, limit: int = 20
@@ -1,10 +1,9 @@
 from typing import Optional, Dict, Any
+from core.lazy_imports import is_available, load_module
 
-GEMINI_AVAILABLE = False
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
+# The SDK itself is imported on first use - it is slow to import and most workers never need it
+GEMINI_AVAILABLE = is_available("google.generativeai")
+if not GEMINI_AVAILABLE:
     print("Warning: google-generativeai not installed. Gemini features will be disabled.")
 
 class GeminiService:
@@ -21,6 +20,7 @@ class GeminiService:
             }
             
         try:
+            genai = await load_module("google.generativeai")
             genai.configure(api_key=api_key)
             self.model = genai.GenerativeModel('gemini-pro')
             return {"success": True}
@@ -0,0 +1,306 @@
+"""
+Usage Service
+Per-model pricing, per-user and per-agent token/cost quotas, and buffered usage counters
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, text
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.database import UsageCounter
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens (input, output) from the providers' published price lists.
+# Model names are matched by longest prefix, so dated snapshots resolve to their family.
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    # OpenAI
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4-32k": (60.00, 120.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo-instruct": (1.50, 2.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o1-mini": (1.10, 4.40),
+    "o1": (15.00, 60.00),
+    "o3-mini": (1.10, 4.40),
+    # Anthropic
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-3-sonnet": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    # Google
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+# Providers running on the user's own hardware
+LOCAL_PROVIDERS = ("ollama", "lmstudio", "textgen", "localai", "llamafile", "jan", "vllm", "llamacppserver")
+
+_PRICING_PREFIXES = sorted(MODEL_PRICING, key=len, reverse=True)
+_unpriced_models = set()
+
+def model_cost(provider: str, model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one call; local providers are free and unknown models are logged once and counted as 0"""
+    if (provider or "").lower() in LOCAL_PROVIDERS:
+        return 0.0
+    name = (model or "").lower()
+    for prefix in _PRICING_PREFIXES:
+        if name.startswith(prefix):
+            input_price, output_price = MODEL_PRICING[prefix]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    if name not in _unpriced_models:
+        _unpriced_models.add(name)
+        logger.warning("No pricing for %s model %r - its calls count tokens but no cost", provider, model)
+    return 0.0
+
+def _limits(scope: str) -> Dict[str, Dict[str, float]]:
+    if scope == "user":
+        return {
+            "day": {"tokens": settings.QUOTA_USER_DAILY_TOKENS, "cost": settings.QUOTA_USER_DAILY_COST},
+            "month": {"tokens": settings.QUOTA_USER_MONTHLY_TOKENS, "cost": settings.QUOTA_USER_MONTHLY_COST},
+        }
+    return {
+        "day": {"tokens": settings.QUOTA_AGENT_DAILY_TOKENS, "cost": settings.QUOTA_AGENT_DAILY_COST},
+        "month": {"tokens": settings.QUOTA_AGENT_MONTHLY_TOKENS, "cost": settings.QUOTA_AGENT_MONTHLY_COST},
+    }
+
+def _periods(now: Optional[datetime] = None) -> Dict[str, str]:
+    now = now or datetime.now(timezone.utc)
+    return {"day": now.strftime("%Y-%m-%d"), "month": now.strftime("%Y-%m")}
+
+class QuotaExceeded(Exception):
+    def __init__(self, scope: str, scope_id: int, period: str, metric: str, limit: float, used: float):
+        self.scope = scope
+        self.scope_id = scope_id
+        self.period = period
+        self.metric = metric
+        self.limit = limit
+        self.used = used
+        unit = "USD" if metric == "cost" else "tokens"
+        super().__init__(
+            f"{'Daily' if period == 'day' else 'Monthly'} {scope} quota reached: "
+            f"{round(used, 4)} of {limit} {unit}"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scope": self.scope,
+            "scope_id": self.scope_id,
+            "period": self.period,
+            "metric": self.metric,
+            "limit": self.limit,
+            "used": round(self.used, 6)
+        }
+
+# Counter values: [prompt_tokens, completion_tokens, cost, requests]
+CounterKey = Tuple[str, int, str]
+
+def _add(target: List[float], delta: List[float]):
+    for index, value in enumerate(delta):
+        target[index] += value
+
+class UsageTracker:
+    """Quota checks against in-memory totals; increments are written to usage_counters in batches
+
+    Totals are loaded from the table on first use and dropped after every flush, so usage
+    recorded by other workers becomes visible within USAGE_FLUSH_SECONDS.
+    """
+
+    def __init__(self):
+        self._totals: Dict[CounterKey, List[float]] = {}
+        self._pending: Dict[CounterKey, List[float]] = {}
+        self._flushing: Dict[CounterKey, List[float]] = {}
+        self._generation = 0
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="usage-flusher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.USAGE_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Usage flush failed: %s", e)
+
+    def _keys(self, user_id: Optional[int], agent_id: Optional[int]) -> List[CounterKey]:
+        periods = _periods()
+        keys = []
+        for scope, scope_id in (("user", user_id), ("agent", agent_id)):
+            if scope_id is not None:
+                keys.extend((scope, scope_id, periods[period]) for period in ("day", "month"))
+        return keys
+
+    async def _load(self, keys: List[CounterKey]) -> Dict[CounterKey, List[float]]:
+        """Totals for keys: the stored row plus increments not yet written"""
+        missing = [key for key in keys if key not in self._totals]
+        totals = {key: self._totals[key] for key in keys if key in self._totals}
+        if not missing:
+            return totals
+
+        generation = self._generation
+        stored = {key: [0, 0, 0.0, 0] for key in missing}
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(UsageCounter).where(or_(*(
+                    and_(UsageCounter.scope == scope, UsageCounter.scope_id == scope_id, UsageCounter.period == period)
+                    for scope, scope_id, period in missing
+                )))
+            )
+            for row in result.scalars():
+                stored[(row.scope, row.scope_id, row.period)] = [
+                    row.prompt_tokens, row.completion_tokens, row.cost, row.requests
+                ]
+
+        for key, values in stored.items():
+            for unsaved in (self._flushing.get(key), self._pending.get(key)):
+                if unsaved:
+                    _add(values, unsaved)
+            # A flush that finished while we were reading makes this snapshot stale - use it once only
+            if generation == self._generation:
+                self._totals[key] = values
+            totals[key] = values
+        return totals
+
+    async def check(self, user_id: Optional[int], agent_id: Optional[int]):
+        """Raise QuotaExceeded if the user or agent has used up a daily or monthly budget"""
+        keys = self._keys(user_id, agent_id)
+        if not keys:
+            return
+        totals = await self._load(keys)
+        periods = {value: name for name, value in _periods().items()}
+        for key in keys:
+            scope, scope_id, period_value = key
+            period = periods[period_value]
+            limits = _limits(scope)[period]
+            prompt_tokens, completion_tokens, cost, _ = totals[key]
+            if limits["tokens"] and prompt_tokens + completion_tokens >= limits["tokens"]:
+                raise QuotaExceeded(scope, scope_id, period, "tokens", limits["tokens"], prompt_tokens + completion_tokens)
+            if limits["cost"] and cost >= limits["cost"]:
+                raise QuotaExceeded(scope, scope_id, period, "cost", limits["cost"], cost)
+
+    def record(self, user_id: Optional[int], agent_id: Optional[int], provider: str, model: Optional[str],
+               prompt_tokens: int, completion_tokens: int) -> float:
+        """Count a finished provider call; returns its cost in USD"""
+        cost = model_cost(provider, model, prompt_tokens, completion_tokens)
+        delta = [prompt_tokens, completion_tokens, cost, 1]
+        for key in self._keys(user_id, agent_id):
+            _add(self._pending.setdefault(key, [0, 0, 0.0, 0]), delta)
+            if key in self._totals:
+                _add(self._totals[key], delta)
+        return cost
+
+    async def flush(self):
+        """Write pending increments as one batched upsert"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            rows = [
+                {
+                    "scope": scope, "scope_id": scope_id, "period": period,
+                    "prompt_tokens": values[0], "completion_tokens": values[1],
+                    "cost": values[2], "requests": values[3], "updated_at": datetime.utcnow()
+                }
+                for (scope, scope_id, period), values in self._flushing.items()
+            ]
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(text("""
+                        INSERT INTO usage_counters
+                            (scope, scope_id, period, prompt_tokens, completion_tokens, cost, requests, updated_at)
+                        VALUES
+                            (:scope, :scope_id, :period, :prompt_tokens, :completion_tokens, :cost, :requests, :updated_at)
+                        ON CONFLICT (scope, scope_id, period) DO UPDATE SET
+                            prompt_tokens = usage_counters.prompt_tokens + excluded.prompt_tokens,
+                            completion_tokens = usage_counters.completion_tokens + excluded.completion_tokens,
+                            cost = usage_counters.cost + excluded.cost,
+                            requests = usage_counters.requests + excluded.requests,
+                            updated_at = excluded.updated_at
+                    """), rows)
+                    await session.commit()
+            except Exception:
+                # Keep the increments for the next attempt
+                for key, values in self._flushing.items():
+                    _add(self._pending.setdefault(key, [0, 0, 0.0, 0]), values)
+                self._flushing = {}
+                raise
+            self._flushing = {}
+            self._totals.clear()
+            self._generation += 1
+
+    async def get_usage(self, scope: str, scope_id: int, days: int = 30) -> Dict[str, Any]:
+        """Current day and month against their limits, plus daily history"""
+        periods = _periods()
+        keys = [(scope, scope_id, periods["day"]), (scope, scope_id, periods["month"])]
+        totals = await self._load(keys)
+        limits = _limits(scope)
+
+        current = {}
+        for period, key in zip(("day", "month"), keys):
+            prompt_tokens, completion_tokens, cost, requests = totals[key]
+            tokens = prompt_tokens + completion_tokens
+            current[period] = {
+                "period": key[2],
+                "prompt_tokens": int(prompt_tokens),
+                "completion_tokens": int(completion_tokens),
+                "total_tokens": int(tokens),
+                "cost": round(cost, 6),
+                "requests": int(requests),
+                "token_limit": limits[period]["tokens"] or None,
+                "cost_limit": limits[period]["cost"] or None,
+                "tokens_remaining": max(0, limits[period]["tokens"] - tokens) if limits[period]["tokens"] else None,
+                "cost_remaining": round(max(0.0, limits[period]["cost"] - cost), 6) if limits[period]["cost"] else None
+            }
+
+        async with AsyncSessionLocal(info={"read_only": True}) as session:
+            result = await session.execute(
+                select(UsageCounter)
+                .where(and_(
+                    UsageCounter.scope == scope,
+                    UsageCounter.scope_id == scope_id,
+                    UsageCounter.period.like("____-__-__")
+                ))
+                .order_by(UsageCounter.period.desc())
+                .limit(days)
+            )
+            history = [
+                {
+                    "date": row.period,
+                    "total_tokens": row.prompt_tokens + row.completion_tokens,
+                    "cost": round(row.cost, 6),
+                    "requests": row.requests
+                }
+                for row in result.scalars()
+            ]
+
+        return {"scope": scope, "scope_id": scope_id, "current": current, "history": history}
+
+# Global usage tracker instance
+usage_tracker = UsageTracker()
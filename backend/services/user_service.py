@@ -10,6 +10,9 @@ from models.database import User, UserSession
 from fastapi import HTTPException
 import logging
 from sqlalchemy.orm.attributes import flag_modified
+from config.database import read_only
+from core.cache import cached, invalidate
+from core.principal_cache import principal_cache
 
 class UserService:
     """User management service"""
@@ -50,6 +53,10 @@ class UserService:
                     setattr(user, key, value)
                     
             await db.commit()
+            if "is_active" in updates or "role" in updates:
+                principal_cache.invalidate_user(user_id)
+            if "is_active" in updates:
+                await invalidate("users")
             return True
             
         except Exception:
@@ -65,11 +72,15 @@ class UserService:
             )
             result = await db.execute(query)
             await db.commit()
+            principal_cache.invalidate_user(user_id)
+            await invalidate("users")
             return result.rowcount > 0
         except Exception:
             await db.rollback()
             return False
     
+    @cached(tags=("users",))
+    @read_only
     async def get_user_statistics(self, db: AsyncSession) -> Dict[str, Any]:
         """Get user statistics"""
         total = await db.scalar(select(func.count()).select_from(User))
@@ -257,6 +268,9 @@ class UserService:
                 
             user.updated_at = func.now()
             await db.commit()
+            principal_cache.invalidate_user(user_id)
+            if "is_active" in allowed:
+                await invalidate("users")
             return True
             
         except Exception:
@@ -317,6 +331,8 @@ class UserService:
             user.is_active = False
             user.updated_at = func.now()
             await db.commit()
+            principal_cache.invalidate_user(user_id)
+            await invalidate("users")
             return True
             
         except Exception:
@@ -336,6 +352,8 @@ class UserService:
             user.is_active = True
             user.updated_at = func.now()
             await db.commit()
+            principal_cache.invalidate_user(user_id)
+            await invalidate("users")
             return True
             
         except Exception: